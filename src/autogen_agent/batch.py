@@ -0,0 +1,251 @@
+"""
+Modo por lotes: ejecuta create_music_recommendation sobre un fichero de
+consultas (CSV o JSONL con las columnas query, num_songs y email) mediante
+un grupo de hilos y escribe un resultado JSONL por consulta.
+
+Uso:
+    python -m autogen_agent.batch consultas.jsonl -o resultados.jsonl -c 8
+"""
+import argparse
+import contextlib
+import csv
+import json
+import math
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from autogen_agent.metrics import get_metrics
+
+
+def _read_rows(f, is_csv):
+    """
+    Recorre las filas de un fichero CSV o JSONL junto con su número de línea.
+
+    Yields:
+        tuple: (línea, fila) o (línea, mensaje de error) si la línea no es JSON válido.
+    """
+    if is_csv:
+        reader = csv.DictReader(f)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for line_number, line in enumerate(f, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_number, f"JSON inválido: {e.msg}"
+            continue
+        yield line_number, row if isinstance(row, dict) else "la línea no es un objeto JSON"
+
+def load_queries(path):
+    """
+    Lee las consultas de un fichero CSV o JSONL. Las filas sin consulta se
+    omiten; las filas mal formadas (JSON inválido o num_songs que no es un
+    entero positivo) no detienen la lectura, sino que se devuelven con la
+    clave error para que run_batch las registre sin ejecutarlas.
+
+    Args:
+        path (str): Ruta del fichero. Se interpreta como CSV si termina en .csv.
+
+    Returns:
+        list: Diccionarios con las claves query, num_songs y email, o con las
+            claves query, line y error si la fila no es válida.
+    """
+    queries = []
+
+    def invalid(line_number, query, error):
+        print(f"⚠️ Línea {line_number} omitida: {error}")
+        queries.append({"query": query, "line": line_number, "error": error})
+
+    with open(path, newline="", encoding="utf-8") as f:
+        for line_number, row in _read_rows(f, path.lower().endswith(".csv")):
+            if isinstance(row, str):
+                invalid(line_number, None, row)
+                continue
+            query = str(row.get("query") or "").strip()
+            if not query:
+                continue
+
+            num_songs = row.get("num_songs")
+            if num_songs is None or not str(num_songs).strip():
+                num_songs = 20
+            else:
+                try:
+                    num_songs = int(num_songs)
+                except (TypeError, ValueError):
+                    num_songs = None
+            if num_songs is None or num_songs <= 0:
+                invalid(line_number, query, f"num_songs inválido: {row.get('num_songs')!r}")
+                continue
+
+            queries.append({
+                "query": query,
+                "num_songs": num_songs,
+                "email": str(row.get("email") or "").strip() or None
+            })
+    return queries
+
+def percentile(values, pct):
+    """
+    Calcula un percentil por el método del rango más cercano.
+
+    Args:
+        values (list): Los valores numéricos.
+        pct (float): El percentil (0-100).
+
+    Returns:
+        float: El valor del percentil, o 0.0 si no hay valores.
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+def summarize_latencies(values):
+    """
+    Resume una lista de latencias.
+
+    Args:
+        values (list): Latencias en segundos.
+
+    Returns:
+        dict: Número de muestras, p50, p95, p99 y máximo.
+    """
+    return {
+        "count": len(values),
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "max": max(values) if values else 0.0
+    }
+
+def run_batch(queries, output_path, concurrency=4, recommend=None):
+    """
+    Ejecuta las consultas en paralelo y escribe cada resultado en cuanto termina.
+
+    Las consultas inválidas (con la clave error) se escriben como errores
+    sin ejecutarse.
+
+    Args:
+        queries (list): Las consultas devueltas por load_queries.
+        output_path (str): Ruta del fichero JSONL de resultados.
+        concurrency (int): Número de consultas simultáneas (por defecto: 4).
+        recommend (callable): Función que procesa cada consulta
+            (por defecto: main.create_music_recommendation).
+
+    Returns:
+        dict: Resumen con rendimiento, errores y latencias por etapa.
+    """
+    if recommend is None:
+        from autogen_agent.main import create_music_recommendation
+        recommend = create_music_recommendation
+
+    stage_latencies = {}
+    total_latencies = []
+    failures = 0
+
+    def process(index, item):
+        start = time.perf_counter()
+        try:
+            result = recommend(item["query"], item["email"], item["num_songs"])
+            return index, item, result, None, time.perf_counter() - start
+        except Exception as e:
+            return index, item, None, f"{type(e).__name__}: {e}", time.perf_counter() - start
+
+    batch_start = time.perf_counter()
+    with open(output_path, "w", encoding="utf-8") as output, \
+            ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        futures = []
+        for index, item in enumerate(queries):
+            if "error" in item:
+                failures += 1
+                record = {"index": index, "query": item["query"], "line": item["line"], "status": "error",
+                          "error": item["error"]}
+                output.write(json.dumps(record, ensure_ascii=False) + "\n")
+                continue
+            futures.append(executor.submit(process, index, item))
+        output.flush()
+
+        for future in as_completed(futures):
+            index, item, result, error, elapsed = future.result()
+            record = {
+                "index": index,
+                "query": item["query"],
+                "status": "error" if error else "ok",
+                "elapsed_seconds": elapsed
+            }
+            if error:
+                failures += 1
+                record["error"] = error
+            else:
+                record["result"] = result
+                for stage, seconds in (result.get("timings") or {}).items():
+                    stage_latencies.setdefault(stage, []).append(seconds)
+            total_latencies.append(elapsed)
+
+            # Los resultados se escriben desde el hilo principal a medida que terminan
+            output.write(json.dumps(record, ensure_ascii=False) + "\n")
+            output.flush()
+    wall_seconds = time.perf_counter() - batch_start
+
+    return {
+        "queries": len(queries),
+        "succeeded": len(queries) - failures,
+        "failed": failures,
+        "wall_seconds": wall_seconds,
+        "throughput_qps": len(queries) / wall_seconds if wall_seconds else 0.0,
+        "end_to_end": summarize_latencies(total_latencies),
+        "stages": {stage: summarize_latencies(values) for stage, values in stage_latencies.items()}
+    }
+
+def print_summary(summary):
+    """
+    Muestra el resumen de una ejecución por lotes.
+
+    Args:
+        summary (dict): El resumen devuelto por run_batch.
+    """
+    print("\n📊 Resumen del lote:")
+    print(f"- Consultas: {summary['queries']} ({summary['succeeded']} correctas, {summary['failed']} con error)")
+    print(f"- Tiempo total: {summary['wall_seconds']:.2f}s")
+    print(f"- Rendimiento: {summary['throughput_qps']:.2f} consultas/s")
+    print("\n⏱️ Latencias (p50 / p95 / p99 / máx, en segundos):")
+    rows = [("total", summary["end_to_end"])] + sorted(summary["stages"].items())
+    for stage, stats in rows:
+        print(
+            f"  {stage:<18} {stats['p50']:8.3f} {stats['p95']:8.3f} "
+            f"{stats['p99']:8.3f} {stats['max']:8.3f}  (n={stats['count']})"
+        )
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Crea recomendaciones musicales a partir de un fichero de consultas.")
+    parser.add_argument("input", help="Fichero CSV o JSONL con las columnas query, num_songs y email")
+    parser.add_argument("-o", "--output", default="resultados.jsonl", help="Fichero JSONL de resultados")
+    parser.add_argument("-c", "--concurrency", type=int, default=int(os.getenv("BATCH_CONCURRENCY", 4)),
+                        help="Consultas simultáneas (por defecto: BATCH_CONCURRENCY o 4)")
+    parser.add_argument("-q", "--quiet", action="store_true", help="Oculta la salida de cada consulta")
+    parser.add_argument("--metrics", help="Guarda las métricas (.prom para Prometheus, JSON en otro caso)")
+    args = parser.parse_args(argv)
+
+    queries = load_queries(args.input)
+    print(f"🎵 Procesando {len(queries)} consultas con concurrencia {args.concurrency}...")
+
+    if args.quiet:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            summary = run_batch(queries, args.output, args.concurrency)
+    else:
+        summary = run_batch(queries, args.output, args.concurrency)
+
+    print_summary(summary)
+    print(f"\n💾 Resultados guardados en {args.output}")
+    if args.metrics:
+        get_metrics().write(args.metrics)
+        print(f"📈 Métricas guardadas en {args.metrics}")
+    return 0 if summary["failed"] == 0 else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
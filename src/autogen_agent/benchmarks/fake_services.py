@@ -0,0 +1,417 @@
+"""
+Servidores locales que imitan Last.fm, Spotify, YouTube, Ollama y SMTP para
+medir el rendimiento sin red. Cada servicio añade una latencia aleatoria
+(log-normal) y puede devolver errores con una probabilidad configurable.
+
+Uso:
+    with FakeServices(seed=42) as services:
+        os.environ.update(services.environment(workdir))
+        ...
+"""
+import hashlib
+import json
+import math
+import os
+import random
+import socketserver
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class LatencyProfile:
+    def __init__(self, latency=0.05, jitter=0.3, error_rate=0.0, error_status=503, token_latency=0.005):
+        """
+        Inicializa el perfil de latencia y errores de un servicio simulado.
+
+        Args:
+            latency (float): Mediana de la latencia de cada respuesta en segundos.
+            jitter (float): Desviación de la distribución log-normal (0 = latencia fija).
+            error_rate (float): Probabilidad de responder con error_status (0-1).
+            error_status (int): Código HTTP de los errores simulados.
+            token_latency (float): Segundos entre tokens de las respuestas de Ollama.
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.token_latency = token_latency
+
+    def sample(self, rng):
+        """
+        Obtiene una latencia aleatoria según el perfil.
+
+        Args:
+            rng (random.Random): El generador aleatorio del servicio.
+
+        Returns:
+            float: La latencia en segundos.
+        """
+        if self.latency <= 0:
+            return 0.0
+        if not self.jitter:
+            return self.latency
+        return rng.lognormvariate(math.log(self.latency), self.jitter)
+
+    def scaled(self, factor):
+        """
+        Devuelve una copia del perfil con las latencias multiplicadas por factor.
+
+        Args:
+            factor (float): El factor de escala.
+
+        Returns:
+            LatencyProfile: El nuevo perfil.
+        """
+        return LatencyProfile(
+            self.latency * factor, self.jitter, self.error_rate, self.error_status, self.token_latency * factor
+        )
+
+# Latencias típicas observadas en cada servicio real
+DEFAULT_PROFILES = {
+    "lastfm": LatencyProfile(latency=0.15),
+    "spotify": LatencyProfile(latency=0.08),
+    "youtube": LatencyProfile(latency=0.12),
+    "ollama": LatencyProfile(latency=0.2, token_latency=0.02),
+    "smtp": LatencyProfile(latency=0.1),
+}
+
+def _stable_id(*parts):
+    """
+    Genera un identificador determinista a partir de un texto.
+    """
+    return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()[:11]
+
+class FakeServiceHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        # Sin registro por petición: solo interesa el tiempo de respuesta
+        pass
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def _dispatch(self, method):
+        server = self.server
+        url = urlparse(self.path)
+        path = url.path.rstrip("/")
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"{}") if length else {}
+
+        server.record(f"{method} {path}")
+        time.sleep(server.profile.sample(server.rng))
+        if server.profile.error_rate and server.rng.random() < server.profile.error_rate:
+            server.record("errors")
+            headers = {"Retry-After": "1"} if server.profile.error_status == 429 else {}
+            self._send_json({"error": {"message": "error simulado"}}, server.profile.error_status, headers)
+            return
+
+        handler = getattr(self, f"_{server.service}")
+        handler(method, path, params, body)
+
+    def _send_json(self, payload, status=200, headers=None):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _lastfm(self, method, path, params, body):
+        # Paginación como la API real: limit canciones por página (50 por defecto) de un total fijo
+        artist = params.get("artist", "")
+        limit = int(params.get("limit", 50))
+        page = int(params.get("page", 1))
+        total = 200
+        start = (page - 1) * limit
+        tracks = [{"name": f"{artist} Song {i}"} for i in range(start + 1, min(total, start + limit) + 1)]
+        self._send_json({"toptracks": {"track": tracks, "@attr": {
+            "artist": artist, "page": str(page), "perPage": str(limit),
+            "totalPages": str(-(-total // limit)), "total": str(total)
+        }}})
+
+    def _spotify(self, method, path, params, body):
+        if path.endswith("/search"):
+            query = params.get("q", "")
+            artist = query.split("artist:", 1)[1].strip() if "artist:" in query else "Fake Artist"
+            track_name = query.split(" artist:", 1)[0].replace("track:", "").strip()
+            limit = int(params.get("limit", 20))
+            items = [
+                {
+                    "name": track_name if limit == 1 else f"{artist} Track {i}",
+                    "artists": [{"name": artist}],
+                    "album": {"name": f"{artist} Album"},
+                    "uri": f"spotify:track:{_stable_id(query, str(i))}"
+                }
+                for i in range(limit)
+            ]
+            self._send_json({"tracks": {"items": items}})
+        elif path.endswith("/me"):
+            self._send_json({"id": "bench-user"})
+        elif path.endswith("/playlists") and method == "POST":
+            playlist_id = _stable_id(body.get("name", ""), str(time.time()))
+            self._send_json({
+                "id": playlist_id,
+                "external_urls": {"spotify": f"https://open.spotify.com/playlist/{playlist_id}"}
+            }, status=201)
+        elif path.endswith(("/tracks", "/items")) and method == "POST":
+            self._send_json({"snapshot_id": _stable_id(path, json.dumps(body))}, status=201)
+        else:
+            self._send_json({"error": {"message": f"Ruta no simulada: {path}"}}, status=404)
+
+    def _youtube(self, method, path, params, body):
+        if path.endswith("/search"):
+            query = params.get("q", "")
+            self._send_json({"items": [{
+                "id": {"kind": "youtube#video", "videoId": _stable_id(query)},
+                "snippet": {"title": f"{query} (Official Video)"}
+            }]})
+        elif path.endswith("/playlists") and method == "POST":
+            self._send_json({"id": f"PL{_stable_id(json.dumps(body), str(time.time()))}"})
+        elif path.endswith("/playlistItems") and method == "POST":
+            self._send_json({"id": _stable_id(json.dumps(body)), "snippet": body.get("snippet", {})})
+        else:
+            self._send_json({"error": {"message": f"Ruta no simulada: {path}"}}, status=404)
+
+    def _ollama(self, method, path, params, body):
+        if path.endswith("/tags"):
+            self._send_json({"models": [{"name": "gemma:2b"}]})
+            return
+        if not path.endswith("/generate"):
+            self._send_json({"error": f"Ruta no simulada: {path}"}, status=404)
+            return
+
+        prompt = body.get("prompt")
+        if not prompt:
+            # Petición de precarga: solo carga el modelo
+            self._send_json({"model": body.get("model"), "done": True, "load_duration": 0})
+            return
+
+        max_tokens = body.get("options", {}).get("num_predict") or 60
+        tokens = [f"palabra{i} " for i in range(min(max_tokens, 60))]
+        token_latency = self.server.profile.token_latency
+        final = {
+            "model": body.get("model"),
+            "done": True,
+            "load_duration": 0,
+            "eval_count": len(tokens),
+            "eval_duration": int(token_latency * len(tokens) * 1e9)
+        }
+
+        if body.get("stream", True) is False:
+            time.sleep(token_latency * len(tokens))
+            self._send_json({**final, "response": "".join(tokens)})
+            return
+
+        # NDJSON sin Content-Length: la respuesta termina al cerrar la conexión
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        try:
+            for token in tokens:
+                time.sleep(token_latency)
+                self.wfile.write(json.dumps({"response": token, "done": False}).encode("utf-8") + b"\n")
+                self.wfile.flush()
+            self.wfile.write(json.dumps(final).encode("utf-8") + b"\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # El cliente cortó la generación (max_tokens o secuencia de parada)
+            pass
+
+class FakeHTTPService(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, service, profile, seed=0):
+        """
+        Inicializa un servidor HTTP local que simula un servicio externo.
+
+        Args:
+            service (str): El servicio simulado (lastfm, spotify, youtube u ollama).
+            profile (LatencyProfile): El perfil de latencia y errores.
+            seed (int): Semilla del generador aleatorio.
+        """
+        super().__init__(("127.0.0.1", 0), FakeServiceHandler)
+        self.service = service
+        self.profile = profile
+        self.rng = random.Random(f"{seed}-{service}")
+        self.requests = Counter()
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def record(self, name):
+        with self._lock:
+            self.requests[name] += 1
+
+class FakeSMTPHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        self._reply("220 fake-smtp ESMTP")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode("utf-8", "replace").strip().upper()
+            if command.startswith("EHLO"):
+                self._reply("250-fake-smtp", "250-AUTH PLAIN LOGIN", "250 SIZE 10485760")
+            elif command.startswith("HELO"):
+                self._reply("250 fake-smtp")
+            elif command.startswith("AUTH"):
+                self._reply("235 Authentication successful")
+            elif command == "DATA":
+                self._reply("354 End data with <CR><LF>.<CR><LF>")
+                while self.rfile.readline().rstrip(b"\r\n") != b".":
+                    pass
+                time.sleep(self.server.profile.sample(self.server.rng))
+                self.server.record("messages")
+                self._reply("250 OK: queued")
+            elif command == "QUIT":
+                self._reply("221 Bye")
+                return
+            else:
+                # MAIL FROM, RCPT TO, RSET, NOOP
+                self._reply("250 OK")
+
+    def _reply(self, *lines):
+        self.wfile.write("".join(f"{line}\r\n" for line in lines).encode("utf-8"))
+
+class FakeSMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, profile, seed=0):
+        """
+        Inicializa un servidor SMTP mínimo (sin STARTTLS) que acepta cualquier
+        autenticación y descarta los mensajes.
+
+        Args:
+            profile (LatencyProfile): El perfil de latencia del envío.
+            seed (int): Semilla del generador aleatorio.
+        """
+        super().__init__(("127.0.0.1", 0), FakeSMTPHandler)
+        self.profile = profile
+        self.rng = random.Random(f"{seed}-smtp")
+        self.requests = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, name):
+        with self._lock:
+            self.requests[name] += 1
+
+class FakeServices:
+    def __init__(self, profiles=None, seed=0):
+        """
+        Inicializa el conjunto de servicios simulados.
+
+        Args:
+            profiles (dict): Perfil de cada servicio (por defecto: DEFAULT_PROFILES).
+            seed (int): Semilla de los generadores aleatorios.
+        """
+        self.profiles = {**DEFAULT_PROFILES, **(profiles or {})}
+        self.seed = seed
+        self.servers = {}
+        self._threads = []
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def start(self):
+        """
+        Arranca todos los servidores en hilos en segundo plano.
+        """
+        for service in ("lastfm", "spotify", "youtube", "ollama"):
+            self.servers[service] = FakeHTTPService(service, self.profiles[service], self.seed)
+        self.servers["smtp"] = FakeSMTPServer(self.profiles["smtp"], self.seed)
+        for name, server in self.servers.items():
+            thread = threading.Thread(
+                target=server.serve_forever, kwargs={"poll_interval": 0.05}, name=f"fake-{name}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        """
+        Detiene todos los servidores.
+        """
+        for server in self.servers.values():
+            server.shutdown()
+            server.server_close()
+        self.servers = {}
+        self._threads = []
+
+    def environment(self, workdir):
+        """
+        Prepara las credenciales ficticias y devuelve las variables de entorno
+        que apuntan la aplicación a los servicios simulados. Deben aplicarse
+        antes de importar autogen_agent.main.
+
+        Args:
+            workdir (str): Directorio donde guardar tokens y cachés.
+
+        Returns:
+            dict: Las variables de entorno.
+        """
+        youtube_token = os.path.join(workdir, "youtube_token.json")
+        with open(youtube_token, "w") as f:
+            json.dump({
+                "token": "bench",
+                "refresh_token": "bench",
+                "client_id": "bench",
+                "client_secret": "bench",
+                "expiry": "2999-01-01T00:00:00Z"
+            }, f)
+
+        spotify_cache = os.path.join(workdir, "spotify_cache")
+        with open(spotify_cache, "w") as f:
+            json.dump({
+                "access_token": "bench",
+                "token_type": "Bearer",
+                "expires_in": 3600,
+                "expires_at": int(time.time()) + 24 * 3600,
+                "refresh_token": "bench",
+                "scope": "user-library-read playlist-modify-public"
+            }, f)
+
+        return {
+            "LASTFM_API_KEY": "bench",
+            "LASTFM_API_SECRET": "bench",
+            "LASTFM_API_URL": f"{self.servers['lastfm'].url}/2.0/",
+            "SPOTIFY_CLIENT_ID": "bench",
+            "SPOTIFY_CLIENT_SECRET": "bench",
+            "SPOTIFY_REDIRECT_URI": "http://127.0.0.1:8888/callback",
+            "SPOTIFY_API_URL": f"{self.servers['spotify'].url}/v1/",
+            "SPOTIFY_CACHE_PATH": spotify_cache,
+            "YOUTUBE_API_URL": f"{self.servers['youtube'].url}/",
+            "YOUTUBE_TOKEN_FILE": youtube_token,
+            "OLLAMA_BASE_URL": f"{self.servers['ollama'].url}/api",
+            "SMTP_HOST": "127.0.0.1",
+            "SMTP_PORT": str(self.servers["smtp"].server_address[1]),
+            "SMTP_STARTTLS": "0",
+            "EMAIL_USER": "bench@example.com",
+            "EMAIL_PASSWORD": "bench",
+            "AUTOGEN_CACHE_PATH": os.path.join(workdir, "cache.sqlite"),
+        }
+
+    def request_counts(self):
+        """
+        Devuelve el número de peticiones recibidas por cada servicio y ruta.
+
+        Returns:
+            dict: Contadores por servicio.
+        """
+        return {name: dict(server.requests) for name, server in self.servers.items()}
@@ -0,0 +1,79 @@
+"""
+Microbenchmark de la búsqueda de claves de MockInternetSearchTool.
+
+Compara el recorrido lineal original (`clave in consulta` para cada clave)
+con el autómata de Aho–Corasick de autogen_agent.matching para catálogos
+de distintos tamaños, y comprueba que ambos devuelven la misma clave.
+
+Uso:
+    python -m autogen_agent.benchmarks.matching --sizes 1000 10000 50000
+"""
+import argparse
+import random
+import sys
+import time
+
+from autogen_agent.catalog import SYLLABLES
+from autogen_agent.matching import KeywordMatcher
+
+def build_keys(count, seed=0):
+    """
+    Genera claves sintéticas distintas de artistas y géneros.
+    """
+    rng = random.Random(seed)
+    keys = {}
+    while len(keys) < count:
+        words = ["".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))) for _ in range(rng.randint(1, 2))]
+        keys[" ".join(words)] = None
+    return list(keys)
+
+def build_queries(keys, count, seed=0):
+    """
+    Genera consultas que contienen una clave (la mitad) o ninguna.
+    """
+    rng = random.Random(seed)
+    queries = []
+    for i in range(count):
+        key = rng.choice(keys) if i % 2 == 0 else "zzz"
+        queries.append(f"lo mejor de {key} en directo")
+    return queries
+
+def linear_find(keys, query):
+    for key in keys:
+        if key in query:
+            return key
+    return None
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Microbenchmark de la búsqueda de claves en consultas.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000],
+                        help="Número de claves de cada prueba")
+    parser.add_argument("--queries", type=int, default=2000, help="Consultas por prueba (por defecto: 2000)")
+    parser.add_argument("--seed", type=int, default=0, help="Semilla de claves y consultas")
+    args = parser.parse_args(argv)
+
+    print(f"{'claves':>8} {'construcción (s)':>17} {'lineal (µs)':>12} {'autómata (µs)':>14}")
+    for size in args.sizes:
+        keys = build_keys(size, args.seed)
+        queries = build_queries(keys, args.queries, args.seed)
+
+        start = time.perf_counter()
+        matcher = KeywordMatcher(keys)
+        build_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        expected = [linear_find(keys, query) for query in queries]
+        linear_us = (time.perf_counter() - start) / len(queries) * 1e6
+
+        start = time.perf_counter()
+        found = [matcher.find(query) for query in queries]
+        matcher_us = (time.perf_counter() - start) / len(queries) * 1e6
+
+        print(f"{size:>8} {build_seconds:>17.3f} {linear_us:>12.1f} {matcher_us:>14.1f}")
+        if found != expected:
+            print("❌ El autómata no devuelve la misma clave que el recorrido lineal")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+"""
+Prueba de carga del flujo simulado (mock_main) contra un catálogo sintético.
+
+Genera (o reutiliza) un catálogo con popularidad de tipo Zipf, elige las
+consultas según esa popularidad y las ejecuta en paralelo con
+autogen_agent.batch, usando el modelo de latencia de las herramientas
+simuladas en lugar de esperas fijas.
+
+Debe ejecutarse en un proceso propio: la configuración se aplica antes de
+importar autogen_agent.mock_main.
+
+Uso:
+    python -m autogen_agent.benchmarks.mock_load --artists 100000 --queries 2000 --concurrency 32
+    python -m autogen_agent.benchmarks.mock_load --catalog catalogo.bin --latency-scale 0.1 --jitter 0.5
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+import tempfile
+
+from autogen_agent.catalog import SyntheticCatalog, generate_catalog
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prueba de carga del flujo simulado con un catálogo sintético.")
+    parser.add_argument("--catalog", help="Catálogo existente (por defecto se genera uno temporal)")
+    parser.add_argument("--artists", type=int, default=10000, help="Artistas del catálogo generado (por defecto: 10000)")
+    parser.add_argument("--playlists", type=int, default=50000, help="Listas del catálogo generado (por defecto: 50000)")
+    parser.add_argument("--queries", type=int, default=200, help="Número de consultas (por defecto: 200)")
+    parser.add_argument("--concurrency", type=int, default=16, help="Consultas simultáneas (por defecto: 16)")
+    parser.add_argument("--latency-scale", type=float, default=0.0,
+                        help="Multiplica las latencias simuladas de 0.5s y 1s (por defecto: 0, sin esperas)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Desviación log-normal de las latencias")
+    parser.add_argument("--seed", type=int, default=0, help="Semilla del catálogo y de las consultas")
+    parser.add_argument("--json", dest="json_path", help="Guarda el resumen en un fichero JSON")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Muestra la salida de la aplicación")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        catalog_path = args.catalog
+        if not catalog_path:
+            catalog_path = os.path.join(workdir, "catalogo.bin")
+            print(f"🎲 Generando catálogo con {args.artists} artistas...")
+            generate_catalog(catalog_path, artists=args.artists, playlists=args.playlists, seed=args.seed)
+
+        os.environ["MOCK_CATALOG_PATH"] = catalog_path
+        os.environ["MOCK_LATENCY_SCALE"] = str(args.latency_scale)
+        os.environ["MOCK_LATENCY_JITTER"] = str(args.jitter)
+        if "autogen_agent.mock_main" in sys.modules:
+            print("⚠️ autogen_agent.mock_main ya estaba importado: la configuración puede no aplicarse")
+        from autogen_agent import mock_main
+        from autogen_agent.batch import print_summary, run_batch
+
+        with SyntheticCatalog(catalog_path) as catalog:
+            print(f"📚 Catálogo: {catalog.artists} artistas, {catalog.tracks} canciones, {catalog.playlists} listas")
+            queries = [
+                {"query": query, "num_songs": 8, "email": None}
+                for query in catalog.sample_queries(args.queries, args.seed)
+            ]
+
+        def recommend(query, email, num_songs):
+            return mock_main.create_music_recommendation(query, email=email)
+
+        output_path = os.path.join(workdir, "resultados.jsonl")
+        if args.verbose:
+            summary = run_batch(queries, output_path, args.concurrency, recommend=recommend)
+        else:
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                summary = run_batch(queries, output_path, args.concurrency, recommend=recommend)
+
+    print_summary(summary)
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+        print(f"\n💾 Resumen guardado en {args.json_path}")
+    return 0 if not summary["failed"] else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+"""
+Benchmark de extremo a extremo de create_music_recommendation sin red.
+
+Arranca servidores locales que imitan Last.fm, Spotify, YouTube, Ollama y
+SMTP (ver fake_services), apunta la aplicación a ellos mediante variables de
+entorno y ejecuta un lote de consultas con autogen_agent.batch. Muestra los
+percentiles de latencia por etapa y de extremo a extremo y el rendimiento.
+
+Debe ejecutarse en un proceso propio: la configuración se aplica antes de
+importar autogen_agent.main.
+
+Uso:
+    python -m autogen_agent.benchmarks.pipeline --queries 50 --concurrency 8
+    python -m autogen_agent.benchmarks.pipeline --error-rate 0.05 --max-p95 5
+"""
+import argparse
+import contextlib
+import json
+import os
+import random
+import sys
+import tempfile
+
+from autogen_agent.benchmarks.fake_services import DEFAULT_PROFILES, FakeServices
+from autogen_agent.metrics import get_metrics
+
+# Artistas de los que se generan las consultas; las repeticiones aprovechan las cachés
+ARTISTS = [
+    "Queen", "AC/DC", "Daft Punk", "Rosalía", "Metallica", "Adele", "Bad Bunny", "Radiohead",
+    "Shakira", "The Beatles", "Coldplay", "Nirvana", "Taylor Swift", "Soda Stereo", "Björk",
+    "Kendrick Lamar", "Manu Chao", "Arctic Monkeys", "Dua Lipa", "Héroes del Silencio",
+]
+
+def build_queries(count, seed=0, with_email=True, num_songs=10):
+    """
+    Genera un lote de consultas reproducible.
+
+    Args:
+        count (int): Número de consultas.
+        seed (int): Semilla del generador aleatorio.
+        with_email (bool): Si es True, cada consulta incluye un correo.
+        num_songs (int): Canciones por consulta.
+
+    Returns:
+        list: Consultas en el formato de autogen_agent.batch.load_queries.
+    """
+    rng = random.Random(seed)
+    return [
+        {
+            "query": rng.choice(ARTISTS),
+            "num_songs": num_songs,
+            "email": f"bench{i}@example.com" if with_email else None
+        }
+        for i in range(count)
+    ]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark sin red de create_music_recommendation.")
+    parser.add_argument("--queries", type=int, default=20, help="Número de consultas (por defecto: 20)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Consultas simultáneas (por defecto: 4)")
+    parser.add_argument("--num-songs", type=int, default=10, help="Canciones por consulta (por defecto: 10)")
+    parser.add_argument("--seed", type=int, default=0, help="Semilla de consultas, latencias y errores")
+    parser.add_argument("--latency-scale", type=float, default=1.0,
+                        help="Multiplica las latencias simuladas (0 = sin latencia)")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="Probabilidad de error 503 en cada petición HTTP simulada")
+    parser.add_argument("--no-email", action="store_true", help="Omite la generación y el envío del correo")
+    parser.add_argument("--rate-limits", action="store_true",
+                        help="Aplica los límites de peticiones de producción (por defecto se desactivan)")
+    parser.add_argument("--json", dest="json_path", help="Guarda el resumen en un fichero JSON")
+    parser.add_argument("--max-p95", type=float, default=None,
+                        help="Falla si el p95 de extremo a extremo supera estos segundos")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Muestra la salida de la aplicación")
+    args = parser.parse_args(argv)
+
+    profiles = {}
+    for service, profile in DEFAULT_PROFILES.items():
+        profile = profile.scaled(args.latency_scale)
+        if service != "smtp":
+            profile.error_rate = args.error_rate
+        profiles[service] = profile
+
+    with tempfile.TemporaryDirectory() as workdir, FakeServices(profiles, seed=args.seed) as services:
+        os.environ.update(services.environment(workdir))
+        os.environ.pop("OPENAI_API_KEY", None)
+        if not args.rate_limits:
+            for service in ("LASTFM", "SPOTIFY", "YOUTUBE"):
+                os.environ[f"{service}_RATE_LIMIT"] = "0"
+
+        if "autogen_agent.main" in sys.modules:
+            print("⚠️ autogen_agent.main ya estaba importado: la configuración puede no aplicarse")
+        from autogen_agent.batch import print_summary, run_batch
+
+        queries = build_queries(args.queries, args.seed, not args.no_email, args.num_songs)
+        print(f"🎵 Benchmark: {len(queries)} consultas, concurrencia {args.concurrency}, "
+              f"latencia x{args.latency_scale}, errores {args.error_rate:.0%}")
+
+        output_path = os.path.join(workdir, "resultados.jsonl")
+        if args.verbose:
+            summary = run_batch(queries, output_path, args.concurrency)
+        else:
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                summary = run_batch(queries, output_path, args.concurrency)
+        summary["service_requests"] = services.request_counts()
+        summary["metrics"] = get_metrics().snapshot()
+
+    print_summary(summary)
+    print("\n📡 Peticiones recibidas por los servicios simulados:")
+    for service, counts in summary["service_requests"].items():
+        print(f"  {service:<8} {sum(v for k, v in counts.items() if k != 'errors'):6d}  (errores simulados: {counts.get('errors', 0)})")
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+        print(f"\n💾 Resumen guardado en {args.json_path}")
+
+    if args.max_p95 is not None and summary["end_to_end"]["p95"] > args.max_p95:
+        print(f"❌ El p95 de extremo a extremo supera el límite de {args.max_p95}s")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+"""
+Microbenchmark de la agregación de rankings de get_most_popular_songs.
+
+Genera listas de reproducción sintéticas con popularidad de tipo Zipf y
+compara el recuento original (diccionario y ordenación completa) con
+RankAggregator (Counter y selección con heap) para cada puntuación.
+
+Uso:
+    python -m autogen_agent.benchmarks.ranking --playlists 100000 --limit 10
+"""
+import argparse
+import itertools
+import random
+import statistics
+import sys
+import time
+
+from autogen_agent.ranking import SCORINGS, RankAggregator
+
+def build_playlists(count, length=20, vocabulary=50000, seed=0, exponent=1.1):
+    """
+    Genera listas de canciones reproducibles cuya popularidad sigue una ley de Zipf.
+
+    Args:
+        count (int): Número de listas.
+        length (int): Canciones por lista.
+        vocabulary (int): Número de canciones distintas.
+        seed (int): Semilla del generador aleatorio.
+        exponent (float): Exponente de la ley de Zipf.
+
+    Returns:
+        list: Las listas de canciones.
+    """
+    rng = random.Random(seed)
+    songs = [f"Canción {i}" for i in range(vocabulary)]
+    cum_weights = list(itertools.accumulate(1.0 / (rank + 1) ** exponent for rank in range(vocabulary)))
+    return [rng.choices(songs, cum_weights=cum_weights, k=length) for _ in range(count)]
+
+def sort_top(playlists, limit):
+    """
+    Implementación anterior: cuenta en un diccionario y ordena todas las canciones.
+    """
+    song_counts = {}
+    for songs in playlists:
+        for song in songs:
+            if song in song_counts:
+                song_counts[song] += 1
+            else:
+                song_counts[song] = 1
+    top_songs = sorted(song_counts.items(), key=lambda x: x[1], reverse=True)[:limit]
+    return [song for song, count in top_songs]
+
+def heap_top(playlists, limit, scoring="count"):
+    aggregator = RankAggregator(scoring)
+    aggregator.update(playlists)
+    return [song for song, score in aggregator.top(limit)]
+
+def measure(func, runs):
+    """
+    Ejecuta una función varias veces y devuelve su resultado y la mediana de tiempos.
+    """
+    timings = []
+    result = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return result, statistics.median(timings)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Microbenchmark de la agregación de rankings.")
+    parser.add_argument("--playlists", type=int, default=100000, help="Listas sintéticas (por defecto: 100000)")
+    parser.add_argument("--length", type=int, default=20, help="Canciones por lista (por defecto: 20)")
+    parser.add_argument("--vocabulary", type=int, default=50000, help="Canciones distintas (por defecto: 50000)")
+    parser.add_argument("--limit", type=int, default=10, help="Canciones del ranking final (por defecto: 10)")
+    parser.add_argument("--runs", type=int, default=3, help="Repeticiones de cada medición (por defecto: 3)")
+    parser.add_argument("--seed", type=int, default=0, help="Semilla de las listas sintéticas")
+    args = parser.parse_args(argv)
+
+    print(f"🎲 Generando {args.playlists} listas de {args.length} canciones ({args.vocabulary} distintas)...")
+    playlists = build_playlists(args.playlists, args.length, args.vocabulary, args.seed)
+    total = args.playlists * args.length
+
+    baseline, baseline_seconds = measure(lambda: sort_top(playlists, args.limit), args.runs)
+    print(f"\n{'método':<22} {'segundos':>9} {'canciones/s':>14}")
+    print(f"{'dict + sorted':<22} {baseline_seconds:9.3f} {total / baseline_seconds:14,.0f}")
+
+    for scoring in SCORINGS:
+        top, seconds = measure(lambda: heap_top(playlists, args.limit, scoring), args.runs)
+        print(f"{'heap (' + scoring + ')':<22} {seconds:9.3f} {total / seconds:14,.0f}")
+        if scoring == "count" and top != baseline:
+            print("❌ El ranking por frecuencia no coincide con la implementación anterior")
+            return 1
+
+    print(f"\n✅ Ranking por frecuencia idéntico al anterior: {', '.join(baseline[:5])}...")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+"""
+Benchmark del tiempo de arranque de la CLI.
+
+Importa autogen_agent.main en un proceso nuevo con `python -X importtime`
+y muestra el tiempo total, los módulos más costosos y si se han cargado
+bibliotecas pesadas que deberían importarse solo al usarse.
+
+Uso:
+    python -m autogen_agent.benchmarks.startup --runs 5 --max-seconds 1.0
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+# Módulos que no deben cargarse al importar el punto de entrada de la CLI
+HEAVY_MODULES = [
+    "googleapiclient.discovery",
+    "google_auth_oauthlib",
+    "spotipy",
+    "smtplib",
+    "email.mime.multipart",
+]
+
+TARGET_MODULE = "autogen_agent.main"
+
+def parse_importtime(stderr):
+    """
+    Interpreta la salida de `python -X importtime`.
+
+    Args:
+        stderr (str): La salida de error del proceso.
+
+    Returns:
+        list: Tuplas (módulo, tiempo propio en µs, tiempo acumulado en µs).
+    """
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:"):].split("|")
+        entries.append((module.strip(), int(self_us), int(cumulative_us)))
+    return entries
+
+def measure_once():
+    """
+    Importa el módulo objetivo en un proceso nuevo y mide el arranque.
+
+    Returns:
+        dict: Tiempo de pared, tiempo de importación, desglose y módulos pesados cargados.
+    """
+    code = (
+        f"import sys, {TARGET_MODULE}; "
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    wall_seconds = time.perf_counter() - start
+
+    entries = parse_importtime(result.stderr)
+    target = next((cumulative for module, _, cumulative in entries if module == TARGET_MODULE), 0)
+    loaded_heavy = [module for module in result.stdout.strip().split(",") if module]
+    return {
+        "wall_seconds": wall_seconds,
+        "import_seconds": target / 1e6,
+        "entries": entries,
+        "heavy_modules_loaded": loaded_heavy
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mide el tiempo de arranque de la CLI.")
+    parser.add_argument("--runs", type=int, default=5, help="Número de repeticiones (por defecto: 5)")
+    parser.add_argument("--top", type=int, default=15, help="Módulos más costosos a mostrar")
+    parser.add_argument("--max-seconds", type=float, default=None,
+                        help="Falla si la mediana del tiempo de importación supera este valor")
+    args = parser.parse_args(argv)
+
+    runs = [measure_once() for _ in range(args.runs)]
+    import_times = [run["import_seconds"] for run in runs]
+    wall_times = [run["wall_seconds"] for run in runs]
+    median_import = statistics.median(import_times)
+
+    print(f"⏱️ Importación de {TARGET_MODULE} ({args.runs} ejecuciones)")
+    print(f"- Mediana importación: {median_import * 1000:.1f} ms (mín {min(import_times) * 1000:.1f} ms)")
+    print(f"- Mediana proceso completo: {statistics.median(wall_times) * 1000:.1f} ms")
+
+    print("\n📊 Módulos con mayor tiempo propio (última ejecución):")
+    for module, self_us, cumulative_us in sorted(runs[-1]["entries"], key=lambda e: e[1], reverse=True)[:args.top]:
+        print(f"  {self_us / 1000:8.1f} ms  (acumulado {cumulative_us / 1000:8.1f} ms)  {module}")
+
+    heavy = runs[-1]["heavy_modules_loaded"]
+    if heavy:
+        print(f"\n⚠️ Bibliotecas pesadas cargadas al arrancar: {', '.join(heavy)}")
+    else:
+        print("\n✅ Ninguna biblioteca pesada se carga al arrancar")
+
+    if args.max_seconds is not None and median_import > args.max_seconds:
+        print(f"❌ El arranque supera el límite de {args.max_seconds}s")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,327 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from autogen_agent.metrics import REGISTRY
+
+
+# Ruta por defecto del fichero de caché compartido por todas las herramientas
+DEFAULT_CACHE_PATH = os.getenv(
+    "AUTOGEN_CACHE_PATH",
+    os.path.join(os.path.expanduser("~"), ".autogen_agent_cache.sqlite")
+)
+
+def normalize_key(text):
+    """
+    Normaliza una consulta para usarla como clave de caché.
+
+    Args:
+        text (str): El texto a normalizar.
+
+    Returns:
+        str: El texto en minúsculas y con los espacios colapsados.
+    """
+    return " ".join(str(text).casefold().split())
+
+def content_key(*parts):
+    """
+    Calcula una clave de caché a partir del contenido (por ejemplo, modelo,
+    prompt y opciones), de forma que entradas idénticas compartan resultado.
+
+    Args:
+        *parts: Valores serializables en JSON que identifican la entrada.
+
+    Returns:
+        str: El hash SHA-256 en hexadecimal.
+    """
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class PersistentTTLCache:
+    def __init__(self, namespace, path=None, ttl=86400, max_entries=1000):
+        """
+        Inicializa una caché persistente en SQLite con caducidad (TTL)
+        y expulsión LRU limitada por número de entradas.
+
+        Args:
+            namespace (str): Espacio de nombres de la caché (permite compartir fichero).
+            path (str): Ruta del fichero SQLite (por defecto: DEFAULT_CACHE_PATH).
+                Se admite ":memory:" para cachés efímeras.
+            ttl (float): Segundos de validez de cada entrada (por defecto: 1 día).
+            max_entries (int): Número máximo de entradas antes de expulsar las menos usadas.
+        """
+        self.namespace = namespace
+        self.path = path or DEFAULT_CACHE_PATH
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._last_access = 0.0
+
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        if self.path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_cache_lru ON cache_entries (namespace, accessed_at)"
+        )
+        self._conn.commit()
+
+    def get(self, key):
+        """
+        Obtiene un valor de la caché si existe y no ha caducado.
+
+        Args:
+            key (str): La clave a consultar (se normaliza internamente).
+
+        Returns:
+            El valor almacenado o None si no existe o ha caducado.
+        """
+        key = normalize_key(key)
+        with self._lock:
+            now = self._now()
+            row = self._conn.execute(
+                "SELECT value, created_at FROM cache_entries WHERE namespace = ? AND key = ?",
+                (self.namespace, key)
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                REGISTRY.increment("autogen_cache_requests_total", cache=self.namespace, result="miss")
+                return None
+
+            value, created_at = row
+            if self.ttl and now - created_at > self.ttl:
+                # Entrada caducada: se elimina y cuenta como fallo
+                self._conn.execute(
+                    "DELETE FROM cache_entries WHERE namespace = ? AND key = ?",
+                    (self.namespace, key)
+                )
+                self._conn.commit()
+                self.misses += 1
+                REGISTRY.increment("autogen_cache_requests_total", cache=self.namespace, result="miss")
+                return None
+
+            self._conn.execute(
+                "UPDATE cache_entries SET accessed_at = ? WHERE namespace = ? AND key = ?",
+                (now, self.namespace, key)
+            )
+            self._conn.commit()
+            self.hits += 1
+            REGISTRY.increment("autogen_cache_requests_total", cache=self.namespace, result="hit")
+            return json.loads(value)
+
+    def set(self, key, value):
+        """
+        Guarda un valor serializable en JSON en la caché.
+
+        Args:
+            key (str): La clave (se normaliza internamente).
+            value: El valor a almacenar.
+        """
+        key = normalize_key(key)
+        with self._lock:
+            now = self._now()
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO cache_entries (namespace, key, value, created_at, accessed_at)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (self.namespace, key, json.dumps(value), now, now)
+            )
+            self._evict()
+            self._conn.commit()
+
+    def delete(self, key):
+        """
+        Elimina una entrada de la caché.
+
+        Args:
+            key (str): La clave a eliminar.
+        """
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM cache_entries WHERE namespace = ? AND key = ?",
+                (self.namespace, normalize_key(key))
+            )
+            self._conn.commit()
+
+    def clear(self):
+        """
+        Elimina todas las entradas de este espacio de nombres.
+        """
+        with self._lock:
+            self._conn.execute("DELETE FROM cache_entries WHERE namespace = ?", (self.namespace,))
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM cache_entries WHERE namespace = ?", (self.namespace,)
+            ).fetchone()[0]
+
+    def stats(self):
+        """
+        Devuelve las estadísticas de uso de la caché.
+
+        Returns:
+            dict: Aciertos, fallos, expulsiones, tasa de aciertos y tamaño actual.
+        """
+        total = self.hits + self.misses
+        return {
+            "namespace": self.namespace,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / total if total else 0.0,
+            "size": len(self)
+        }
+
+    def _now(self):
+        """
+        Devuelve una marca de tiempo estrictamente creciente para ordenar los accesos.
+        Debe llamarse con el lock adquirido.
+        """
+        self._last_access = max(time.time(), self._last_access + 1e-6)
+        return self._last_access
+
+    def _evict(self):
+        """
+        Expulsa las entradas menos usadas recientemente si se supera el límite.
+        Debe llamarse con el lock adquirido.
+        """
+        if not self.max_entries:
+            return
+        count = self._conn.execute(
+            "SELECT COUNT(*) FROM cache_entries WHERE namespace = ?", (self.namespace,)
+        ).fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                """
+                DELETE FROM cache_entries WHERE namespace = ? AND key IN (
+                    SELECT key FROM cache_entries WHERE namespace = ?
+                    ORDER BY accessed_at ASC LIMIT ?
+                )
+                """,
+                (self.namespace, self.namespace, excess)
+            )
+            self.evictions += excess
+
+class TwoTierCache:
+    def __init__(self, namespace, path=None, ttl=86400, max_entries=1000, memory_entries=128):
+        """
+        Inicializa una caché de dos niveles: una LRU en memoria delante de
+        una PersistentTTLCache en disco. Ambos niveles comparten el mismo TTL.
+
+        Args:
+            namespace (str): Espacio de nombres de la caché en disco.
+            path (str): Ruta del fichero SQLite (por defecto: DEFAULT_CACHE_PATH).
+            ttl (float): Segundos de validez de cada entrada (por defecto: 1 día).
+            max_entries (int): Número máximo de entradas en disco.
+            memory_entries (int): Número máximo de entradas en memoria.
+        """
+        self.disk = PersistentTTLCache(namespace, path=path, ttl=ttl, max_entries=max_entries)
+        self.ttl = ttl
+        self.memory_entries = memory_entries
+        self.memory_hits = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Obtiene un valor buscando primero en memoria y después en disco.
+
+        Args:
+            key (str): La clave a consultar.
+
+        Returns:
+            El valor almacenado o None si no existe o ha caducado.
+        """
+        key = normalize_key(key)
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                created_at, value = entry
+                if not self.ttl or now - created_at <= self.ttl:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    REGISTRY.increment("autogen_cache_requests_total", cache=self.disk.namespace, result="hit")
+                    return value
+                del self._memory[key]
+
+        stored = self.disk.get(key)
+        if stored is None:
+            return None
+        # Promocionar a memoria conservando la fecha de creación original
+        self._remember(key, stored["created_at"], stored["value"])
+        return stored["value"]
+
+    def set(self, key, value):
+        """
+        Guarda un valor serializable en JSON en ambos niveles.
+
+        Args:
+            key (str): La clave.
+            value: El valor a almacenar.
+        """
+        key = normalize_key(key)
+        created_at = time.time()
+        self._remember(key, created_at, value)
+        self.disk.set(key, {"created_at": created_at, "value": value})
+
+    def clear(self):
+        """
+        Vacía ambos niveles de la caché.
+        """
+        with self._lock:
+            self._memory.clear()
+        self.disk.clear()
+
+    def stats(self):
+        """
+        Devuelve las estadísticas combinadas de ambos niveles.
+
+        Returns:
+            dict: Aciertos en memoria y en disco, fallos y tamaños.
+        """
+        disk_stats = self.disk.stats()
+        hits = self.memory_hits + disk_stats["hits"]
+        total = hits + disk_stats["misses"]
+        return {
+            "namespace": self.disk.namespace,
+            "hits": hits,
+            "memory_hits": self.memory_hits,
+            "disk_hits": disk_stats["hits"],
+            "misses": disk_stats["misses"],
+            "hit_rate": hits / total if total else 0.0,
+            "memory_size": len(self._memory),
+            "disk_size": disk_stats["size"]
+        }
+
+    def _remember(self, key, created_at, value):
+        with self._lock:
+            self._memory[key] = (created_at, value)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
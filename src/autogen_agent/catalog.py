@@ -0,0 +1,405 @@
+"""
+Catálogo musical sintético para pruebas de carga sin red.
+
+Genera de forma reproducible (con semilla) artistas, canciones y listas de
+reproducción cuya popularidad sigue una ley de Zipf, y los guarda en un
+fichero binario compacto que se lee con mmap: abrir un catálogo de millones
+de canciones no carga nada en memoria hasta que se consulta.
+
+Uso:
+    python -m autogen_agent.catalog catalogo.bin --artists 1000000 --playlists 5000000
+"""
+import argparse
+import itertools
+import mmap
+import os
+import random
+import struct
+import sys
+import threading
+from array import array
+
+
+MAGIC = b"AGCATLG1"
+VERSION = 1
+
+# Cabecera: firma, versión, semilla, exponente de Zipf (en milésimas), artistas,
+# canciones, listas, elementos de las listas y tamaño en bytes de los nombres
+# de artistas y de canciones
+HEADER = struct.Struct("<8s9I")
+
+# Sílabas y palabras con las que se forman los nombres de artistas y canciones
+SYLLABLES = [
+    "ka", "lo", "mi", "ra", "ven", "to", "sa", "del", "mar", "ni", "ro", "lu", "be", "za", "fi",
+    "no", "ta", "gu", "ser", "la", "do", "mo", "re", "pa", "tri", "cor", "vi", "len", "su", "bra",
+]
+TITLE_WORDS = [
+    "Noche", "Fuego", "Camino", "Luna", "Corazón", "Tormenta", "Ciudad", "Sueño", "Río", "Cielo",
+    "Electric", "Midnight", "Highway", "Thunder", "Summer", "Shadow", "Golden", "Wild", "Neon", "Heart",
+    "Rojo", "Azul", "Perdido", "Eterno", "Salvaje", "Libre", "Dancing", "Broken", "Silver", "Forever",
+]
+# Intentos de generar un nombre nuevo antes de distinguirlo con un número
+MAX_NAME_ATTEMPTS = 20
+
+PLAYLIST_TITLES = ["{artist} Greatest Hits", "Lo Mejor de {artist}", "{artist} Essentials",
+                   "{artist}: Éxitos", "This Is {artist}", "{artist} Rock Classics"]
+
+def zipf_cum_weights(count, exponent=1.1):
+    """
+    Calcula los pesos acumulados de una ley de Zipf (el rango 0 es el más popular).
+
+    Args:
+        count (int): Número de elementos.
+        exponent (float): Exponente de la ley de Zipf.
+
+    Returns:
+        list: Los pesos acumulados, para random.choices.
+    """
+    return list(itertools.accumulate(1.0 / (rank + 1) ** exponent for rank in range(count)))
+
+def _unique_name(draw, used):
+    """
+    Genera un nombre con draw que no esté en used y lo añade. Si tras
+    MAX_NAME_ATTEMPTS intentos todos estaban usados (el espacio de nombres
+    se agota), se añade un número al último: como los nombres generados no
+    terminan en número y used crece con cada nombre, el resultado es único.
+    """
+    for _ in range(MAX_NAME_ATTEMPTS):
+        name = draw()
+        if name not in used:
+            break
+    else:
+        name = f"{name} {len(used) + 1}"
+    used.add(name)
+    return name
+
+def _artist_name(rng, used):
+    """
+    Genera un nombre de artista que no esté en used.
+    """
+    return _unique_name(lambda: " ".join(
+        "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3))).capitalize()
+        for _ in range(rng.randint(1, 2))
+    ), used)
+
+def _track_name(rng, used):
+    """
+    Genera un título de canción que no esté en used.
+    """
+    return _unique_name(lambda: " ".join(rng.sample(TITLE_WORDS, rng.randint(1, 3))), used)
+
+def _little_endian(values):
+    """
+    Devuelve un array de enteros de 32 bits sin signo en orden little-endian.
+    """
+    if sys.byteorder != "little":
+        values = array("I", values)
+        values.byteswap()
+    return values
+
+def generate_catalog(path, artists=10000, tracks_per_artist=20, playlists=50000,
+                     playlist_length=20, seed=0, exponent=1.1):
+    """
+    Genera un catálogo sintético y lo guarda en un fichero binario.
+
+    Los artistas se numeran por popularidad: el artista 0 es el más popular y
+    recibe más listas de reproducción (ley de Zipf). Dentro de cada artista,
+    las primeras canciones son sus éxitos y aparecen en más listas.
+
+    Args:
+        path (str): Ruta del fichero de catálogo.
+        artists (int): Número de artistas.
+        tracks_per_artist (int): Canciones por artista en promedio.
+        playlists (int): Número aproximado de listas (cada artista tiene al menos una).
+        playlist_length (int): Canciones por lista como máximo.
+        seed (int): Semilla del generador aleatorio.
+        exponent (float): Exponente de la ley de Zipf.
+
+    Returns:
+        dict: Número de artistas, canciones, listas y elementos generados, y el tamaño del fichero.
+    """
+    rng = random.Random(seed)
+    names = bytearray()
+    titles = bytearray()
+    artist_names = array("I", [0])
+    artist_tracks = array("I", [0])
+    track_names = array("I", [0])
+    artist_playlists = array("I", [0])
+    playlist_items = array("I", [0])
+    items = array("I")
+
+    artist_weights = zipf_cum_weights(artists, exponent)
+    total_weight = artist_weights[-1] if artists else 1.0
+    track_weights = {}
+    used_names = set()
+    previous_weight = 0.0
+
+    for artist in range(artists):
+        names += _artist_name(rng, used_names).encode("utf-8")
+        artist_names.append(len(names))
+
+        first_track = artist_tracks[-1]
+        track_count = rng.randint(max(1, tracks_per_artist // 2), max(1, tracks_per_artist * 3 // 2))
+        used_titles = set()
+        for _ in range(track_count):
+            titles += _track_name(rng, used_titles).encode("utf-8")
+            track_names.append(len(titles))
+        artist_tracks.append(first_track + track_count)
+
+        # Listas del artista proporcionales a su popularidad
+        weight = artist_weights[artist] - previous_weight
+        previous_weight = artist_weights[artist]
+        playlist_count = max(1, round(playlists * weight / total_weight))
+        cum_weights = track_weights.get(track_count)
+        if cum_weights is None:
+            cum_weights = zipf_cum_weights(track_count, exponent)
+            track_weights[track_count] = cum_weights
+        length = min(playlist_length, track_count)
+        for _ in range(playlist_count):
+            chosen = dict.fromkeys(rng.choices(range(track_count), cum_weights=cum_weights, k=length * 2))
+            items.extend(first_track + track for track in itertools.islice(chosen, length))
+            playlist_items.append(len(items))
+        artist_playlists.append(artist_playlists[-1] + playlist_count)
+
+    header = HEADER.pack(
+        MAGIC, VERSION, seed & 0xFFFFFFFF, int(exponent * 1000), artists,
+        len(track_names) - 1, len(playlist_items) - 1, len(items), len(names), len(titles)
+    )
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        for section in (artist_names, artist_tracks, track_names, artist_playlists, playlist_items, items):
+            _little_endian(section).tofile(f)
+        f.write(names)
+        f.write(titles)
+    os.replace(tmp_path, path)
+
+    return {
+        "artists": artists,
+        "tracks": len(track_names) - 1,
+        "playlists": len(playlist_items) - 1,
+        "items": len(items),
+        "bytes": os.path.getsize(path)
+    }
+
+class SyntheticCatalog:
+    def __init__(self, path):
+        """
+        Abre un catálogo generado con generate_catalog mediante mmap.
+
+        Args:
+            path (str): Ruta del fichero de catálogo.
+
+        Raises:
+            ValueError: Si el fichero no es un catálogo válido.
+        """
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.seed, exponent, self.artists, self.tracks, self.playlists, items, \
+            names_size, titles_size = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC or version != VERSION:
+            self._mmap.close()
+            raise ValueError(f"{path} no es un catálogo sintético válido")
+        self.exponent = exponent / 1000
+
+        self._views = []
+        offset = HEADER.size
+        sections = []
+        for count in (self.artists + 1, self.artists + 1, self.tracks + 1, self.artists + 1, self.playlists + 1, items):
+            sections.append(self._section(offset, count))
+            offset += count * 4
+        self._artist_names, self._artist_tracks, self._track_names, \
+            self._artist_playlists, self._playlist_items, self._items = sections
+        self._names = memoryview(self._mmap)[offset:offset + names_size]
+        self._titles = memoryview(self._mmap)[offset + names_size:offset + names_size + titles_size]
+        self._views.extend((self._names, self._titles))
+
+        self._ids = None
+        self._ids_lock = threading.Lock()
+        self._query_weights = None
+
+    def _section(self, offset, count):
+        """
+        Devuelve una sección de enteros de 32 bits del fichero sin copiarla.
+        """
+        view = memoryview(self._mmap)[offset:offset + count * 4]
+        if sys.byteorder != "little":
+            values = array("I", view)
+            values.byteswap()
+            view.release()
+            return values
+        view = view.cast("I")
+        self._views.append(view)
+        return view
+
+    def _name(self, blob, offsets, index):
+        return str(blob[offsets[index]:offsets[index + 1]], "utf-8")
+
+    def artist_name(self, artist):
+        """
+        Args:
+            artist (int): El identificador del artista (0 es el más popular).
+
+        Returns:
+            str: El nombre del artista.
+        """
+        return self._name(self._names, self._artist_names, artist)
+
+    def track_name(self, track):
+        """
+        Args:
+            track (int): El identificador de la canción.
+
+        Returns:
+            str: El título de la canción.
+        """
+        return self._name(self._titles, self._track_names, track)
+
+    def artist_names(self):
+        """
+        Recorre los nombres de los artistas por orden de popularidad.
+
+        Yields:
+            str: El nombre de cada artista.
+        """
+        for artist in range(self.artists):
+            yield self.artist_name(artist)
+
+    def artist_id(self, name):
+        """
+        Busca un artista por su nombre exacto (sin distinguir mayúsculas).
+        El índice de nombres se construye la primera vez que se usa.
+
+        Args:
+            name (str): El nombre del artista.
+
+        Returns:
+            int: El identificador del artista, o None si no existe.
+        """
+        if self._ids is None:
+            with self._ids_lock:
+                if self._ids is None:
+                    self._ids = {artist_name.casefold(): artist for artist, artist_name in enumerate(self.artist_names())}
+        return self._ids.get(name.strip().casefold())
+
+    def get_playlists(self, artist, limit=10):
+        """
+        Devuelve las listas de reproducción de un artista.
+
+        Args:
+            artist (int): El identificador del artista.
+            limit (int): Número máximo de listas.
+
+        Returns:
+            list: Diccionarios con "title" y "songs" ("Canción - Artista").
+        """
+        artist_name = self.artist_name(artist)
+        first, last = self._artist_playlists[artist], self._artist_playlists[artist + 1]
+        playlists = []
+        for number, playlist in enumerate(range(first, min(last, first + limit))):
+            tracks = self._items[self._playlist_items[playlist]:self._playlist_items[playlist + 1]]
+            playlists.append({
+                "title": PLAYLIST_TITLES[number % len(PLAYLIST_TITLES)].format(artist=artist_name)
+                + (f" Vol. {number // len(PLAYLIST_TITLES) + 1}" if number >= len(PLAYLIST_TITLES) else ""),
+                "songs": [f"{self.track_name(track)} - {artist_name}" for track in tracks]
+            })
+        return playlists
+
+    def search(self, query, limit=10):
+        """
+        Busca las listas de un artista por su nombre exacto.
+
+        Args:
+            query (str): El nombre del artista.
+            limit (int): Número máximo de listas.
+
+        Returns:
+            dict: {"playlists": [...]} en el formato de MockInternetSearchTool,
+                o None si el artista no existe.
+        """
+        artist = self.artist_id(query)
+        if artist is None:
+            return None
+        return {"playlists": self.get_playlists(artist, limit)}
+
+    def sample_queries(self, count, seed=0):
+        """
+        Elige nombres de artistas al azar según su popularidad (ley de Zipf),
+        como llegarían las consultas reales.
+
+        Args:
+            count (int): Número de consultas.
+            seed (int): Semilla del generador aleatorio.
+
+        Returns:
+            list: Los nombres de los artistas.
+        """
+        if self._query_weights is None:
+            self._query_weights = zipf_cum_weights(self.artists, self.exponent)
+        rng = random.Random(seed)
+        artists = rng.choices(range(self.artists), cum_weights=self._query_weights, k=count)
+        return [self.artist_name(artist) for artist in artists]
+
+    def close(self):
+        """
+        Libera el fichero mapeado en memoria.
+        """
+        for view in self._views:
+            view.release()
+        self._views = []
+        self._mmap.close()
+
+    def __len__(self):
+        return self.artists
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+_catalogs = {}
+_catalogs_lock = threading.Lock()
+
+def get_catalog(path=None):
+    """
+    Devuelve el catálogo compartido de un fichero, abriéndolo la primera vez.
+
+    Args:
+        path (str): Ruta del catálogo (por defecto: MOCK_CATALOG_PATH).
+
+    Returns:
+        SyntheticCatalog: El catálogo, o None si no se ha configurado ninguno.
+    """
+    path = path or os.getenv("MOCK_CATALOG_PATH")
+    if not path:
+        return None
+    path = os.path.expanduser(path)
+    with _catalogs_lock:
+        if path not in _catalogs:
+            _catalogs[path] = SyntheticCatalog(path)
+        return _catalogs[path]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Genera un catálogo musical sintético para pruebas de carga.")
+    parser.add_argument("path", help="Fichero de catálogo a generar")
+    parser.add_argument("--artists", type=int, default=10000, help="Número de artistas (por defecto: 10000)")
+    parser.add_argument("--tracks-per-artist", type=int, default=20, help="Canciones por artista (por defecto: 20)")
+    parser.add_argument("--playlists", type=int, default=50000, help="Número de listas (por defecto: 50000)")
+    parser.add_argument("--playlist-length", type=int, default=20, help="Canciones por lista (por defecto: 20)")
+    parser.add_argument("--exponent", type=float, default=1.1, help="Exponente de Zipf de la popularidad")
+    parser.add_argument("--seed", type=int, default=0, help="Semilla del generador")
+    args = parser.parse_args(argv)
+
+    print(f"🎲 Generando catálogo con {args.artists} artistas...")
+    stats = generate_catalog(
+        args.path, args.artists, args.tracks_per_artist, args.playlists,
+        args.playlist_length, args.seed, args.exponent
+    )
+    print(f"✅ {stats['artists']} artistas, {stats['tracks']} canciones y {stats['playlists']} listas "
+          f"({stats['items']} elementos) en {args.path} ({stats['bytes'] / 1e6:.1f} MB)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,199 @@
+import os
+import re
+import unicodedata
+
+
+# Sufijos de versión que no cambian la canción: "Back in Black - Remastered 2009",
+# "TNT (Live)", "Hells Bells [2003 Remaster]"...
+VERSION_KEYWORDS = (
+    "remaster", "remastered", "live", "en vivo", "en directo", "mono", "stereo", "radio edit",
+    "single version", "album version", "edit", "version", "versión", "bonus track", "deluxe",
+    "demo", "acoustic", "acústica", "explicit", "clean",
+)
+
+# Palabras que pueden formar un sufijo de versión ("Radio Edit", "2009 Remaster")
+_VERSION_WORDS = frozenset(word for keyword in VERSION_KEYWORDS for word in keyword.split())
+# Sufijos que empiezan así son versiones aunque sigan con un lugar ("Live at Donington")
+_LIVE_PREFIXES = (("live",), ("en", "vivo"), ("en", "directo"))
+
+# Contenido entre paréntesis o corchetes, y sufijo tras el último guion
+_BRACKETED = re.compile(r"\s*[\(\[]([^\)\]]*)[\)\]]")
+_DASHED = re.compile(r"\s+[-–—]\s+([^-–—]*)$")
+_WORDS = re.compile(r"[^\W\d_]+|\d+")
+
+# Similitud mínima entre trigramas para considerar dos títulos duplicados. Por
+# defecto (1) solo se unen los títulos que difieren en mayúsculas, tildes,
+# puntuación, espacios o sufijos de versión: con títulos de artistas distintos,
+# la similitud aproximada une canciones diferentes ("Yesterday" y "Yesterdays")
+DEFAULT_SIMILARITY = float(os.getenv("DEDUP_SIMILARITY", 1))
+
+# Los títulos más cortos (sin espacios) nunca se comparan de forma aproximada
+MIN_FUZZY_LENGTH = 12
+
+# Títulos con los que se compara cada canción dentro de un mismo bloque como máximo
+MAX_BLOCK_SIZE = 64
+
+_NUMBERS = re.compile(r"\d+")
+
+def _is_version_suffix(text):
+    """
+    Indica si un sufijo describe solo la versión de la grabación: todas sus
+    palabras son de versión o números ("2011 Remaster", "Radio Edit"), o
+    empieza por "live"/"en directo" ("Live at Donington").
+    """
+    words = _WORDS.findall(text.casefold())
+    if not words:
+        return False
+    if any(tuple(words[:len(prefix)]) == prefix for prefix in _LIVE_PREFIXES):
+        return True
+    return all(word.isdigit() or word in _VERSION_WORDS for word in words)
+
+def _strip_version(match):
+    return "" if _is_version_suffix(match.group(1)) else match.group(0)
+
+def normalize_title(title):
+    """
+    Normaliza el título de una canción para detectar duplicados: pasa a
+    minúsculas (casefold), elimina tildes, sufijos de versión (remaster,
+    live...) y signos de puntuación, y colapsa los espacios.
+
+    Args:
+        title (str): El título original (por ejemplo, "T.N.T - Remastered").
+
+    Returns:
+        str: El título normalizado (por ejemplo, "tnt").
+    """
+    text = title.casefold()
+    text = _BRACKETED.sub(_strip_version, text)
+    text = _DASHED.sub(_strip_version, text)
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(
+        char for char in text
+        if not unicodedata.combining(char) and unicodedata.category(char)[0] not in "PS"
+    )
+    return " ".join(text.split())
+
+def _trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class SongDeduplicator:
+    def __init__(self, threshold=DEFAULT_SIMILARITY, max_block_size=MAX_BLOCK_SIZE):
+        """
+        Inicializa un índice de canciones que descarta variantes de una misma
+        canción ("TNT" y "T.N.T", "Back in Black" y "Back In Black - Remastered").
+
+        Dos títulos son la misma canción si coinciden una vez normalizados y
+        sin espacios ("Back in Black" y "Backin' Black"). Con threshold < 1
+        también se buscan casi duplicados (por ejemplo, errores tipográficos)
+        por similitud de trigramas, solo entre títulos de al menos
+        MIN_FUZZY_LENGTH caracteres y que comparten una clave de bloque (inicio
+        o final del título y longitud parecida) y los mismos números
+        ("Symphony No. 5" y "Symphony No. 6" son distintas). Como cada bloque
+        guarda como mucho max_block_size títulos, el coste total es lineal en
+        el número de canciones.
+
+        Args:
+            threshold (float): Similitud de Dice mínima (0-1) entre trigramas
+                para considerar dos títulos duplicados (1 = sin similitud aproximada).
+            max_block_size (int): Títulos guardados en cada bloque para la
+                comparación aproximada (los primeros en llegar).
+        """
+        self.threshold = threshold
+        self.max_block_size = max_block_size
+        self.songs = []
+        self.duplicates = 0
+        self._normalized = {}
+        self._blocks = {}
+
+    def _block_keys(self, compact):
+        """
+        Devuelve las claves de bloque de un título compacto (sin espacios).
+        """
+        numbers = tuple(_NUMBERS.findall(compact))
+        length = len(compact) // 4
+        return (("^", compact[:3], numbers, length), ("$", compact[-3:], numbers, length))
+
+    def _find_similar(self, compact, trigrams):
+        """
+        Busca un título ya indexado lo bastante parecido.
+        """
+        for kind, affix, numbers, length in self._block_keys(compact):
+            for bucket in (length - 1, length, length + 1):
+                for other in self._blocks.get((kind, affix, numbers, bucket), ()):
+                    common = len(trigrams & other)
+                    if 2 * common / (len(trigrams) + len(other)) >= self.threshold:
+                        return True
+        return False
+
+    def add(self, song):
+        """
+        Añade una canción si no es una variante de otra ya añadida.
+
+        Args:
+            song (str): El título de la canción.
+
+        Returns:
+            bool: True si la canción es nueva, False si es un duplicado.
+        """
+        compact = self._key(song)
+        if compact in self._normalized:
+            self.duplicates += 1
+            return False
+
+        fuzzy = self.threshold < 1 and len(compact) >= MIN_FUZZY_LENGTH
+        if fuzzy:
+            trigrams = _trigrams(compact)
+            if self._find_similar(compact, trigrams):
+                self.duplicates += 1
+                return False
+
+        self._normalized[compact] = song
+        if fuzzy:
+            for block_key in self._block_keys(compact):
+                block = self._blocks.setdefault(block_key, [])
+                if len(block) < self.max_block_size:
+                    block.append(trigrams)
+        self.songs.append(song)
+        return True
+
+    def _key(self, song):
+        """
+        Devuelve la clave exacta de una canción: el título normalizado sin espacios.
+        """
+        normalized = normalize_title(song) or song.casefold().strip()
+        return normalized.replace(" ", "")
+
+    def extend(self, songs):
+        """
+        Añade varias canciones en orden.
+
+        Args:
+            songs (iterable): Los títulos de las canciones.
+
+        Returns:
+            list: Las canciones que eran nuevas.
+        """
+        return [song for song in songs if self.add(song)]
+
+    def __contains__(self, song):
+        return self._key(song) in self._normalized
+
+    def __len__(self):
+        return len(self.songs)
+
+def deduplicate_songs(songs, threshold=DEFAULT_SIMILARITY):
+    """
+    Elimina las variantes de una misma canción conservando la primera
+    aparición y el orden original.
+
+    Args:
+        songs (iterable): Los títulos de las canciones.
+        threshold (float): Similitud mínima para considerar dos títulos duplicados.
+
+    Returns:
+        list: Las canciones sin duplicados.
+    """
+    deduplicator = SongDeduplicator(threshold)
+    deduplicator.extend(songs)
+    return deduplicator.songs
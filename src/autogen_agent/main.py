@@ -1,90 +1,108 @@
 import os
 import requests
 from dotenv import load_dotenv
-from googleapiclient.discovery import build
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-import spotipy
-from spotipy.oauth2 import SpotifyOAuth
 import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
+from autogen_agent.cache import PersistentTTLCache
+from autogen_agent.dedup import SongDeduplicator
+from autogen_agent.metrics import get_metrics
+from autogen_agent.ollama_client import OllamaError, get_ollama_client
+from autogen_agent.ranking import merge_ranked
+from autogen_agent.ratelimit import get_rate_limiter, throttle_delay
+from autogen_agent.resilience import CircuitOpenError, call_with_retries, get_circuit_breaker, get_retry_policy
 
 
+# Los clientes de Google, Spotify y correo se importan dentro de las funciones
+# que los usan para que el arranque de la CLI no pague su coste de importación
+
 # Cargar variables de entorno desde .env
 load_dotenv()
 
 # Configuración de Ollama para modelos locales
-OLLAMA_BASE_URL = "http://localhost:11434/api"
+OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434/api")
 DEFAULT_MODEL = "gemma:2b"  # Modelo ligero que funciona bien en CPU
 
-def install_ollama_model(model_name):
+def install_ollama_model(model_name, background=False):
     """
-    Intenta descargar el modelo de Ollama si no está disponible.
+    Intenta descargar el modelo de Ollama si no está disponible, mostrando el progreso.
    
     Args:
         model_name (str): El nombre del modelo a descargar.
+        background (bool): Si es True, la descarga se hace en segundo plano sin bloquear.
    
     Returns:
-        bool: True si el modelo se descargó correctamente, False en caso contrario.
+        bool | threading.Thread: True si el modelo se descargó correctamente y False
+            en caso contrario; en segundo plano, el hilo de la descarga.
     """
-    print(f"Intentando descargar el modelo {model_name}...")
-    try:
-        url = f"{OLLAMA_BASE_URL}/pull"
-        headers = {"Content-Type": "application/json"}
-        data = {"name": model_name}
-       
-        # Esta operación puede tardar varios minutos dependiendo del modelo
-        response = requests.post(url, headers=headers, json=data)
-       
-        if response.status_code == 200:
-            print(f"✅ Modelo {model_name} descargado correctamente")
-            return True
-        else:
-            print(f"❌ Error al descargar el modelo: {response.status_code}")
-            print(response.text)
-            return False
-    except Exception as e:
-        print(f"❌ Error de conexión al intentar descargar: {e}")
-        return False
+    return get_ollama_client(OLLAMA_BASE_URL).pull_model(model_name, background=background)
 
-def ask_ollama(prompt, model=DEFAULT_MODEL):
+def ask_ollama(prompt, model=DEFAULT_MODEL, use_cache=True):
     """
     Realiza una consulta al servidor Ollama local.
    
     Args:
         prompt (str): El texto de la consulta.
         model (str): El modelo a utilizar (por defecto: gemma:2b).
+        use_cache (bool): Si es False, no se reutilizan respuestas anteriores.
    
     Returns:
         str: La respuesta del modelo.
     """
-    url = f"{OLLAMA_BASE_URL}/generate"
-   
-    headers = {
-        "Content-Type": "application/json"
-    }
-   
-    data = {
-        "model": model,
-        "prompt": prompt,
-        "stream": False
-    }
-   
     try:
-        response = requests.post(url, headers=headers, json=data)
-        if response.status_code == 200:
-            return response.json().get("response", "")
-        else:
-            print(f"Error al consultar Ollama: {response.status_code}")
-            print(response.text)
-            return "Error al consultar el modelo"
+        result = get_ollama_client(OLLAMA_BASE_URL).generate(prompt, model, use_cache=use_cache)
+        return result.get("response", "")
+    except OllamaError as e:
+        print(f"Error al consultar Ollama: {e.status_code}")
+        print(e.text)
+        get_metrics().increment("autogen_fallbacks_total", fallback="ollama_error_message")
+        return "Error al consultar el modelo"
     except Exception as e:
         print(f"Excepción al llamar a Ollama: {e}")
+        get_metrics().increment("autogen_fallbacks_total", fallback="ollama_error_message")
         return "Error de conexión con Ollama"
 
+def ask_ollama_stream(prompt, model=DEFAULT_MODEL, max_tokens=None, stop=None):
+    """
+    Realiza una consulta al servidor Ollama local en modo streaming.
+    Las métricas de la generación (tiempo hasta el primer token, tokens/s)
+    quedan en get_ollama_client().last_stream_metrics.
+   
+    Args:
+        prompt (str): El texto de la consulta.
+        model (str): El modelo a utilizar (por defecto: gemma:2b).
+        max_tokens (int): Número máximo de tokens a generar (opcional).
+        stop (list): Secuencias que detienen la generación (opcional).
+   
+    Yields:
+        str: Cada fragmento de la respuesta del modelo a medida que se genera.
+            Si la consulta falla antes del primer fragmento se devuelve un
+            mensaje de error; si falla a mitad, la respuesta termina en el
+            último fragmento recibido.
+    """
+    streamed = False
+    try:
+        for token in get_ollama_client(OLLAMA_BASE_URL).stream_generate(
+            prompt, model, max_tokens=max_tokens, stop=stop
+        ):
+            streamed = True
+            yield token
+    except Exception as e:
+        if streamed:
+            # No mezclar el mensaje de error con el texto ya generado
+            print(f"⚠️ La respuesta de Ollama se cortó a mitad: {e}")
+            get_metrics().increment("autogen_fallbacks_total", fallback="ollama_partial_response")
+            return
+        get_metrics().increment("autogen_fallbacks_total", fallback="ollama_error_message")
+        if isinstance(e, OllamaError):
+            print(f"Error al consultar Ollama: {e.status_code}")
+            print(e.text)
+            yield "Error al consultar el modelo"
+        else:
+            print(f"Excepción al llamar a Ollama: {e}")
+            yield "Error de conexión con Ollama"
+
 # Configuración de los modelos con opción de OpenAI o Ollama local
 config_list = [
     {
@@ -105,6 +123,8 @@ config_list_ollama = [
 def get_config():
     """
     Determina la configuración del modelo a utilizar (OpenAI o Ollama).
+    La disponibilidad de Ollama se comprueba con /api/tags, sin cargar el
+    modelo ni descargarlo; el resultado se reutiliza durante OLLAMA_PROBE_TTL.
    
     Returns:
         list: La lista de configuración del modelo.
@@ -113,33 +133,128 @@ def get_config():
         # Verificar si podemos usar OpenAI
         if os.environ.get("OPENAI_API_KEY"):
             return config_list
-        # Si no, intentar usar Ollama
+        # Si no, usar Ollama
+        status = get_ollama_client(OLLAMA_BASE_URL).probe(DEFAULT_MODEL)
+        if status["model_installed"]:
+            print(f"Usando modelo local: {DEFAULT_MODEL}")
+        elif status["server_up"]:
+            print(f"⚠️ El modelo {DEFAULT_MODEL} no está instalado. Usa ensure_ollama_model() para descargarlo.")
         else:
-            # Comprobar si el modelo está instalado, si no, intentar instalarlo
-            try:
-                response = requests.post(
-                    f"{OLLAMA_BASE_URL}/generate", 
-                    json={"model": DEFAULT_MODEL, "prompt": "test", "stream": False}
-                )
-                if response.status_code == 200:
-                    print(f"Usando modelo local: {DEFAULT_MODEL}")
-                    return config_list_ollama
-                else:
-                    install_ollama_model(DEFAULT_MODEL)
-                    return config_list_ollama
-            except Exception:
-                print("Error conectando con Ollama. Intentando instalar el modelo...")
-                install_ollama_model(DEFAULT_MODEL)
-                return config_list_ollama
+            print("Error conectando con Ollama. Asegúrate de que el servidor esté en ejecución.")
+        return config_list_ollama
     except Exception as e:
         print(f"Error al configurar el modelo: {e}")
         print("Usando configuración de Ollama por defecto")
         return config_list_ollama
 
+def ensure_ollama_model(model=DEFAULT_MODEL):
+    """
+    Inicia en segundo plano la descarga del modelo si el servidor Ollama
+    está disponible y el modelo no está instalado.
+   
+    Args:
+        model (str): El modelo necesario (por defecto: gemma:2b).
+   
+    Returns:
+        threading.Thread | None: El hilo de la descarga, o None si no es necesaria.
+    """
+    status = get_ollama_client(OLLAMA_BASE_URL).probe(model)
+    if status["server_up"] and not status["model_installed"]:
+        return install_ollama_model(model, background=True)
+    return None
+
+# Cliente de Spotify compartido por MusicSearchTool y SpotifyTool
+SPOTIFY_SCOPES = "user-library-read playlist-modify-public"
+SPOTIFY_CACHE_PATH = os.getenv("SPOTIFY_CACHE_PATH", os.path.join(os.path.expanduser("~"), ".spotify_cache"))
+# URL base de la API de Spotify (configurable para pruebas y benchmarks sin red)
+SPOTIFY_API_URL = os.getenv("SPOTIFY_API_URL", "https://api.spotify.com/v1/")
+_spotify_client = None
+_spotify_client_lock = threading.Lock()
+
+def _memory_backed_cache_handler(cache_path):
+    """
+    Crea un manejador de caché de tokens de Spotify que mantiene el token en memoria
+    y solo escribe en disco cuando cambia, evitando leer el fichero en cada petición.
+   
+    Args:
+        cache_path (str): La ruta del fichero de caché de tokens.
+   
+    Returns:
+        spotipy.cache_handler.CacheFileHandler: El manejador de caché.
+    """
+    from spotipy.cache_handler import CacheFileHandler
+
+    class MemoryBackedCacheHandler(CacheFileHandler):
+        def __init__(self, cache_path):
+            super().__init__(cache_path=cache_path)
+            self._token_info = None
+
+        def get_cached_token(self):
+            if self._token_info is None:
+                self._token_info = super().get_cached_token()
+            return self._token_info
+
+        def save_token_to_cache(self, token_info):
+            self._token_info = token_info
+            super().save_token_to_cache(token_info)
+
+    return MemoryBackedCacheHandler(cache_path)
+
+def get_spotify_client():
+    """
+    Devuelve el cliente de Spotify compartido, creándolo la primera vez.
+    El cliente usa una sesión HTTP con pool de conexiones (SPOTIFY_POOL_SIZE)
+    y mantiene el token en memoria. Es seguro llamarlo desde varios hilos.
+   
+    Returns:
+        spotipy.Spotify: El cliente autenticado con los permisos de SPOTIFY_SCOPES.
+    """
+    global _spotify_client
+    if _spotify_client is not None:
+        return _spotify_client
+
+    with _spotify_client_lock:
+        if _spotify_client is None:
+            import spotipy
+            from spotipy.oauth2 import SpotifyOAuth
+
+            pool_size = int(os.getenv("SPOTIFY_POOL_SIZE", 10))
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+
+            # Crear el directorio de la caché si no existe
+            os.makedirs(os.path.dirname(SPOTIFY_CACHE_PATH), exist_ok=True)
+
+            _spotify_client = spotipy.Spotify(
+                auth_manager=SpotifyOAuth(
+                    client_id=os.getenv("SPOTIFY_CLIENT_ID"),
+                    client_secret=os.getenv("SPOTIFY_CLIENT_SECRET"),
+                    redirect_uri=os.getenv("SPOTIFY_REDIRECT_URI"),
+                    scope=SPOTIFY_SCOPES,
+                    cache_handler=_memory_backed_cache_handler(SPOTIFY_CACHE_PATH),
+                    requests_session=session
+                ),
+                requests_session=session
+            )
+            _spotify_client.prefix = SPOTIFY_API_URL.rstrip("/") + "/"
+    return _spotify_client
+
+# URL base de la API de Last.fm (configurable para pruebas y benchmarks sin red)
+LASTFM_API_URL = os.getenv("LASTFM_API_URL", "http://ws.audioscrobbler.com/2.0/")
+# Canciones por página de artist.gettoptracks cuando no se indica otro límite (el valor por defecto de Last.fm)
+LASTFM_PAGE_SIZE = 50
+
 class MusicSearchTool:
-    def __init__(self):
+    def __init__(self, cache=None):
         """
         Inicializa la herramienta de búsqueda de música.
+
+        Args:
+            cache (PersistentTTLCache): Caché para las canciones más populares de Last.fm.
+                Si no se indica, se crea una en disco configurada mediante
+                LASTFM_CACHE_TTL (segundos) y LASTFM_CACHE_MAX_ENTRIES.
         """
         print("🛠️ Inicializando MusicSearchTool...")
         
@@ -150,45 +265,56 @@ class MusicSearchTool:
         if not self.lastfm_api_key or not self.lastfm_api_secret:
             raise ValueError("Las credenciales de Last.fm no están configuradas.")
 
-    def search_playlists(self, query, num_songs=20):
+        # Las canciones más populares de un artista cambian como mucho semanalmente
+        if cache is None:
+            cache = PersistentTTLCache(
+                "lastfm_toptracks",
+                ttl=float(os.getenv("LASTFM_CACHE_TTL", 7 * 24 * 3600)),
+                max_entries=int(os.getenv("LASTFM_CACHE_MAX_ENTRIES", 1000))
+            )
+        self.lastfm_cache = cache
+        self.lastfm_limiter = get_rate_limiter("lastfm")
+        # Un Last.fm lento o caído no debe bloquear la búsqueda: se pasa a Spotify
+        self.lastfm_timeout = float(os.getenv("LASTFM_TIMEOUT", 10))
+        self.lastfm_retry = get_retry_policy("lastfm")
+        self.lastfm_breaker = get_circuit_breaker("lastfm")
+        self.spotify_limiter = get_rate_limiter("spotify")
+
+        # Consulta simultánea de fuentes: activada con SEARCH_PARALLEL_SOURCES=1
+        self.parallel_sources = os.getenv("SEARCH_PARALLEL_SOURCES", "0") == "1"
+        # Plazo total de la búsqueda simultánea (SEARCH_SOURCE_TIMEOUT se mantiene por compatibilidad)
+        self.search_deadline = float(os.getenv("SEARCH_DEADLINE", os.getenv("SEARCH_SOURCE_TIMEOUT", 10)))
+
+    def search_playlists(self, query, num_songs=20, parallel=None):
         """
         Busca listas de reproducción utilizando Last.fm y Spotify como respaldo.
-        Evita duplicados en todas las etapas y devuelve una lista única de canciones.
+        Evita duplicados en todas las etapas, incluidas las variantes de una misma
+        canción ("TNT" y "T.N.T", versiones remasterizadas...), antes de buscar
+        cada canción en YouTube y Spotify, y devuelve una lista única de canciones.
        
         Args:
             query (str): El término de búsqueda (artista, género, etc.).
             num_songs (int): El número de canciones a devolver (por defecto: 20).
+            parallel (bool): Si es True, consulta ambas fuentes a la vez
+                (por defecto: valor de SEARCH_PARALLEL_SOURCES).
        
         Returns:
             list: Una lista de canciones únicas en formato Python.
         """
         print(f"\n🎵 Iniciando búsqueda para: {query}")
+
+        if parallel is None:
+            parallel = self.parallel_sources
+
+        if parallel:
+            unique_songs = self._search_sources_in_parallel(query, num_songs)
+        else:
+            unique_songs = self._search_sources_sequentially(query, num_songs)
         
-        # Conjunto para almacenar canciones únicas
-        unique_songs = set()
-        
-        # 1. Intento: Búsqueda en Last.fm (API)
-        print("\n🔍 Paso 1: Búsqueda en Last.fm (API)...")
-        songs_from_lastfm = self._search_via_lastfm(query)
-        print(f"✅ Canciones encontradas en Last.fm (API): {songs_from_lastfm}")
-        
-        # Añadir canciones de Last.fm al conjunto de canciones únicas
-        unique_songs.update(songs_from_lastfm)
-        
-        # 2. Intento: Búsqueda en Spotify (API)
-        if len(unique_songs) < num_songs:
-            print("\n🔍 Paso 2: Búsqueda en Spotify (API)...")
-            print("⚠️ No se encontraron suficientes canciones. Usando Spotify...")
-            songs_from_spotify = self._search_via_spotify(query)
-            print(f"✅ Canciones encontradas en Spotify (API): {songs_from_spotify}")
-            
-            # Añadir canciones de Spotify al conjunto de canciones únicas
-            unique_songs.update(songs_from_spotify)
-        
-        # Convertir el conjunto a una lista y limitar al número solicitado
+        # Limitar al número solicitado (los duplicados ya se descartaron al combinar las fuentes)
         print("\n🔍 Paso 3: Eliminando duplicados y limitando resultados...")
-        unique_songs_list = list(unique_songs)[:num_songs]
-        print(f"✅ Canciones únicas encontradas: {len(unique_songs_list)}")
+        unique_songs_list = unique_songs.songs[:num_songs]
+        print(f"✅ Canciones únicas encontradas: {len(unique_songs_list)} ({unique_songs.duplicates} duplicados descartados)")
         
         # Log de diagnóstico
         print("\n📊 Resumen de la búsqueda:")
@@ -196,28 +322,209 @@ class MusicSearchTool:
         print(f"- Canciones: {unique_songs_list}")
         
         return unique_songs_list
-    
-    def _search_via_lastfm(self, query):
+
+    def _search_sources_sequentially(self, query, num_songs):
         """
-        Realiza búsquedas mediante la API de Last.fm.
+        Consulta Last.fm y, solo si no hay suficientes canciones, Spotify.
+        Last.fm se pagina a medida que hacen falta más canciones y el
+        resultado conserva su orden de popularidad.
        
         Args:
             query (str): El término de búsqueda (artista, género, etc.).
+            num_songs (int): El número de canciones deseado.
        
         Returns:
-            list: Una lista de nombres de canciones.
+            SongDeduplicator: Las canciones únicas encontradas, en orden de popularidad.
         """
-        url = f"http://ws.audioscrobbler.com/2.0/?method=artist.gettoptracks&artist={query}&api_key={self.lastfm_api_key}&format=json"
-        print(f"📄 Realizando solicitud HTTP a: {url}")
-        response = requests.get(url)
+        # Índice de canciones únicas (descarta también las variantes de una misma canción)
+        unique_songs = SongDeduplicator()
         
-        if response.status_code == 200:
-            data = response.json()
-            songs = [track['name'] for track in data.get('toptracks', {}).get('track', [])]
-            return songs
-        else:
+        # 1. Intento: Búsqueda en Last.fm (API); 2. Intento: Spotify, solo si se llega a consumir
+        print("\n🔍 Paso 1: Búsqueda en Last.fm (API)...")
+        merge_ranked(
+            [self._iter_lastfm_tracks(query, num_songs), self._iter_spotify_fallback(query)],
+            num_songs,
+            unique_songs
+        )
+        return unique_songs
+
+    def _iter_spotify_fallback(self, query):
+        """
+        Generador que consulta Spotify solo cuando se le piden canciones, es
+        decir, cuando Last.fm no ha devuelto suficientes.
+       
+        Args:
+            query (str): El término de búsqueda (artista, género, etc.).
+       
+        Yields:
+            str: Los nombres de las canciones de Spotify.
+        """
+        print("\n🔍 Paso 2: Búsqueda en Spotify (API)...")
+        print("⚠️ No se encontraron suficientes canciones. Usando Spotify...")
+        get_metrics().increment("autogen_fallbacks_total", fallback="search_spotify_source")
+        songs_from_spotify = self._search_via_spotify(query)
+        print(f"✅ Canciones encontradas en Spotify (API): {songs_from_spotify}")
+        yield from songs_from_spotify
+
+    def _search_sources_in_parallel(self, query, num_songs):
+        """
+        Consulta Last.fm y Spotify simultáneamente. Termina en cuanto las
+        fuentes que ya respondieron, sean cuales sean, suman num_songs canciones
+        únicas o vence el plazo total de la búsqueda (SEARCH_DEADLINE), sin
+        esperar a la fuente más lenta. Las fuentes que respondieron se combinan
+        en orden de prioridad (Last.fm y después Spotify).
+       
+        Args:
+            query (str): El término de búsqueda (artista, género, etc.).
+            num_songs (int): El número de canciones deseado.
+       
+        Returns:
+            SongDeduplicator: Las canciones únicas encontradas, en orden de prioridad.
+        """
+        print("\n🔍 Pasos 1-2: Búsqueda simultánea en Last.fm y Spotify (API)...")
+        sources = ["Last.fm", "Spotify"]
+        results = {}
+
+        executor = ThreadPoolExecutor(max_workers=2)
+        futures = {
+            executor.submit(self._search_via_lastfm, query, num_songs): "Last.fm",
+            executor.submit(self._search_via_spotify, query): "Spotify",
+        }
+        try:
+            for future in as_completed(futures, timeout=self.search_deadline):
+                source = futures[future]
+                try:
+                    results[source] = future.result()
+                    print(f"✅ Canciones encontradas en {source} (API): {results[source]}")
+                except Exception as e:
+                    print(f"❌ Error en la búsqueda de {source}: {e}")
+                    results[source] = []
+
+                answered = (results[name] for name in sources if name in results)
+                if len(merge_ranked(answered, num_songs)) >= num_songs:
+                    break
+        except FuturesTimeoutError:
+            print(f"⏱️ Plazo de {self.search_deadline}s agotado. Usando las fuentes que ya respondieron.")
+        finally:
+            # No esperar a la fuente más lenta: su resultado se descarta
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        return merge_ranked((results[name] for name in sources if name in results), num_songs)
+
+    def _lastfm_page(self, query, limit, page):
+        """
+        Pide una página de las canciones más populares de un artista a Last.fm.
+       
+        Args:
+            query (str): El nombre del artista.
+            limit (int): Canciones por página.
+            page (int): El número de página (desde 1).
+       
+        Returns:
+            tuple: (canciones, total de canciones en Last.fm o None), o None si la petición falla.
+        """
+        params = {
+            "method": "artist.gettoptracks",
+            "artist": query,
+            "api_key": self.lastfm_api_key,
+            "format": "json",
+            "limit": limit,
+            "page": page
+        }
+        print(f"📄 Realizando solicitud HTTP a Last.fm: {query} (página {page}, {limit} canciones)")
+        try:
+            response = call_with_retries(
+                self.lastfm_limiter.call,
+                requests.get,
+                LASTFM_API_URL,
+                params=params,
+                timeout=self.lastfm_timeout,
+                policy=self.lastfm_retry,
+                breaker=self.lastfm_breaker
+            )
+        except CircuitOpenError as e:
+            print(f"⏭️ Last.fm omitido: {e}")
+            get_metrics().increment("autogen_fallbacks_total", fallback="lastfm_circuit_open")
+            return None
+        except requests.RequestException as e:
+            print(f"❌ Error de conexión con Last.fm: {e}")
+            return None
+
+        if response.status_code != 200:
             print(f"❌ Error en la búsqueda de Last.fm: {response.status_code}")
-            return []
+            return None
+        toptracks = response.json().get('toptracks', {})
+        songs = [track['name'] for track in toptracks.get('track', [])]
+        try:
+            total = int(toptracks.get('@attr', {}).get('total'))
+        except (TypeError, ValueError):
+            total = None
+        return songs, total
+
+    def _iter_lastfm_tracks(self, query, limit=LASTFM_PAGE_SIZE):
+        """
+        Generador de las canciones más populares de un artista en Last.fm, en
+        orden de popularidad. Empieza por las guardadas en caché y solo pide
+        una página nueva cuando se consumen todas las conocidas: la primera
+        petición trae exactamente limit canciones y las siguientes páginas
+        del mismo tamaño.
+       
+        Args:
+            query (str): El término de búsqueda (artista, género, etc.).
+            limit (int): Canciones que se esperan consumir (tamaño de página).
+       
+        Yields:
+            str: Los nombres de las canciones.
+        """
+        cached = self.lastfm_cache.get(query)
+        if isinstance(cached, list):
+            # Formato anterior de la caché: solo la primera página por defecto
+            cached = {"tracks": cached, "complete": False}
+        if cached is not None:
+            print(f"⚡ Canciones de Last.fm recuperadas de la caché para: {query}")
+        tracks = list(cached["tracks"]) if cached else []
+        complete = bool(cached and cached["complete"])
+        limit = max(1, int(limit))
+
+        position = 0
+        while True:
+            while position < len(tracks):
+                yield tracks[position]
+                position += 1
+            if complete:
+                return
+
+            # Página alineada con lo que ya se tiene: Last.fm numera las páginas según limit
+            have = len(tracks)
+            if have % limit == 0:
+                page_size, page = limit, have // limit + 1
+            elif have > limit:
+                page_size, page = have, 2
+            else:
+                page_size, page = limit, 1
+            result = self._lastfm_page(query, page_size, page)
+            if result is None:
+                return
+            songs, total = result
+            new_songs = songs[have - (page - 1) * page_size:]
+            print(f"✅ Canciones encontradas en Last.fm (API): {new_songs}")
+            tracks.extend(new_songs)
+            complete = not new_songs or len(songs) < page_size or (total is not None and len(tracks) >= total)
+            if tracks:
+                self.lastfm_cache.set(query, {"tracks": tracks, "complete": complete})
+
+    def _search_via_lastfm(self, query, limit=LASTFM_PAGE_SIZE):
+        """
+        Realiza búsquedas mediante la API de Last.fm.
+       
+        Args:
+            query (str): El término de búsqueda (artista, género, etc.).
+            limit (int): Número de canciones únicas deseado (por defecto: 50).
+       
+        Returns:
+            list: Una lista de hasta limit nombres de canciones, en orden de popularidad.
+        """
+        return merge_ranked([self._iter_lastfm_tracks(query, limit)], limit).songs
     
     def _search_via_spotify(self, query):
         """
@@ -229,18 +536,12 @@ class MusicSearchTool:
         Returns:
             list: Una lista de nombres de canciones.
         """
-        # Autenticación en Spotify
-        sp = spotipy.Spotify(auth_manager=SpotifyOAuth(
-            client_id=os.getenv("SPOTIFY_CLIENT_ID"),
-            client_secret=os.getenv("SPOTIFY_CLIENT_SECRET"),
-            redirect_uri=os.getenv("SPOTIFY_REDIRECT_URI"),
-            scope="user-library-read",
-            cache_path=os.path.join(os.path.expanduser("~"), ".spotify_cache")
-        ))
+        # Cliente de Spotify compartido (se autentica una sola vez)
+        sp = get_spotify_client()
         
         # Realizar la búsqueda incluyendo el nombre del artista
         search_query = f"track:{query} artist:{query}"
-        results = sp.search(q=search_query, type='track', limit=20)
+        results = self.spotify_limiter.call(sp.search, q=search_query, type='track', limit=20)
         
         # Filtrar canciones que coincidan con el artista
         songs = []
@@ -254,19 +555,27 @@ class MusicSearchTool:
 # Configuración de OAuth 2.0 para YouTube
 SCOPES = ['https://www.googleapis.com/auth/youtube']
 CLIENT_SECRETS_FILE = 'client_secret.json'  # Archivo descargado de Google Cloud Console
+# Fichero donde se guardan los tokens de acceso y actualización
+YOUTUBE_TOKEN_FILE = os.getenv("YOUTUBE_TOKEN_FILE", "token.json")
+# Endpoint alternativo de la API de YouTube (por defecto: el de Google)
+YOUTUBE_API_URL = os.getenv("YOUTUBE_API_URL")
 
-def get_authenticated_service():
+def get_youtube_credentials():
     """
-    Obtiene un servicio autenticado de YouTube usando OAuth 2.0.
+    Obtiene credenciales válidas de YouTube usando OAuth 2.0.
    
     Returns:
-        googleapiclient.discovery.Resource: Un servicio autenticado de YouTube.
+        google.oauth2.credentials.Credentials: Las credenciales autenticadas.
     """
+    from google_auth_oauthlib.flow import InstalledAppFlow
+    from google.auth.transport.requests import Request
+    from google.oauth2.credentials import Credentials
+
     creds = None
     
     # El archivo token.json almacena los tokens de acceso y actualización
-    if os.path.exists('token.json'):
-        creds = Credentials.from_authorized_user_file('token.json', SCOPES)
+    if os.path.exists(YOUTUBE_TOKEN_FILE):
+        creds = Credentials.from_authorized_user_file(YOUTUBE_TOKEN_FILE, SCOPES)
     
     # Si no hay credenciales válidas, solicita al usuario que inicie sesión
     if not creds or not creds.valid:
@@ -284,17 +593,314 @@ def get_authenticated_service():
             creds = flow.run_local_server(port=8888, redirect_uri_port=8888)
         
         # Guarda las credenciales para la próxima vez
-        with open('token.json', 'w') as token:
+        with open(YOUTUBE_TOKEN_FILE, 'w') as token:
             token.write(creds.to_json())
     
-    return build('youtube', 'v3', credentials=creds)
+    return creds
+
+def _youtube_client_options():
+    """
+    Devuelve las opciones del cliente de YouTube con el endpoint configurado.
+   
+    Returns:
+        dict | None: Las opciones con api_endpoint, o None para usar el de Google.
+    """
+    return {"api_endpoint": YOUTUBE_API_URL} if YOUTUBE_API_URL else None
+
+def get_authenticated_service():
+    """
+    Obtiene un servicio autenticado de YouTube usando OAuth 2.0.
+   
+    Returns:
+        googleapiclient.discovery.Resource: Un servicio autenticado de YouTube.
+    """
+    from googleapiclient.discovery import build
+
+    return build('youtube', 'v3', credentials=get_youtube_credentials(), client_options=_youtube_client_options())
+
+def _youtube_operation(request):
+    """
+    Devuelve el nombre de una petición de YouTube para las métricas.
+   
+    Args:
+        request: La petición (googleapiclient.http.HttpRequest) o un lote.
+   
+    Returns:
+        str: El identificador del método (por ejemplo, "youtube.search.list") o "batch".
+    """
+    method_id = getattr(request, "methodId", None)
+    return method_id if isinstance(method_id, str) else "batch"
+
+# Número máximo de peticiones por lote HTTP recomendado por la API de YouTube
+YOUTUBE_MAX_BATCH_SIZE = 50
+# Códigos HTTP que justifican reintentar una inserción fallida
+YOUTUBE_RETRYABLE_STATUS = (429, 500, 502, 503, 504)
 
 class YouTubeTool:
-    def __init__(self):
+    def __init__(self, concurrency=None, video_index=None, batch_inserts=None, rate_limiter=None):
         """
         Inicializa la clase YouTubeTool con un servicio autenticado de YouTube.
+
+        Args:
+            concurrency (int): Número máximo de búsquedas de vídeos simultáneas
+                (por defecto: YOUTUBE_SEARCH_CONCURRENCY o 8).
+            video_index (PersistentTTLCache): Índice persistente canción -> vídeo.
+                Si no se indica, se crea uno en disco configurado mediante
+                YOUTUBE_INDEX_TTL (segundos) y YOUTUBE_INDEX_MAX_ENTRIES.
+            batch_inserts (bool): Si es True, añade los vídeos mediante peticiones
+                HTTP por lotes (por defecto: valor de YOUTUBE_BATCH_INSERTS).
+            rate_limiter (RateLimiter): Limitador de peticiones a la API
+                (por defecto: el limitador compartido del servicio "youtube").
+        """
+        from googleapiclient.discovery import build
+
+        self.credentials = get_youtube_credentials()
+        self.youtube = build('youtube', 'v3', credentials=self.credentials, client_options=_youtube_client_options())
+        self.concurrency = concurrency or int(os.getenv("YOUTUBE_SEARCH_CONCURRENCY", 8))
+        # Cada búsqueda cuesta 100 unidades de cuota: las resoluciones se reutilizan
+        # y se revalidan al caducar
+        if video_index is None:
+            video_index = PersistentTTLCache(
+                "youtube_videos",
+                ttl=float(os.getenv("YOUTUBE_INDEX_TTL", 30 * 24 * 3600)),
+                max_entries=int(os.getenv("YOUTUBE_INDEX_MAX_ENTRIES", 10000))
+            )
+        self.video_index = video_index
+        if batch_inserts is None:
+            batch_inserts = os.getenv("YOUTUBE_BATCH_INSERTS", "0") == "1"
+        self.batch_inserts = batch_inserts
+        self.batch_retries = int(os.getenv("YOUTUBE_BATCH_RETRIES", 2))
+        self.rate_limiter = rate_limiter or get_rate_limiter("youtube")
+        # httplib2 no es seguro entre hilos: cada hilo usa su propio cliente HTTP
+        self._local = threading.local()
+
+    def _execute(self, request, cost=1):
+        """
+        Ejecuta una petición de la API de YouTube con el cliente HTTP del hilo actual,
+        respetando el límite de peticiones del servicio.
+    
+        Args:
+            request (googleapiclient.http.HttpRequest): La petición a ejecutar.
+            cost (int): Número de peticiones que representa (tamaño del lote).
+    
+        Returns:
+            dict: La respuesta de la API.
+        """
+        if self.credentials is None:
+            return self.rate_limiter.call(request.execute, cost=cost, operation=_youtube_operation(request))
+
+        http = getattr(self._local, "http", None)
+        if http is None:
+            import google_auth_httplib2
+            import httplib2
+
+            http = google_auth_httplib2.AuthorizedHttp(self.credentials, http=httplib2.Http())
+            self._local.http = http
+        return self.rate_limiter.call(request.execute, http=http, cost=cost, operation=_youtube_operation(request))
+
+    def _search_video(self, song):
+        """
+        Busca el vídeo más relevante para una canción.
+    
+        Args:
+            song (str): El nombre de la canción.
+    
+        Returns:
+            dict: El ID, el título y la fecha de resolución del vídeo,
+                o None si no hay resultados.
+        """
+        cached_video = self.video_index.get(song)
+        if cached_video is not None:
+            return cached_video
+
+        search_response = self._execute(self.youtube.search().list(
+            q=song,
+            part="id,snippet",
+            maxResults=1,
+            type="video"
+        ))
+        
+        # Verificar si encontramos un resultado
+        if not search_response["items"]:
+            return None
+        video = {
+            "video_id": search_response["items"][0]["id"]["videoId"],
+            "video_title": search_response["items"][0]["snippet"]["title"],
+            "resolved_at": time.time()
+        }
+        self.video_index.set(song, video)
+        return video
+
+    def _playlist_item_request(self, playlist_id, video_id, position=None):
+        """
+        Construye la petición para añadir un vídeo a una lista de reproducción.
+    
+        Args:
+            playlist_id (str): El ID de la lista de reproducción.
+            video_id (str): El ID del vídeo.
+            position (int): Posición del vídeo en la lista (opcional).
+    
+        Returns:
+            googleapiclient.http.HttpRequest: La petición sin ejecutar.
+        """
+        snippet = {
+            "playlistId": playlist_id,
+            "resourceId": {
+                "kind": "youtube#video",
+                "videoId": video_id
+            }
+        }
+        if position is not None:
+            snippet["position"] = position
+        return self.youtube.playlistItems().insert(
+            part="snippet",
+            body={"snippet": snippet}
+        )
+
+    def _reorder_playlist_items(self, playlist_id, current, expected, items, base):
+        """
+        Mueve los elementos de una lista de reproducción para que un tramo
+        quede en el orden deseado, con una actualización por elemento descolocado.
+    
+        Args:
+            playlist_id (str): El ID de la lista de reproducción.
+            current (list): Los índices de los vídeos del tramo en su orden actual.
+            expected (list): Los mismos índices en el orden deseado.
+            items (dict): Índice -> playlistItem devuelto por la inserción.
+            base (int): Posición en la lista del primer elemento del tramo.
+    
+        Returns:
+            bool: True si el tramo quedó en el orden deseado.
+        """
+        current = list(current)
+        for offset, index in enumerate(expected):
+            if current[offset] == index:
+                continue
+            item = items[index]
+            try:
+                self._execute(self.youtube.playlistItems().update(
+                    part="snippet",
+                    body={
+                        "id": item["id"],
+                        "snippet": {
+                            "playlistId": playlist_id,
+                            "resourceId": item["snippet"]["resourceId"],
+                            "position": base + offset
+                        }
+                    }
+                ))
+            except Exception as e:
+                print(f"⚠️ No se pudo reordenar la lista de reproducción: {e}")
+                return False
+            # Mover un elemento desplaza una posición a los que había entre ambos puntos
+            current.remove(index)
+            current.insert(offset, index)
+        return True
+
+    def _insert_videos_batched(self, playlist_id, video_ids):
+        """
+        Añade vídeos a una lista de reproducción agrupando las inserciones en
+        peticiones HTTP por lotes de hasta YOUTUBE_MAX_BATCH_SIZE elementos.
+
+        Los lotes se envían uno detrás de otro y sus inserciones no indican
+        posición (se añaden al final), pero el servidor puede procesar las
+        partes de un lote en cualquier orden: cada respuesta indica la posición
+        que ocupó el vídeo y, si el lote quedó desordenado, los vídeos
+        descolocados se mueven a su sitio antes de enviar el siguiente lote.
+        Si falla el lote completo, sus vídeos se añaden uno a uno. Las
+        inserciones con errores transitorios se reintentan una a una (hasta
+        YOUTUBE_BATCH_RETRIES veces) en la posición que les corresponde entre
+        los vídeos ya confirmados, que nunca supera el final de la lista.
+    
+        Args:
+            playlist_id (str): El ID de la lista de reproducción.
+            video_ids (list): Los IDs de los vídeos en el orden deseado.
+    
+        Returns:
+            set: Los índices (en video_ids) de los vídeos que no se pudieron añadir.
         """
-        self.youtube = get_authenticated_service()
+        from googleapiclient.errors import HttpError
+
+        inserted = set()
+        failed = set()
+        retry = []
+        throttle_delays = []
+
+        def record(index, exception):
+            if exception is None:
+                inserted.add(index)
+            elif isinstance(exception, HttpError) and exception.status_code not in YOUTUBE_RETRYABLE_STATUS:
+                print(f"❌ No se pudo añadir el vídeo {video_ids[index]}: {exception}")
+                failed.add(index)
+            else:
+                retry.append(index)
+                delay = throttle_delay(exception)
+                if delay is not None:
+                    throttle_delays.append(delay)
+
+        def insert_one(index):
+            # Mientras la lista contenga los vídeos confirmados en su orden, esta posición es válida
+            position = sum(1 for i in inserted if i < index)
+            try:
+                self._execute(self._playlist_item_request(playlist_id, video_ids[index], position))
+                record(index, None)
+            except Exception as e:
+                record(index, e)
+
+        for start in range(0, len(video_ids), YOUTUBE_MAX_BATCH_SIZE):
+            chunk = range(start, min(start + YOUTUBE_MAX_BATCH_SIZE, len(video_ids)))
+            base = len(inserted)
+            errors = {}
+            items = {}
+
+            def callback(request_id, response, exception):
+                if exception is not None:
+                    errors[int(request_id)] = exception
+                else:
+                    items[int(request_id)] = response
+
+            batch = self.youtube.new_batch_http_request(callback=callback)
+            for index in chunk:
+                batch.add(self._playlist_item_request(playlist_id, video_ids[index]), request_id=str(index))
+            try:
+                self._execute(batch, cost=len(chunk))
+            except Exception as e:
+                print(f"⚠️ Error en el lote de inserciones ({e}). Añadiendo sus vídeos uno a uno...")
+                for index in chunk:
+                    if index in items:
+                        record(index, None)
+                    else:
+                        insert_one(index)
+                continue
+
+            for index in chunk:
+                record(index, errors.get(index))
+
+            # Comprobar el orden en que el servidor aplicó las inserciones del lote
+            added = [index for index in chunk if index in items]
+            positions = {index: ((items[index] or {}).get("snippet") or {}).get("position") for index in added}
+            if any(position is None for position in positions.values()):
+                continue
+            current = sorted(added, key=positions.get)
+            if current != added:
+                print("🔀 El lote se aplicó desordenado. Recolocando los vídeos...")
+                self._reorder_playlist_items(playlist_id, current, added, items, base)
+
+        for attempt in range(self.batch_retries):
+            if not retry:
+                break
+            if throttle_delays:
+                # Las inserciones rechazadas por exceso de peticiones esperan antes de reintentarse
+                self.rate_limiter.throttle(max(throttle_delays))
+            pending = retry
+            retry = []
+            throttle_delays = []
+            print(f"🔁 Reintentando {len(pending)} inserciones (intento {attempt + 2})...")
+            for index in pending:
+                insert_one(index)
+
+        failed.update(retry)
+        return failed
     
     def create_playlist(self, title, description, songs):
         """
@@ -314,7 +920,7 @@ class YouTubeTool:
             title = title.upper()
             
             # Crear la lista de reproducción
-            playlist = self.youtube.playlists().insert(
+            playlist = self._execute(self.youtube.playlists().insert(
                 part="snippet,status",
                 body={
                     "snippet": {
@@ -325,49 +931,37 @@ class YouTubeTool:
                         "privacyStatus": "public"
                     }
                 }
-            ).execute()
+            ))
             
             playlist_id = playlist["id"]
             
             # Lista para almacenar URLs de videos
             video_urls = []
             
-            # Buscar y añadir cada canción
-            for song in songs:
-                # Buscar el video
-                search_response = self.youtube.search().list(
-                    q=song,
-                    part="id,snippet",
-                    maxResults=1,
-                    type="video"
-                ).execute()
-                
-                # Verificar si encontramos un resultado
-                if search_response["items"]:
-                    video_id = search_response["items"][0]["id"]["videoId"]
-                    video_title = search_response["items"][0]["snippet"]["title"]
-                    video_url = f"https://www.youtube.com/watch?v={video_id}"
-                    
-                    # Añadir a la lista de URLs
-                    video_urls.append({
-                        "song": song,
-                        "video_title": video_title,
-                        "url": video_url
-                    })
-                    
-                    # Añadir a la lista de reproducción
-                    self.youtube.playlistItems().insert(
-                        part="snippet",
-                        body={
-                            "snippet": {
-                                "playlistId": playlist_id,
-                                "resourceId": {
-                                    "kind": "youtube#video",
-                                    "videoId": video_id
-                                }
-                            }
-                        }
-                    ).execute()
+            # Fase 1: buscar los vídeos de todas las canciones en paralelo
+            hits_before = self.video_index.hits
+            with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+                videos = list(executor.map(self._search_video, songs))
+            print(f"⚡ Vídeos resueltos desde el índice: {self.video_index.hits - hits_before}/{len(songs)}")
+            
+            # Fase 2: añadir los vídeos en el orden original de las canciones
+            found = [(song, video) for song, video in zip(songs, videos) if video is not None]
+            if self.batch_inserts:
+                failed = self._insert_videos_batched(playlist_id, [video["video_id"] for song, video in found])
+            else:
+                failed = set()
+                for song, video in found:
+                    self._execute(self._playlist_item_request(playlist_id, video["video_id"]))
+            
+            for index, (song, video) in enumerate(found):
+                if index in failed:
+                    continue
+                # Añadir a la lista de URLs
+                video_urls.append({
+                    "song": song,
+                    "video_title": video["video_title"],
+                    "url": f"https://www.youtube.com/watch?v={video['video_id']}"
+                })
             
             playlist_url = f"https://www.youtube.com/playlist?list={playlist_id}"
             return {
@@ -377,6 +971,7 @@ class YouTubeTool:
         
         except Exception as e:
             print(f"Error al crear lista de reproducción en YouTube: {e}")
+            get_metrics().increment("autogen_fallbacks_total", fallback="youtube_example_playlist")
             # Para pruebas, devolver una URL ficticia
             return {
                 "playlist_url": "https://www.youtube.com/playlist?list=EXAMPLE_ID",
@@ -386,15 +981,36 @@ class YouTubeTool:
                 ]
             }
 
+# Spotify admite como máximo 100 pistas por petición de inserción
+SPOTIFY_MAX_ITEMS_PER_REQUEST = 100
+
 class SpotifyTool:
-    def __init__(self):
+    def __init__(self, track_cache=None, concurrency=None, rate_limiter=None):
         """
         Inicializa la clase SpotifyTool con las credenciales de Spotify.
+
+        Args:
+            track_cache (PersistentTTLCache): Caché persistente canción -> pista.
+                Si no se indica, se crea una en disco configurada mediante
+                SPOTIFY_TRACK_CACHE_TTL (segundos) y SPOTIFY_TRACK_CACHE_MAX_ENTRIES.
+            concurrency (int): Número máximo de búsquedas de pistas simultáneas
+                (por defecto: SPOTIFY_SEARCH_CONCURRENCY o 8).
+            rate_limiter (RateLimiter): Limitador de peticiones a la API
+                (por defecto: el limitador compartido del servicio "spotify").
         """
         self.client_id = os.getenv("SPOTIFY_CLIENT_ID")
         self.client_secret = os.getenv("SPOTIFY_CLIENT_SECRET")
         self.redirect_uri = os.getenv("SPOTIFY_REDIRECT_URI")
         self.sp = None
+        if track_cache is None:
+            track_cache = PersistentTTLCache(
+                "spotify_tracks",
+                ttl=float(os.getenv("SPOTIFY_TRACK_CACHE_TTL", 30 * 24 * 3600)),
+                max_entries=int(os.getenv("SPOTIFY_TRACK_CACHE_MAX_ENTRIES", 10000))
+            )
+        self.track_cache = track_cache
+        self.concurrency = concurrency or int(os.getenv("SPOTIFY_SEARCH_CONCURRENCY", 8))
+        self.rate_limiter = rate_limiter or get_rate_limiter("spotify")
         self.initialize_spotify()
     
     def initialize_spotify(self):
@@ -403,18 +1019,8 @@ class SpotifyTool:
         """
         try:
             if self.client_id and self.client_secret:
-                # Establecer una ruta de caché específica y accesible
-                cache_path = os.path.join(os.path.expanduser("~"), ".spotify_cache")
-                # Crear el directorio si no existe
-                os.makedirs(os.path.dirname(cache_path), exist_ok=True)
-                
-                self.sp = spotipy.Spotify(auth_manager=SpotifyOAuth(
-                    client_id=self.client_id,
-                    client_secret=self.client_secret,
-                    redirect_uri=self.redirect_uri,
-                    scope="playlist-modify-public",
-                    cache_path=cache_path
-                ))
+                # Reutilizar el cliente compartido con MusicSearchTool
+                self.sp = get_spotify_client()
                 print("Spotify inicializado correctamente")
             else:
                 print("Credenciales de Spotify no disponibles")
@@ -423,6 +1029,7 @@ class SpotifyTool:
             # Intentar una inicialización alternativa en caso de error
             try:
                 # Intentar usar Client Credentials Flow en lugar de OAuth si hay problemas
+                import spotipy
                 from spotipy.oauth2 import SpotifyClientCredentials
                 self.sp = spotipy.Spotify(auth_manager=SpotifyClientCredentials(
                     client_id=self.client_id,
@@ -432,6 +1039,35 @@ class SpotifyTool:
             except Exception as e2:
                 print(f"Error en la inicialización alternativa de Spotify: {e2}")
                 self.sp = None
+
+    def _resolve_track(self, song):
+        """
+        Busca la pista de Spotify que corresponde a una canción,
+        consultando primero la caché persistente.
+    
+        Args:
+            song (str): El nombre de la canción.
+    
+        Returns:
+            dict: El nombre, artista, álbum y URI de la pista, o None si no hay resultados.
+        """
+        cached_track = self.track_cache.get(song)
+        if cached_track is not None:
+            return cached_track
+
+        result = self.rate_limiter.call(self.sp.search, q=song, type="track", limit=1)
+        if not result["tracks"]["items"]:
+            return None
+
+        track = result["tracks"]["items"][0]
+        resolved_track = {
+            "track_name": track["name"],
+            "artist": track["artists"][0]["name"],
+            "album": track["album"]["name"],
+            "uri": track["uri"]
+        }
+        self.track_cache.set(song, resolved_track)
+        return resolved_track
     
     def create_playlist(self, title, description, songs):
         """
@@ -458,10 +1094,11 @@ class SpotifyTool:
                     raise Exception("No se pudo inicializar Spotify")
             
             # Obtener el ID del usuario actual
-            user_id = self.sp.current_user()["id"]
+            user_id = self.rate_limiter.call(self.sp.current_user)["id"]
             
             # Crear la lista de reproducción
-            playlist = self.sp.user_playlist_create(
+            playlist = self.rate_limiter.call(
+                self.sp.user_playlist_create,
                 user=user_id,
                 name=title,
                 public=True,
@@ -470,27 +1107,26 @@ class SpotifyTool:
                 
             # Buscar y añadir cada canción
             track_info = []
-            track_uris = []
+            pending_uris = []
             
-            for song in songs:
-                result = self.sp.search(q=song, type="track", limit=1)
-                if result["tracks"]["items"]:
-                    track = result["tracks"]["items"][0]
-                    track_uri = track["uri"]
-                    track_uris.append(track_uri)
+            # Las búsquedas se ejecutan en paralelo y los resultados se consumen
+            # en orden: cada bloque completo se inserta mientras siguen las búsquedas
+            with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+                for song, track in zip(songs, executor.map(self._resolve_track, songs)):
+                    if not track:
+                        continue
+                    pending_uris.append(track["uri"])
                     
                     # Guardar información sobre la canción
-                    track_info.append({
-                        "original_query": song,
-                        "track_name": track["name"],
-                        "artist": track["artists"][0]["name"],
-                        "album": track["album"]["name"],
-                        "uri": track_uri
-                    })
+                    track_info.append({"original_query": song, **track})
+                    
+                    if len(pending_uris) == SPOTIFY_MAX_ITEMS_PER_REQUEST:
+                        self.rate_limiter.call(self.sp.playlist_add_items, playlist["id"], pending_uris)
+                        pending_uris = []
             
-            # Añadir canciones a la lista de reproducción
-            if track_uris:
-                self.sp.playlist_add_items(playlist["id"], track_uris)
+            # Añadir las canciones restantes a la lista de reproducción
+            if pending_uris:
+                self.rate_limiter.call(self.sp.playlist_add_items, playlist["id"], pending_uris)
             
             return {
                 "playlist_url": playlist["external_urls"]["spotify"],
@@ -499,6 +1135,7 @@ class SpotifyTool:
         
         except Exception as e:
             print(f"Error al crear lista de reproducción en Spotify: {e}")
+            get_metrics().increment("autogen_fallbacks_total", fallback="spotify_example_playlist")
             # Para pruebas, devolver una URL ficticia
             return {
                 "playlist_url": "https://open.spotify.com/playlist/EXAMPLE_ID",
@@ -527,9 +1164,13 @@ class NotificationTool:
         Returns:
             bool: True si el correo se envió correctamente, False en caso contrario.
         """
+        import smtplib
+        from email.mime.text import MIMEText
+        from email.mime.multipart import MIMEMultipart
+
         try:
-            smtp_server = "smtp.gmail.com"
-            smtp_port = 587
+            smtp_server = os.getenv("SMTP_HOST", "smtp.gmail.com")
+            smtp_port = int(os.getenv("SMTP_PORT", 587))
             sender_email = os.getenv("EMAIL_USER")
             sender_password = os.getenv("EMAIL_PASSWORD")
             
@@ -547,10 +1188,12 @@ class NotificationTool:
             message.attach(MIMEText(body, "plain"))
             
             # Iniciar sesión y enviar el correo
-            with smtplib.SMTP(smtp_server, smtp_port) as server:
-                server.starttls()
-                server.login(sender_email, sender_password)
-                server.send_message(message)
+            with get_metrics().span("autogen_api_request_duration_seconds", service="smtp", operation="send_message"):
+                with smtplib.SMTP(smtp_server, smtp_port) as server:
+                    if os.getenv("SMTP_STARTTLS", "1") == "1":
+                        server.starttls()
+                    server.login(sender_email, sender_password)
+                    server.send_message(message)
             
             return True
         
@@ -558,32 +1201,118 @@ class NotificationTool:
             print(f"Error al enviar correo electrónico: {e}")
             return False
 
-# Configuración dinámica para elegir entre OpenAI y Ollama
-active_config = get_config()
+# Configuración y herramientas externas: se crean en el primer uso para que
+# importar el módulo no haga peticiones de red ni abra el flujo de OAuth
+_active_config = None
+_tools = {}
+_tools_lock = threading.Lock()
+
+def get_active_config():
+    """
+    Devuelve la configuración dinámica (OpenAI u Ollama), resolviéndola la primera vez.
+   
+    Returns:
+        list: La lista de configuración del modelo.
+    """
+    global _active_config
+    if _active_config is None:
+        with _tools_lock:
+            if _active_config is None:
+                _active_config = get_config()
+    return _active_config
+
+def _get_tool(name, factory):
+    """
+    Devuelve la instancia compartida de una herramienta, creándola en el primer uso.
+   
+    Args:
+        name (str): El nombre de la herramienta.
+        factory (callable): La clase o función que crea la herramienta.
+   
+    Returns:
+        object: La instancia de la herramienta.
+    """
+    tool = _tools.get(name)
+    if tool is None:
+        with _tools_lock:
+            tool = _tools.get(name)
+            if tool is None:
+                tool = factory()
+                _tools[name] = tool
+    return tool
+
+def get_search_tool():
+    """Devuelve la instancia compartida de MusicSearchTool."""
+    return _get_tool("search", MusicSearchTool)
+
+def get_youtube_tool():
+    """Devuelve la instancia compartida de YouTubeTool."""
+    return _get_tool("youtube", YouTubeTool)
+
+def get_spotify_tool():
+    """Devuelve la instancia compartida de SpotifyTool."""
+    return _get_tool("spotify", SpotifyTool)
+
+def get_notification_tool():
+    """Devuelve la instancia compartida de NotificationTool."""
+    return _get_tool("notification", NotificationTool)
 
-# Configuración de agentes con herramientas externas
-search_tool = MusicSearchTool()
-youtube_tool = YouTubeTool()
-spotify_tool = SpotifyTool()
-notification_tool = NotificationTool()
+_LAZY_ATTRIBUTES = {
+    "active_config": get_active_config,
+    "search_tool": get_search_tool,
+    "youtube_tool": get_youtube_tool,
+    "spotify_tool": get_spotify_tool,
+    "notification_tool": get_notification_tool,
+}
+
+def __getattr__(name):
+    # Compatibilidad con el acceso a main.search_tool, main.active_config, etc.
+    if name in _LAZY_ATTRIBUTES:
+        return _LAZY_ATTRIBUTES[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _generate_email_body(body_prompt, on_body_token=None):
+    """
+    Genera el cuerpo del correo, en streaming si se indica on_body_token.
+   
+    Args:
+        body_prompt (str): La consulta para el cuerpo del correo.
+        on_body_token (callable): Recibe cada fragmento a medida que llega (opcional).
+   
+    Returns:
+        str: El cuerpo del correo.
+    """
+    if not on_body_token:
+        return ask_ollama(body_prompt).strip()
 
+    # Limitar la generación para que no se desboque en CPU
+    max_tokens = int(os.getenv("OLLAMA_EMAIL_MAX_TOKENS", 512))
+    body_parts = []
+    for token in ask_ollama_stream(body_prompt, max_tokens=max_tokens):
+        on_body_token(token)
+        body_parts.append(token)
+    return "".join(body_parts).strip()
 
-def generate_email_content(query, youtube_result, spotify_result, songs):
+def generate_email_content(query, youtube_result, spotify_result, songs, on_body_token=None):
     """
     Genera el contenido del correo electrónico usando el modelo Gemma 2B.
+    El asunto y el cuerpo se generan a la vez; el cliente Ollama compartido
+    limita las generaciones simultáneas de todos los hilos (OLLAMA_NUM_PARALLEL).
    
     Args:
         query (str): El término de búsqueda (artista, género, etc.).
         youtube_result (dict): Los resultados de YouTube.
         spotify_result (dict): Los resultados de Spotify.
         songs (list): La lista de canciones.
+        on_body_token (callable): Si se indica, el cuerpo se genera en streaming
+            y se llama con cada fragmento a medida que llega (opcional).
    
     Returns:
         dict: Un diccionario con el asunto y el cuerpo del correo.
     """
     # Generar el asunto del correo (más corto e impactante)
     subject_prompt = f"Generate a short and impactful email subject for a playlist about {query}. Max 10 words."
-    subject = ask_ollama(subject_prompt).strip()
     
     # Generar el cuerpo del correo
     body_prompt = f"""
@@ -603,14 +1332,20 @@ def generate_email_content(query, youtube_result, spotify_result, songs):
     3. Los enlaces a YouTube y Spotify.
     4. Una descripción amigable de las canciones.
     """
-    body = ask_ollama(body_prompt).strip()
+
+    # Con OLLAMA_NUM_PARALLEL=1 el cliente ejecuta las dos generaciones una detrás de otra
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        subject_future = executor.submit(ask_ollama, subject_prompt)
+        body_future = executor.submit(_generate_email_body, body_prompt, on_body_token)
+        subject = subject_future.result().strip()
+        body = body_future.result()
     
     return {
         "subject": subject,
         "body": body
     }
 
-def create_music_recommendation(query, email=None, num_songs=20):
+def create_music_recommendation(query, email=None, num_songs=20, on_email_token=None):
     """
     Flujo completo para crear y compartir listas de reproducción.
    
@@ -618,28 +1353,58 @@ def create_music_recommendation(query, email=None, num_songs=20):
         query (str): El término de búsqueda (artista, género, etc.).
         email (str): El correo electrónico para enviar los resultados.
         num_songs (int): El número de canciones a incluir en la playlist (por defecto: 20).
+        on_email_token (callable): Recibe los fragmentos del cuerpo del correo
+            a medida que se generan (opcional).
    
     Returns:
-        dict: Resultado con las URLs de las listas y mensajes de estado.
+        dict: Resultado con las URLs de las listas, mensajes de estado y la
+            duración en segundos de cada etapa ("timings").
     """
+    # Precargar el modelo mientras se crean las listas, para que la
+    # generación del correo no pague el tiempo de carga (solo si no sigue cargado)
+    if email:
+        get_ollama_client(OLLAMA_BASE_URL).warm_up(DEFAULT_MODEL)
+
+    # Duración de cada etapa en segundos, medida con spans de métricas
+    metrics = get_metrics()
+    timings = {}
+
     # Paso 1: Buscar y analizar listas de reproducción
-    songs = search_tool.search_playlists(query, num_songs)
+    with metrics.span("autogen_stage_duration_seconds", stage="search") as span:
+        songs = get_search_tool().search_playlists(query, num_songs)
+    timings["search"] = span.duration
     
     # Paso 2: Crear listas de reproducción en plataformas
     playlist_title = f"Playlist Recomendada: {query}"
     playlist_description = f"Lista de reproducción generada automáticamente para '{query}'"
     
-    youtube_result = youtube_tool.create_playlist(playlist_title, playlist_description, songs)
-    spotify_result = spotify_tool.create_playlist(playlist_title, playlist_description, songs)
+    with metrics.span("autogen_stage_duration_seconds", stage="youtube") as span:
+        youtube_result = get_youtube_tool().create_playlist(playlist_title, playlist_description, songs)
+    timings["youtube"] = span.duration
+
+    with metrics.span("autogen_stage_duration_seconds", stage="spotify") as span:
+        spotify_result = get_spotify_tool().create_playlist(playlist_title, playlist_description, songs)
+    timings["spotify"] = span.duration
     
     # Paso 3: Enviar notificaciones si se proporcionó un correo
     if email:
-        email_content = generate_email_content(query, youtube_result, spotify_result, songs)
-        notification_tool.send_email(
-            to_email=email,
-            subject=email_content["subject"],
-            body=email_content["body"]
-        )
+        if on_email_token:
+            print("\n✍️ Redactando el correo electrónico...\n")
+        with metrics.span("autogen_stage_duration_seconds", stage="email_generation") as span:
+            email_content = generate_email_content(
+                query, youtube_result, spotify_result, songs, on_body_token=on_email_token
+            )
+        timings["email_generation"] = span.duration
+
+        with metrics.span("autogen_stage_duration_seconds", stage="email_send") as span:
+            email_sent = get_notification_tool().send_email(
+                to_email=email,
+                subject=email_content["subject"],
+                body=email_content["body"]
+            )
+            if not email_sent:
+                span.labels["outcome"] = "error"
+        timings["email_send"] = span.duration
         print("📬 Correo electrónico enviado correctamente.")
     
     return {
@@ -647,7 +1412,8 @@ def create_music_recommendation(query, email=None, num_songs=20):
         "songs": songs,
         "youtube_result": youtube_result,
         "spotify_result": spotify_result,
-        "email_sent": bool(email)
+        "email_sent": bool(email),
+        "timings": timings
     }
 
 def validate_email(email):
@@ -669,6 +1435,10 @@ def main():
     """
     print("🎵 Bienvenido al Generador de Listas de Reproducción 🎵")
     print("-----------------------------------------------------")
+
+    # Descargar el modelo local en segundo plano mientras el usuario responde
+    if not os.environ.get("OPENAI_API_KEY"):
+        ensure_ollama_model()
     
     # Solicitar el término de búsqueda
     query = input("¿Qué grupo o tipo de música te gustaría buscar? (por ejemplo, 'Rock Clásico', 'AC/DC'): ").strip()
@@ -691,7 +1461,9 @@ def main():
     
     print("\n🔍 Buscando canciones y creando listas de reproducción...")
     try:
-        result = create_music_recommendation(query, email, num_songs)
+        result = create_music_recommendation(
+            query, email, num_songs, on_email_token=lambda token: print(token, end="", flush=True)
+        )
         if result is None:
             print("\n❌ No se pudo crear la lista de reproducción. No se encontraron suficientes canciones.")
             return
@@ -704,9 +1476,27 @@ def main():
         print(f"🎧 Escucha la lista en Spotify: {result['spotify_result']['playlist_url']}")
         if result["email_sent"]:
             print("\n📬 Se ha enviado una notificación con los detalles.")
+            ollama_client = get_ollama_client(OLLAMA_BASE_URL)
+            ollama_stats = ollama_client.stats()
+            print(
+                f"🧠 Ollama: {ollama_stats['calls']} llamadas, {ollama_stats['cold_loads']} cargas en frío, "
+                f"carga {ollama_stats['load_seconds']:.2f}s, evaluación {ollama_stats['eval_seconds']:.2f}s"
+            )
+            stream_metrics = ollama_client.last_stream_metrics
+            if stream_metrics and stream_metrics["ttft_seconds"] is not None:
+                print(
+                    f"⚡ Primer token en {stream_metrics['ttft_seconds']:.2f}s, "
+                    f"{stream_metrics['tokens_per_second']:.1f} tokens/s"
+                )
     except Exception as e:
         print(f"❌ Ocurrió un error: {e}")
         print("Por favor, verifica tu conexión a internet o las credenciales de las APIs.")
+    finally:
+        # Exportar las métricas (.prom para Prometheus, JSON en otro caso)
+        metrics_path = os.getenv("METRICS_EXPORT_PATH")
+        if metrics_path:
+            get_metrics().write(metrics_path)
+            print(f"📈 Métricas guardadas en {metrics_path}")
 
 # Ejecutar el programa principal
 if __name__ == "__main__":
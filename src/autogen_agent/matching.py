@@ -0,0 +1,136 @@
+import threading
+
+
+# Prioridad de los nodos que no terminan ninguna clave
+_NO_MATCH = float("inf")
+
+# Desplazamiento que combina nodo y carácter en una sola clave entera
+# (los puntos de código de Unicode ocupan como máximo 21 bits)
+_CHAR_BITS = 21
+
+class KeywordMatcher:
+    def __init__(self, keys=()):
+        """
+        Construye un autómata de Aho–Corasick sobre un conjunto de claves para
+        encontrar cuáles aparecen dentro de un texto en una sola pasada, con
+        un coste proporcional a la longitud del texto y no al número de claves.
+
+        Las claves conservan su orden: find devuelve la misma clave que
+        recorrer la lista y quedarse con la primera que cumpla `clave in texto`.
+
+        Args:
+            keys (iterable): Las claves, de mayor a menor prioridad.
+        """
+        self.keys = []
+        self._always = _NO_MATCH
+        # Transiciones de todos los nodos en un único diccionario: (nodo << 21 | carácter) -> hijo
+        self._goto = {}
+        self._fail = [0]
+        # Menor prioridad entre las claves que terminan en cada nodo o en sus sufijos
+        self._best = [_NO_MATCH]
+        children = [[]]
+
+        for key in keys:
+            priority = len(self.keys)
+            self.keys.append(key)
+            if not key:
+                # La cadena vacía está contenida en cualquier texto
+                self._always = min(self._always, priority)
+                continue
+            node = 0
+            for char in key:
+                edge = (node << _CHAR_BITS) | ord(char)
+                child = self._goto.get(edge)
+                if child is None:
+                    child = len(self._fail)
+                    self._goto[edge] = child
+                    self._fail.append(0)
+                    self._best.append(_NO_MATCH)
+                    children.append([])
+                    children[node].append((ord(char), child))
+                node = child
+            if priority < self._best[node]:
+                self._best[node] = priority
+
+        # Enlaces de fallo por niveles (BFS): el sufijo propio más largo que también es prefijo
+        queue = [child for _, child in children[0]]
+        for node in queue:
+            for code, child in children[node]:
+                fallback = self._fail[node]
+                while True:
+                    target = self._goto.get((fallback << _CHAR_BITS) | code)
+                    if target is not None or fallback == 0:
+                        break
+                    fallback = self._fail[fallback]
+                self._fail[child] = target if target is not None else 0
+                if self._best[self._fail[child]] < self._best[child]:
+                    self._best[child] = self._best[self._fail[child]]
+                queue.append(child)
+
+    def _scan(self, text, stop_at=None):
+        """
+        Recorre el texto y devuelve la menor prioridad encontrada.
+        """
+        goto = self._goto
+        fail = self._fail
+        best = self._best
+        result = self._always
+        node = 0
+        for char in text:
+            code = ord(char)
+            while True:
+                child = goto.get((node << _CHAR_BITS) | code)
+                if child is not None:
+                    node = child
+                    break
+                if node == 0:
+                    break
+                node = fail[node]
+            if best[node] < result:
+                result = best[node]
+                if result == stop_at:
+                    break
+        return result
+
+    def find(self, text):
+        """
+        Busca la clave de mayor prioridad contenida en el texto.
+
+        Args:
+            text (str): El texto donde buscar.
+
+        Returns:
+            str: La primera clave (en el orden original) contenida en el texto, o None.
+        """
+        priority = self._scan(text, stop_at=0)
+        return self.keys[priority] if priority != _NO_MATCH else None
+
+    def __len__(self):
+        return len(self.keys)
+
+class LazyKeywordMatcher:
+    def __init__(self, keys_factory):
+        """
+        Construye un KeywordMatcher la primera vez que se usa, una sola vez
+        aunque lo usen varios hilos a la vez.
+
+        Args:
+            keys_factory (callable): Devuelve las claves, de mayor a menor prioridad.
+        """
+        self._keys_factory = keys_factory
+        self._matcher = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        """
+        Returns:
+            KeywordMatcher: El autómata, construido si es necesario.
+        """
+        if self._matcher is None:
+            with self._lock:
+                if self._matcher is None:
+                    self._matcher = KeywordMatcher(self._keys_factory())
+        return self._matcher
+
+    def find(self, text):
+        return self.get().find(text)
@@ -0,0 +1,232 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+
+# Límites superiores (en segundos) de los intervalos de los histogramas
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Descripción de las métricas que registra la aplicación
+METRIC_HELP = {
+    "autogen_stage_duration_seconds": "Duración de cada etapa de create_music_recommendation.",
+    "autogen_api_request_duration_seconds": "Duración de cada petición a un servicio externo.",
+    "autogen_llm_ttft_seconds": "Tiempo hasta el primer token de las respuestas en streaming de Ollama.",
+    "autogen_api_throttled_total": "Respuestas de límite de peticiones superado.",
+    "autogen_cache_requests_total": "Consultas a las cachés, por resultado (hit o miss).",
+    "autogen_fallbacks_total": "Veces que se usó un resultado alternativo o una fuente de respaldo.",
+}
+
+def _format_labels(labels, extra=None):
+    """
+    Formatea las etiquetas de una métrica en el formato de Prometheus.
+
+    Args:
+        labels (tuple): Pares (nombre, valor) ordenados.
+        extra (tuple): Un par adicional, como ("le", "0.5") (opcional).
+
+    Returns:
+        str: Las etiquetas entre llaves, o una cadena vacía si no hay ninguna.
+    """
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape_label(value)}"' for name, value in pairs) + "}"
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_bound(bound):
+    return "+Inf" if bound == float("inf") else repr(float(bound))
+
+class Span:
+    def __init__(self, name, labels):
+        """
+        Intervalo de tiempo medido alrededor de una etapa o una petición.
+
+        Args:
+            name (str): La métrica de histograma donde se registra la duración.
+            labels (dict): Las etiquetas de la medición.
+        """
+        self.name = name
+        self.labels = labels
+        self.start = time.perf_counter()
+        self.duration = None
+        self.error = None
+
+class MetricsRegistry:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        """
+        Inicializa un registro de métricas en memoria, seguro entre hilos.
+
+        Args:
+            buckets (tuple): Límites superiores de los intervalos de los histogramas.
+        """
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def increment(self, name, value=1, **labels):
+        """
+        Incrementa un contador.
+
+        Args:
+            name (str): El nombre del contador (terminado en _total).
+            value (float): La cantidad a sumar.
+            **labels: Las etiquetas del contador.
+        """
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        """
+        Registra una observación en un histograma.
+
+        Args:
+            name (str): El nombre del histograma.
+            value (float): El valor observado (normalmente, segundos).
+            **labels: Las etiquetas del histograma.
+        """
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+                self._histograms[key] = histogram
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    histogram["counts"][index] += 1
+                    break
+            histogram["sum"] += value
+            histogram["count"] += 1
+
+    @contextmanager
+    def span(self, name, **labels):
+        """
+        Mide la duración de un bloque y la registra en un histograma con la
+        etiqueta outcome ("ok", o "error" si el bloque lanza una excepción).
+        El bloque puede fijar otro resultado en span.labels["outcome"].
+
+        Args:
+            name (str): El nombre del histograma.
+            **labels: Las etiquetas de la medición.
+
+        Yields:
+            Span: El intervalo; su atributo duration está disponible al salir.
+        """
+        span = Span(name, dict(labels))
+        try:
+            yield span
+        except BaseException as e:
+            span.error = e
+            raise
+        finally:
+            span.duration = time.perf_counter() - span.start
+            span.labels.setdefault("outcome", "error" if span.error is not None else "ok")
+            self.observe(name, span.duration, **span.labels)
+
+    def snapshot(self):
+        """
+        Devuelve una copia de todas las métricas, lista para serializar en JSON.
+
+        Returns:
+            dict: Los contadores y los histogramas con sus intervalos acumulados.
+        """
+        with self._lock:
+            counters = [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(self._counters.items())
+            ]
+            histograms = []
+            for (name, labels), histogram in sorted(self._histograms.items()):
+                cumulative = 0
+                buckets = {}
+                for bound, count in zip(self.buckets, histogram["counts"]):
+                    cumulative += count
+                    buckets[_format_bound(bound)] = cumulative
+                histograms.append({
+                    "name": name,
+                    "labels": dict(labels),
+                    "count": histogram["count"],
+                    "sum": histogram["sum"],
+                    "buckets": buckets
+                })
+        return {"counters": counters, "histograms": histograms}
+
+    def to_json(self):
+        """
+        Exporta las métricas en JSON.
+
+        Returns:
+            str: El documento JSON.
+        """
+        return json.dumps(self.snapshot(), indent=2, ensure_ascii=False)
+
+    def to_prometheus(self):
+        """
+        Exporta las métricas en el formato de texto de Prometheus.
+
+        Returns:
+            str: Las métricas, una por línea.
+        """
+        snapshot = self.snapshot()
+        lines = []
+        described = set()
+
+        def describe(name, kind):
+            if name in described:
+                return
+            described.add(name)
+            if name in METRIC_HELP:
+                lines.append(f"# HELP {name} {METRIC_HELP[name]}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        for counter in snapshot["counters"]:
+            describe(counter["name"], "counter")
+            labels = tuple(sorted(counter["labels"].items()))
+            lines.append(f"{counter['name']}{_format_labels(labels)} {counter['value']}")
+
+        for histogram in snapshot["histograms"]:
+            name = histogram["name"]
+            describe(name, "histogram")
+            labels = tuple(sorted(histogram["labels"].items()))
+            for bound, count in histogram["buckets"].items():
+                lines.append(f"{name}_bucket{_format_labels(labels, ('le', bound))} {count}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {histogram['sum']}")
+            lines.append(f"{name}_count{_format_labels(labels)} {histogram['count']}")
+
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        """
+        Guarda las métricas en un fichero: en formato Prometheus si termina
+        en .prom (para el textfile collector de node_exporter) y en JSON si no.
+
+        Args:
+            path (str): La ruta del fichero.
+        """
+        content = self.to_prometheus() if path.endswith(".prom") else self.to_json()
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+
+    def reset(self):
+        """
+        Elimina todas las métricas registradas.
+        """
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+# Registro compartido por toda la aplicación
+REGISTRY = MetricsRegistry()
+
+def get_metrics():
+    """
+    Devuelve el registro de métricas compartido.
+
+    Returns:
+        MetricsRegistry: El registro.
+    """
+    return REGISTRY
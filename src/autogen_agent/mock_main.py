@@ -2,7 +2,14 @@ import requests
 import json
 import time
 import random
+import itertools
+import math
 import os
+import threading
+from autogen_agent.ollama_client import OllamaError, get_ollama_client
+from autogen_agent.catalog import get_catalog
+from autogen_agent.matching import KeywordMatcher, LazyKeywordMatcher
+from autogen_agent.ranking import aggregate_rankings
 
 # Configuración para usar Ollama directamente
 OLLAMA_BASE_URL = "http://localhost:11434/api"
@@ -31,43 +38,185 @@ def install_ollama_model(model_name):
         print(f"❌ Error de conexión al intentar descargar: {e}")
         return False
 
-def ask_ollama(prompt, model=DEFAULT_MODEL):
+def ask_ollama(prompt, model=DEFAULT_MODEL, use_cache=True):
     """
     Realiza una consulta al servidor Ollama local
     
     Args:
         prompt: El texto de la consulta
         model: El modelo a utilizar
+        use_cache: Si es False, no se reutilizan respuestas anteriores
         
     Returns:
         str: La respuesta del modelo
     """
-    url = f"{OLLAMA_BASE_URL}/generate"
-    
-    headers = {
-        "Content-Type": "application/json"
-    }
-    
-    data = {
-        "model": model,
-        "prompt": prompt,
-        "stream": False
-    }
-    
     try:
-        response = requests.post(url, headers=headers, json=data)
-        if response.status_code == 200:
-            return response.json().get("response", "")
-        else:
-            print(f"Error al consultar Ollama: {response.status_code}")
-            print(response.text)
-            return "Error al consultar el modelo"
+        result = get_ollama_client(OLLAMA_BASE_URL).generate(prompt, model, use_cache=use_cache)
+        return result.get("response", "")
+    except OllamaError as e:
+        print(f"Error al consultar Ollama: {e.status_code}")
+        print(e.text)
+        return "Error al consultar el modelo"
     except Exception as e:
         print(f"Excepción al llamar a Ollama: {e}")
         return "Error de conexión con Ollama"
 
+# Modelo de latencia de las herramientas simuladas
+class LatencyModel:
+    def __init__(self, latency, jitter=0.0, scale=1.0, seed=None, sleep=time.sleep):
+        """
+        Inicializa el modelo de latencia de una herramienta simulada
+        
+        Args:
+            latency: Mediana de la latencia en segundos
+            jitter: Desviación de la distribución log-normal (0 = latencia fija)
+            scale: Factor que multiplica todas las latencias (0 = sin esperas)
+            seed: Semilla del generador aleatorio (opcional)
+            sleep: Función de espera (se puede sustituir en las pruebas)
+        """
+        self.latency = latency * scale
+        self.jitter = jitter
+        self.sleep = sleep
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+    
+    def sample(self):
+        """Devuelve una latencia aleatoria en segundos"""
+        if self.latency <= 0:
+            return 0.0
+        if not self.jitter:
+            return self.latency
+        with self._lock:
+            return self._rng.lognormvariate(math.log(self.latency), self.jitter)
+    
+    def wait(self):
+        """Espera una latencia aleatoria y devuelve los segundos esperados"""
+        delay = self.sample()
+        if delay > 0:
+            self.sleep(delay)
+        return delay
+
+def latency_from_env(tool, default):
+    """
+    Crea el modelo de latencia de una herramienta simulada a partir de
+    MOCK_<HERRAMIENTA>_LATENCY, MOCK_LATENCY_JITTER y MOCK_LATENCY_SCALE
+    
+    Args:
+        tool: Nombre de la herramienta (search o playlist)
+        default: Latencia por defecto en segundos
+        
+    Returns:
+        LatencyModel: El modelo de latencia
+    """
+    return LatencyModel(
+        latency=float(os.getenv(f"MOCK_{tool.upper()}_LATENCY", default)),
+        jitter=float(os.getenv("MOCK_LATENCY_JITTER", 0)),
+        scale=float(os.getenv("MOCK_LATENCY_SCALE", 1))
+    )
+
+# Datos de ejemplo por artista/género; se construyen una sola vez al cargar el módulo
+# y se comparten entre consultas, por lo que no deben modificarse
+MOCK_DATABASE = {
+    "ac/dc": {
+        "playlists": [
+            {
+                "title": "AC/DC Greatest Hits",
+                "songs": ["Back in Black", "Highway to Hell", "Thunderstruck", 
+                         "You Shook Me All Night Long", "Hells Bells", "TNT", 
+                         "Dirty Deeds Done Dirt Cheap", "Shoot to Thrill"]
+            },
+            {
+                "title": "Lo Mejor de AC/DC",
+                "songs": ["Back in Black", "Highway to Hell", "TNT", 
+                         "Thunderstruck", "Shoot to Thrill", "Hells Bells",
+                         "Rock N Roll Train", "Whole Lotta Rosie"]
+            },
+            {
+                "title": "AC/DC Rock Classics",
+                "songs": ["Back in Black", "Highway to Hell", "Thunderstruck", 
+                         "Shoot to Thrill", "T.N.T", "Hell Ain't a Bad Place to Be",
+                         "If You Want Blood (You've Got It)", "Rock and Roll Ain't Noise Pollution"]
+            }
+        ]
+    },
+    "rock 80s": {
+        "playlists": [
+            {
+                "title": "80s Rock Classics",
+                "songs": ["Sweet Child O' Mine - Guns N' Roses", "Livin' on a Prayer - Bon Jovi", 
+                         "Pour Some Sugar on Me - Def Leppard", "The Final Countdown - Europe",
+                         "Eye of the Tiger - Survivor", "Jump - Van Halen", 
+                         "Every Breath You Take - The Police", "Should I Stay or Should I Go - The Clash"]
+            },
+            {
+                "title": "80s Rock Anthems",
+                "songs": ["Sweet Child O' Mine - Guns N' Roses", "Welcome to the Jungle - Guns N' Roses",
+                         "Livin' on a Prayer - Bon Jovi", "You Give Love a Bad Name - Bon Jovi",
+                         "Pour Some Sugar on Me - Def Leppard", "Jump - Van Halen",
+                         "We're Not Gonna Take It - Twisted Sister", "Here I Go Again - Whitesnake"]
+            },
+            {
+                "title": "Rock de los 80",
+                "songs": ["Sweet Child O' Mine - Guns N' Roses", "November Rain - Guns N' Roses",
+                         "Livin' on a Prayer - Bon Jovi", "The Final Countdown - Europe",
+                         "Here I Go Again - Whitesnake", "Still Loving You - Scorpions",
+                         "Jump - Van Halen", "Rock You Like a Hurricane - Scorpions"]
+            }
+        ]
+    },
+    "metal": {
+        "playlists": [
+            {
+                "title": "Metal Classics",
+                "songs": ["Master of Puppets - Metallica", "Paranoid - Black Sabbath",
+                         "Run to the Hills - Iron Maiden", "Breaking the Law - Judas Priest",
+                         "Crazy Train - Ozzy Osbourne", "Enter Sandman - Metallica",
+                         "The Trooper - Iron Maiden", "Symphony of Destruction - Megadeth"]
+            }
+        ]
+    },
+    "pop": {
+        "playlists": [
+            {
+                "title": "Pop Hits",
+                "songs": ["Billie Jean - Michael Jackson", "Like a Prayer - Madonna",
+                         "Shape of You - Ed Sheeran", "Bad Guy - Billie Eilish",
+                         "Uptown Funk - Mark Ronson ft. Bruno Mars", "Blinding Lights - The Weeknd",
+                         "Dance Monkey - Tones and I", "Rolling in the Deep - Adele"]
+            }
+        ]
+    }
+}
+
+# Índice de las claves de ejemplo, en el orden de MOCK_DATABASE
+MOCK_MATCHER = KeywordMatcher(MOCK_DATABASE)
+
 # Clase para simular búsqueda en internet
 class MockInternetSearchTool:
+    def __init__(self, catalog=None, latency=None, index_artists=None):
+        """
+        Inicializa la búsqueda simulada
+        
+        Args:
+            catalog: Catálogo sintético en el que buscar artistas
+                (por defecto: el de MOCK_CATALOG_PATH, si se ha configurado)
+            latency: Modelo de latencia (por defecto: 0.5 segundos)
+            index_artists: Artistas más populares del catálogo que se buscan
+                dentro de la consulta (por defecto: MOCK_INDEX_ARTISTS o 100000)
+        """
+        self.catalog = catalog if catalog is not None else get_catalog()
+        self.latency = latency if latency is not None else latency_from_env("search", 0.5)
+        if self.catalog is None:
+            self.matcher = MOCK_MATCHER
+        else:
+            if index_artists is None:
+                index_artists = int(os.getenv("MOCK_INDEX_ARTISTS", 100000))
+            # El índice con los nombres del catálogo se construye en la primera búsqueda
+            self.matcher = LazyKeywordMatcher(lambda: itertools.chain(
+                MOCK_DATABASE,
+                (name.lower() for name in itertools.islice(self.catalog.artist_names(), index_artists))
+            ))
+    
     def search_playlists(self, query):
         """Simula la búsqueda de listas de reproducción sin necesidad de API"""
         print(f"Buscando listas de reproducción para: {query}")
@@ -76,97 +225,39 @@ class MockInternetSearchTool:
         mock_data = self._get_mock_data(query)
         
         # Simulamos un pequeño retraso para hacerlo más realista
-        time.sleep(0.5)
+        self.latency.wait()
         
         return mock_data
     
     def _get_mock_data(self, query):
         """Proporciona datos de ejemplo basados en la consulta"""
-        query = query.lower()
+        # Los artistas del catálogo sintético tienen prioridad sobre los ejemplos fijos
+        if self.catalog is not None:
+            catalog_data = self.catalog.search(query)
+            if catalog_data:
+                return catalog_data
         
-        # Diccionario de datos de ejemplo por artista/género
-        mock_database = {
-            "ac/dc": {
-                "playlists": [
-                    {
-                        "title": "AC/DC Greatest Hits",
-                        "songs": ["Back in Black", "Highway to Hell", "Thunderstruck", 
-                                 "You Shook Me All Night Long", "Hells Bells", "TNT", 
-                                 "Dirty Deeds Done Dirt Cheap", "Shoot to Thrill"]
-                    },
-                    {
-                        "title": "Lo Mejor de AC/DC",
-                        "songs": ["Back in Black", "Highway to Hell", "TNT", 
-                                 "Thunderstruck", "Shoot to Thrill", "Hells Bells",
-                                 "Rock N Roll Train", "Whole Lotta Rosie"]
-                    },
-                    {
-                        "title": "AC/DC Rock Classics",
-                        "songs": ["Back in Black", "Highway to Hell", "Thunderstruck", 
-                                 "Shoot to Thrill", "T.N.T", "Hell Ain't a Bad Place to Be",
-                                 "If You Want Blood (You've Got It)", "Rock and Roll Ain't Noise Pollution"]
-                    }
-                ]
-            },
-            "rock 80s": {
-                "playlists": [
-                    {
-                        "title": "80s Rock Classics",
-                        "songs": ["Sweet Child O' Mine - Guns N' Roses", "Livin' on a Prayer - Bon Jovi", 
-                                 "Pour Some Sugar on Me - Def Leppard", "The Final Countdown - Europe",
-                                 "Eye of the Tiger - Survivor", "Jump - Van Halen", 
-                                 "Every Breath You Take - The Police", "Should I Stay or Should I Go - The Clash"]
-                    },
-                    {
-                        "title": "80s Rock Anthems",
-                        "songs": ["Sweet Child O' Mine - Guns N' Roses", "Welcome to the Jungle - Guns N' Roses",
-                                 "Livin' on a Prayer - Bon Jovi", "You Give Love a Bad Name - Bon Jovi",
-                                 "Pour Some Sugar on Me - Def Leppard", "Jump - Van Halen",
-                                 "We're Not Gonna Take It - Twisted Sister", "Here I Go Again - Whitesnake"]
-                    },
-                    {
-                        "title": "Rock de los 80",
-                        "songs": ["Sweet Child O' Mine - Guns N' Roses", "November Rain - Guns N' Roses",
-                                 "Livin' on a Prayer - Bon Jovi", "The Final Countdown - Europe",
-                                 "Here I Go Again - Whitesnake", "Still Loving You - Scorpions",
-                                 "Jump - Van Halen", "Rock You Like a Hurricane - Scorpions"]
-                    }
-                ]
-            },
-            "metal": {
-                "playlists": [
-                    {
-                        "title": "Metal Classics",
-                        "songs": ["Master of Puppets - Metallica", "Paranoid - Black Sabbath",
-                                 "Run to the Hills - Iron Maiden", "Breaking the Law - Judas Priest",
-                                 "Crazy Train - Ozzy Osbourne", "Enter Sandman - Metallica",
-                                 "The Trooper - Iron Maiden", "Symphony of Destruction - Megadeth"]
-                    }
-                ]
-            },
-            "pop": {
-                "playlists": [
-                    {
-                        "title": "Pop Hits",
-                        "songs": ["Billie Jean - Michael Jackson", "Like a Prayer - Madonna",
-                                 "Shape of You - Ed Sheeran", "Bad Guy - Billie Eilish",
-                                 "Uptown Funk - Mark Ronson ft. Bruno Mars", "Blinding Lights - The Weeknd",
-                                 "Dance Monkey - Tones and I", "Rolling in the Deep - Adele"]
-                    }
-                ]
-            }
-        }
+        query = query.lower()
         
-        # Buscar coincidencias parciales
-        for key, data in mock_database.items():
-            if key in query:
-                return data
+        # Buscar coincidencias parciales: la primera clave contenida en la consulta
+        key = self.matcher.find(query)
+        if key in MOCK_DATABASE:
+            return MOCK_DATABASE[key]
+        if key is not None:
+            return {"playlists": self.catalog.get_playlists(self.catalog.artist_id(key))}
         
         # Si no hay coincidencia específica, devolver pop como predeterminado
-        return mock_database["pop"]
+        return MOCK_DATABASE["pop"]
 
 # Clase para simular la creación de listas de reproducción en YouTube
 class MockYouTubeTool:
+    def __init__(self, latency=None):
+        """
+        Args:
+            latency: Modelo de latencia (por defecto: 1 segundo)
+        """
+        self.latency = latency if latency is not None else latency_from_env("playlist", 1.0)
+    
     def create_playlist(self, title, description, songs):
         """Simula la creación de una lista de reproducción en YouTube sin API real"""
         print(f"Creando lista de reproducción en YouTube: {title}")
@@ -180,7 +271,7 @@ class MockYouTubeTool:
         playlist_url = f"https://www.youtube.com/playlist?list={playlist_id}"
         
         # Simulamos un pequeño retraso para hacerlo más realista
-        time.sleep(1)
+        self.latency.wait()
         
         return {
             "playlist_id": playlist_id,
@@ -190,6 +281,13 @@ class MockYouTubeTool:
 
 # Clase para simular la creación de listas de reproducción en Spotify
 class MockSpotifyTool:
+    def __init__(self, latency=None):
+        """
+        Args:
+            latency: Modelo de latencia (por defecto: 1 segundo)
+        """
+        self.latency = latency if latency is not None else latency_from_env("playlist", 1.0)
+    
     def create_playlist(self, title, description, songs):
         """Simula la creación de una lista de reproducción en Spotify sin API real"""
         print(f"Creando lista de reproducción en Spotify: {title}")
@@ -203,7 +301,7 @@ class MockSpotifyTool:
         playlist_url = f"https://open.spotify.com/playlist/{playlist_id}"
         
         # Simulamos un pequeño retraso para hacerlo más realista
-        time.sleep(1)
+        self.latency.wait()
         
         return {
             "playlist_id": playlist_id,
@@ -231,24 +329,24 @@ class MockNotificationTool:
         return True
 
 # Función para obtener las canciones más populares
-def get_most_popular_songs(search_results, limit=10):
-    """Analiza los resultados de búsqueda y devuelve las canciones más populares"""
-    # Contar frecuencia de canciones
-    song_counts = {}
-    
-    # Iterar a través de las listas de reproducción
-    for playlist in search_results["playlists"]:
-        for song in playlist["songs"]:
-            if song in song_counts:
-                song_counts[song] += 1
-            else:
-                song_counts[song] = 1
-    
-    # Ordenar por popularidad (frecuencia de aparición)
-    top_songs = sorted(song_counts.items(), key=lambda x: x[1], reverse=True)[:limit]
-    
-    # Devolver solo los nombres de las canciones
-    return [song for song, count in top_songs]
+def get_most_popular_songs(search_results, limit=10, scoring="count"):
+    """
+    Analiza los resultados de búsqueda y devuelve las canciones más populares
+
+    Args:
+        search_results: Resultados con la clave "playlists" (cada una con sus "songs")
+        limit: Número máximo de canciones
+        scoring: "count" (frecuencia de aparición), "borda" o "reciprocal"
+            para premiar también la posición dentro de cada lista
+
+    Returns:
+        list: Las canciones, de la más a la menos popular
+    """
+    return aggregate_rankings(
+        (playlist["songs"] for playlist in search_results["playlists"]),
+        limit=limit,
+        scoring=scoring
+    )
 
 # Configuración de herramientas simuladas
 search_tool = MockInternetSearchTool()
@@ -515,6 +613,9 @@ if __name__ == "__main__":
     # Inicializar agentes si se usará LLM
     agents = {}
     if use_llm:
+        # Cargar el modelo en segundo plano mientras el usuario escribe la consulta
+        get_ollama_client(OLLAMA_BASE_URL).warm_up(current_model)
+
         # Crear los agentes con el modelo seleccionado
         agents = {
             "search": OllamaAgent(
@@ -591,4 +692,7 @@ if __name__ == "__main__":
     # Mostrar resultados de forma bonita
     print("\n=== RESULTADOS DE LA RECOMENDACIÓN ===")
     print(json.dumps({k: v for k, v in result.items() if k != 'agent_responses'}, indent=2))
-    print("=======================================")
\ No newline at end of file
+    print("=======================================")
+
+    if use_llm:
+        print(f"Métricas de Ollama: {get_ollama_client(OLLAMA_BASE_URL).stats()}")
\ No newline at end of file
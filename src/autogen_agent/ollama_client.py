@@ -0,0 +1,560 @@
+import json
+import os
+import re
+import threading
+import time
+import requests
+from autogen_agent.cache import TwoTierCache, content_key
+from autogen_agent.metrics import REGISTRY
+from autogen_agent.resilience import call_with_retries, get_circuit_breaker, get_retry_policy
+
+
+# Servidor Ollama local por defecto
+OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434/api")
+
+# Una carga de modelo por encima de este umbral se considera carga en frío
+COLD_LOAD_THRESHOLD_SECONDS = 0.5
+
+# La comprobación de disponibilidad usa /api/tags, que no carga ningún modelo
+PROBE_TIMEOUT_SECONDS = 2.0
+
+# Margen máximo antes de que venza keep_alive a partir del cual se vuelve a precargar el modelo
+WARM_UP_MARGIN_SECONDS = 60
+
+# Unidades de las duraciones de keep_alive ("30m", "1h30m", "45s")
+_DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+
+class OllamaError(Exception):
+    def __init__(self, status_code, text):
+        """
+        Error devuelto por el servidor Ollama.
+
+        Args:
+            status_code (int): El código de estado HTTP.
+            text (str): El cuerpo de la respuesta.
+        """
+        super().__init__(f"Ollama respondió {status_code}: {text}")
+        self.status_code = status_code
+        self.text = text
+
+def _parse_keep_alive(value):
+    """
+    Convierte el valor de keep_alive al formato que espera Ollama.
+
+    Args:
+        value (str): Duración ("30m", "1h") o número de segundos ("-1" = siempre).
+
+    Returns:
+        str | int: El valor listo para enviar.
+    """
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return value
+
+def keep_alive_seconds(value):
+    """
+    Calcula durante cuántos segundos permanece cargado un modelo con un keep_alive.
+
+    Args:
+        value (str | int): El keep_alive ("30m", "1h30m", segundos o negativo = siempre).
+
+    Returns:
+        float: Los segundos (infinito si el modelo no se descarga nunca).
+    """
+    try:
+        seconds = float(value)
+        return float("inf") if seconds < 0 else seconds
+    except (TypeError, ValueError):
+        pass
+    text = str(value).strip()
+    parts = _DURATION_PART.findall(text)
+    if not parts or "".join(number + unit for number, unit in parts) != text:
+        # Formato desconocido: se supone el valor por defecto de Ollama (5 minutos)
+        return 300.0
+    return sum(float(number) * _DURATION_UNITS[unit] for number, unit in parts)
+
+class OllamaClient:
+    def __init__(self, base_url=OLLAMA_BASE_URL, keep_alive=None, pool_size=None, timeout=None, cache=None,
+                 retry_policy=None, breaker=None, num_parallel=None):
+        """
+        Inicializa un cliente persistente para el servidor Ollama.
+
+        Args:
+            base_url (str): La URL base de la API de Ollama.
+            keep_alive (str): Tiempo que el modelo permanece cargado tras cada petición
+                (por defecto: OLLAMA_KEEP_ALIVE o "30m").
+            pool_size (int): Conexiones HTTP reutilizables (por defecto: OLLAMA_POOL_SIZE o 4).
+            timeout (float | tuple): Segundos máximos de espera por respuesta, o la
+                tupla (conexión, lectura) (por defecto: sin límite).
+            cache (TwoTierCache): Caché de respuestas por (modelo, prompt, opciones) (opcional).
+            retry_policy (RetryPolicy): Reintentos ante fallos transitorios
+                (por defecto: OLLAMA_MAX_RETRIES reintentos).
+            breaker (CircuitBreaker): Cortocircuito del servidor
+                (por defecto: el compartido para base_url).
+            num_parallel (int): Generaciones simultáneas como máximo entre todos los
+                hilos que comparten el cliente (por defecto: OLLAMA_NUM_PARALLEL o 2).
+        """
+        self.base_url = base_url
+        self.cache = cache
+        self.keep_alive = _parse_keep_alive(keep_alive or os.getenv("OLLAMA_KEEP_ALIVE", "30m"))
+        self.timeout = timeout
+        self.retry_policy = retry_policy or get_retry_policy("ollama")
+        self.breaker = breaker or get_circuit_breaker(f"ollama:{base_url}")
+        self.num_parallel = max(1, num_parallel or int(os.getenv("OLLAMA_NUM_PARALLEL", 2)))
+        # Las peticiones que superan el límite esperan aquí y no en la cola del servidor
+        self._slots = threading.BoundedSemaphore(self.num_parallel)
+
+        pool_size = pool_size or int(os.getenv("OLLAMA_POOL_SIZE", 4))
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self.probe_ttl = float(os.getenv("OLLAMA_PROBE_TTL", 30))
+        self._probe_result = None
+        self._pull_threads = {}
+        # Modelo -> instante (time.monotonic) hasta el que sigue cargado en el servidor
+        self._loaded_until = {}
+        self._warming = set()
+        self.last_metrics = None
+        self.last_stream_metrics = None
+        self._stats = {
+            "calls": 0,
+            "cold_loads": 0,
+            "load_seconds": 0.0,
+            "eval_seconds": 0.0,
+            "eval_tokens": 0
+        }
+        self._lock = threading.Lock()
+
+    def generate(self, prompt, model, options=None, use_cache=True):
+        """
+        Genera una respuesta completa (sin streaming) manteniendo el modelo cargado.
+        Si el cliente tiene caché, las consultas idénticas no vuelven a ejecutarse.
+
+        Args:
+            prompt (str): El texto de la consulta.
+            model (str): El modelo a utilizar.
+            options (dict): Opciones de generación de Ollama (opcional).
+            use_cache (bool): Si es False, se ignora la caché para esta llamada.
+
+        Returns:
+            dict: La respuesta JSON de Ollama, incluidas las métricas de duración.
+                Las respuestas servidas desde la caché incluyen "cached": True.
+
+        Raises:
+            OllamaError: Si el servidor responde con un código distinto de 200.
+            CircuitOpenError: Si el servidor ha fallado repetidamente y se omite temporalmente.
+        """
+        cache_key = None
+        if self.cache is not None and use_cache:
+            cache_key = content_key(model, prompt, options or {})
+            cached_response = self.cache.get(cache_key)
+            if cached_response is not None:
+                return {"model": model, "response": cached_response, "done": True, "cached": True}
+
+        data = {
+            "model": model,
+            "prompt": prompt,
+            "stream": False,
+            "keep_alive": self.keep_alive
+        }
+        if options:
+            data["options"] = options
+
+        with self._slots, REGISTRY.span(
+            "autogen_api_request_duration_seconds", service="ollama", operation="generate"
+        ):
+            response = call_with_retries(
+                self.session.post,
+                f"{self.base_url}/generate",
+                json=data,
+                timeout=self.timeout,
+                policy=self.retry_policy,
+                breaker=self.breaker
+            )
+            if response.status_code != 200:
+                raise OllamaError(response.status_code, response.text)
+
+        result = response.json()
+        self._record_metrics(model, result)
+        if cache_key is not None:
+            self.cache.set(cache_key, result.get("response", ""))
+        return result
+
+    def stream_generate(self, prompt, model, options=None, max_tokens=None, stop=None):
+        """
+        Genera una respuesta en modo streaming, devolviendo los tokens a medida
+        que Ollama los emite (NDJSON). La generación se corta en cuanto se alcanza
+        max_tokens o aparece una secuencia de parada; al cerrar la conexión
+        Ollama deja de generar. Al terminar, last_stream_metrics contiene el
+        tiempo hasta el primer token y los tokens por segundo.
+
+        Args:
+            prompt (str): El texto de la consulta.
+            model (str): El modelo a utilizar.
+            options (dict): Opciones de generación de Ollama (opcional).
+            max_tokens (int): Número máximo de tokens a generar (opcional).
+            stop (list): Secuencias que detienen la generación (opcional).
+
+        Yields:
+            str: Cada fragmento de texto generado.
+
+        Raises:
+            OllamaError: Si el servidor responde con un código distinto de 200.
+            CircuitOpenError: Si el servidor ha fallado repetidamente y se omite temporalmente.
+        """
+        options = dict(options or {})
+        if max_tokens:
+            options["num_predict"] = max_tokens
+        if stop:
+            options["stop"] = list(stop)
+        data = {
+            "model": model,
+            "prompt": prompt,
+            "stream": True,
+            "keep_alive": self.keep_alive
+        }
+        if options:
+            data["options"] = options
+
+        start = time.perf_counter()
+        first_token_at = None
+        tokens = 0
+        text = ""
+        stopped_early = False
+
+        # El streaming ocupa una de las generaciones simultáneas hasta que se cierra
+        self._slots.acquire()
+        try:
+            # Solo se reintenta el establecimiento de la respuesta, nunca a mitad del streaming
+            response = call_with_retries(
+                self.session.post,
+                f"{self.base_url}/generate",
+                json=data,
+                stream=True,
+                timeout=self.timeout,
+                policy=self.retry_policy,
+                breaker=self.breaker
+            )
+        except BaseException:
+            self._slots.release()
+            raise
+        try:
+            if response.status_code != 200:
+                raise OllamaError(response.status_code, response.text)
+
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                if chunk.get("done"):
+                    self._record_metrics(model, chunk)
+                    break
+
+                token = chunk.get("response", "")
+                if not token:
+                    continue
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+                tokens += 1
+
+                # Recortar en la secuencia de parada si el servidor no lo hizo
+                if stop:
+                    combined = text + token
+                    positions = [combined.find(sequence, max(0, len(text) - len(sequence))) for sequence in stop]
+                    positions = [position for position in positions if position != -1]
+                    if positions:
+                        token = combined[len(text):min(positions)] if min(positions) > len(text) else ""
+                        stopped_early = True
+                if token:
+                    text += token
+                    yield token
+                if stopped_early or (max_tokens and tokens >= max_tokens):
+                    stopped_early = True
+                    break
+        finally:
+            response.close()
+            self._slots.release()
+            elapsed = time.perf_counter() - start
+            generation_seconds = elapsed - (first_token_at - start) if first_token_at else 0.0
+            self.last_stream_metrics = {
+                "model": model,
+                "ttft_seconds": first_token_at - start if first_token_at else None,
+                "tokens": tokens,
+                "tokens_per_second": tokens / generation_seconds if generation_seconds else 0.0,
+                "total_seconds": elapsed,
+                "stopped_early": stopped_early
+            }
+            outcome = "ok" if response.status_code == 200 else "error"
+            if first_token_at:
+                # Aunque la generación se corte antes de "done", el modelo quedó cargado
+                self._mark_loaded(model)
+            REGISTRY.observe(
+                "autogen_api_request_duration_seconds", elapsed, service="ollama", operation="stream", outcome=outcome
+            )
+            if first_token_at:
+                REGISTRY.observe("autogen_llm_ttft_seconds", first_token_at - start, model=model)
+
+    def is_loaded(self, model):
+        """
+        Indica si el modelo sigue cargado en el servidor según keep_alive,
+        con un margen para que no se descargue mientras se usa.
+
+        Args:
+            model (str): El modelo.
+
+        Returns:
+            bool: True si el modelo se usó hace poco y no hace falta precargarlo.
+        """
+        seconds = keep_alive_seconds(self.keep_alive)
+        margin = min(WARM_UP_MARGIN_SECONDS, seconds / 10)
+        with self._lock:
+            loaded_until = self._loaded_until.get(model)
+        return loaded_until is not None and time.monotonic() < loaded_until - margin
+
+    def warm_up(self, model, background=True, force=False):
+        """
+        Carga el modelo en memoria sin generar texto, para que la siguiente
+        consulta no pague el tiempo de carga. Solo se envía la petición si el
+        modelo no se ha usado dentro de su keep_alive y no hay otra precarga en
+        curso; la petición ocupa una de las generaciones simultáneas
+        (OLLAMA_NUM_PARALLEL) y pasa por el cortocircuito del servidor.
+
+        Args:
+            model (str): El modelo a precargar.
+            background (bool): Si es True, la carga se hace en un hilo aparte.
+            force (bool): Si es True, precarga aunque el modelo parezca cargado.
+
+        Returns:
+            threading.Thread | None: El hilo de precarga si se ejecuta en segundo
+                plano, o None si no hacía falta precargar.
+        """
+        if not force and self.is_loaded(model):
+            return None
+        if keep_alive_seconds(self.keep_alive) == 0:
+            # Con keep_alive=0 el servidor descargaría el modelo nada más precargarlo
+            return None
+        with self._lock:
+            if model in self._warming:
+                return None
+            self._warming.add(model)
+
+        def ping():
+            try:
+                # Una petición sin prompt solo carga el modelo
+                with self._slots:
+                    response = call_with_retries(
+                        self.session.post,
+                        f"{self.base_url}/generate",
+                        json={"model": model, "keep_alive": self.keep_alive},
+                        timeout=self.timeout,
+                        policy=self.retry_policy,
+                        breaker=self.breaker
+                    )
+                if response.status_code == 200:
+                    self._record_metrics(model, response.json(), count_call=False)
+            except Exception as e:
+                print(f"⚠️ No se pudo precargar el modelo {model}: {e}")
+            finally:
+                with self._lock:
+                    self._warming.discard(model)
+
+        if not background:
+            ping()
+            return None
+        thread = threading.Thread(target=ping, name=f"ollama-warmup-{model}", daemon=True)
+        thread.start()
+        return thread
+
+    def probe(self, model, force=False):
+        """
+        Comprueba de forma ligera si el servidor responde y si el modelo está
+        instalado, consultando /api/tags con un tiempo de espera corto. El
+        resultado se reutiliza durante probe_ttl segundos (OLLAMA_PROBE_TTL).
+
+        Args:
+            model (str): El modelo que se quiere usar.
+            force (bool): Si es True, ignora el resultado almacenado.
+
+        Returns:
+            dict: server_up (bool), model_installed (bool) y models (list).
+        """
+        now = time.time()
+        with self._lock:
+            cached = self._probe_result
+        if not force and cached and now - cached["checked_at"] <= self.probe_ttl:
+            models = cached["models"]
+            server_up = cached["server_up"]
+        else:
+            try:
+                response = self.session.get(f"{self.base_url}/tags", timeout=PROBE_TIMEOUT_SECONDS)
+                server_up = response.status_code == 200
+                models = [entry.get("name", "") for entry in response.json().get("models", [])] if server_up else []
+            except Exception:
+                server_up = False
+                models = []
+            with self._lock:
+                self._probe_result = {"checked_at": now, "server_up": server_up, "models": models}
+
+        return {
+            "server_up": server_up,
+            "model_installed": model in models or f"{model}:latest" in models,
+            "models": models
+        }
+
+    def pull_model(self, model, background=True):
+        """
+        Descarga un modelo mostrando el progreso. En segundo plano no bloquea
+        al llamador y no inicia una segunda descarga del mismo modelo.
+
+        Args:
+            model (str): El modelo a descargar.
+            background (bool): Si es True, la descarga se hace en un hilo aparte.
+
+        Returns:
+            threading.Thread | bool: El hilo de descarga en segundo plano, o
+                True/False según el resultado si la descarga es síncrona.
+        """
+        def pull():
+            print(f"⬇️ Descargando el modelo {model}...")
+            last_reported = -10
+            try:
+                # Esta operación puede tardar varios minutos dependiendo del modelo
+                response = self.session.post(
+                    f"{self.base_url}/pull", json={"name": model, "stream": True}, stream=True
+                )
+                if response.status_code != 200:
+                    print(f"❌ Error al descargar el modelo: {response.status_code}")
+                    print(response.text)
+                    return False
+
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    progress = json.loads(line)
+                    if "error" in progress:
+                        print(f"❌ Error al descargar el modelo: {progress['error']}")
+                        return False
+                    total = progress.get("total")
+                    completed = progress.get("completed")
+                    if total and completed is not None:
+                        percent = int(completed * 100 / total)
+                        if percent >= last_reported + 10:
+                            last_reported = percent
+                            print(f"⬇️ {model}: {percent}% ({completed / 1e9:.2f}/{total / 1e9:.2f} GB)")
+
+                print(f"✅ Modelo {model} descargado correctamente")
+                with self._lock:
+                    self._probe_result = None
+                return True
+            except Exception as e:
+                print(f"❌ Error de conexión al intentar descargar: {e}")
+                return False
+            finally:
+                with self._lock:
+                    self._pull_threads.pop(model, None)
+
+        if not background:
+            return pull()
+
+        with self._lock:
+            thread = self._pull_threads.get(model)
+            if thread is None:
+                thread = threading.Thread(target=pull, name=f"ollama-pull-{model}", daemon=True)
+                self._pull_threads[model] = thread
+                thread.start()
+        return thread
+
+    def stats(self):
+        """
+        Devuelve las métricas acumuladas de las llamadas a Ollama.
+
+        Returns:
+            dict: Llamadas, cargas en frío, segundos de carga y evaluación, y tokens/s.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        stats["tokens_per_second"] = (
+            stats["eval_tokens"] / stats["eval_seconds"] if stats["eval_seconds"] else 0.0
+        )
+        return stats
+
+    def _mark_loaded(self, model):
+        """
+        Registra que el servidor acaba de usar el modelo: cada petición lo
+        mantiene cargado durante otro keep_alive.
+        """
+        with self._lock:
+            self._loaded_until[model] = time.monotonic() + keep_alive_seconds(self.keep_alive)
+
+    def _record_metrics(self, model, result, count_call=True):
+        """
+        Registra las duraciones que Ollama devuelve en nanosegundos.
+
+        Args:
+            model (str): El modelo consultado.
+            result (dict): La respuesta JSON de Ollama.
+            count_call (bool): Si la petición cuenta como llamada de generación.
+        """
+        metrics = {
+            "model": model,
+            "load_seconds": result.get("load_duration", 0) / 1e9,
+            "prompt_eval_seconds": result.get("prompt_eval_duration", 0) / 1e9,
+            "eval_seconds": result.get("eval_duration", 0) / 1e9,
+            "eval_tokens": result.get("eval_count", 0),
+            "total_seconds": result.get("total_duration", 0) / 1e9
+        }
+        cold_load = metrics["load_seconds"] > COLD_LOAD_THRESHOLD_SECONDS
+
+        self._mark_loaded(model)
+        with self._lock:
+            self.last_metrics = metrics
+            if count_call:
+                self._stats["calls"] += 1
+            if cold_load:
+                self._stats["cold_loads"] += 1
+            self._stats["load_seconds"] += metrics["load_seconds"]
+            self._stats["eval_seconds"] += metrics["eval_seconds"]
+            self._stats["eval_tokens"] += metrics["eval_tokens"]
+
+        if cold_load and count_call:
+            print(f"🥶 Carga en frío de {model}: {metrics['load_seconds']:.2f}s (keep_alive={self.keep_alive})")
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+def get_ollama_client(base_url=OLLAMA_BASE_URL):
+    """
+    Devuelve el cliente Ollama compartido para una URL base, creándolo la primera vez.
+    Salvo que OLLAMA_CACHE=0, el cliente guarda las respuestas en una caché de dos niveles.
+    Los tiempos de espera se configuran con OLLAMA_CONNECT_TIMEOUT y OLLAMA_TIMEOUT.
+
+    Args:
+        base_url (str): La URL base de la API de Ollama.
+
+    Returns:
+        OllamaClient: El cliente compartido.
+    """
+    client = _clients.get(base_url)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(base_url)
+            if client is None:
+                cache = None
+                if os.getenv("OLLAMA_CACHE", "1") == "1":
+                    cache = TwoTierCache(
+                        "ollama_responses",
+                        ttl=float(os.getenv("OLLAMA_CACHE_TTL", 24 * 3600)),
+                        max_entries=int(os.getenv("OLLAMA_CACHE_MAX_ENTRIES", 5000)),
+                        memory_entries=int(os.getenv("OLLAMA_CACHE_MEMORY_ENTRIES", 256))
+                    )
+                timeout = (
+                    float(os.getenv("OLLAMA_CONNECT_TIMEOUT", 3)),
+                    float(os.getenv("OLLAMA_TIMEOUT", 300))
+                )
+                client = OllamaClient(base_url, timeout=timeout, cache=cache)
+                _clients[base_url] = client
+    return client
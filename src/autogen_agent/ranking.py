@@ -0,0 +1,148 @@
+import heapq
+import itertools
+from collections import Counter
+from operator import itemgetter
+from autogen_agent.dedup import SongDeduplicator
+
+
+# Constante de suavizado de la fusión por rango recíproco (Cormack et al., 2009)
+RRF_K = 60
+
+def count_score(position, length):
+    """Cada aparición suma 1, sin importar la posición (frecuencia)."""
+    return 1
+
+def borda_score(position, length):
+    """Recuento de Borda: la primera de n canciones suma n, la última suma 1."""
+    return length - position
+
+def reciprocal_rank_score(position, length):
+    """Fusión por rango recíproco: la canción en la posición p suma 1 / (RRF_K + p + 1)."""
+    return 1.0 / (RRF_K + position + 1)
+
+# Funciones de puntuación disponibles: reciben la posición (desde 0) y la longitud de la lista
+SCORINGS = {
+    "count": count_score,
+    "borda": borda_score,
+    "reciprocal": reciprocal_rank_score,
+}
+
+class RankAggregator:
+    def __init__(self, scoring="count"):
+        """
+        Inicializa un agregador de rankings que combina muchas listas de
+        canciones en una sola clasificación. Las listas se procesan de una en
+        una, por lo que admite un número arbitrario de ellas.
+
+        Args:
+            scoring (str o callable): "count" (frecuencia), "borda",
+                "reciprocal" o una función (posición, longitud) -> puntuación.
+        """
+        if callable(scoring):
+            self.score = scoring
+        elif scoring in SCORINGS:
+            self.score = SCORINGS[scoring]
+        else:
+            raise ValueError(f"Puntuación desconocida: {scoring} (disponibles: {', '.join(SCORINGS)})")
+        self.scores = Counter()
+        self._weights = {}
+
+    def add(self, songs):
+        """
+        Añade una lista de canciones al ranking.
+
+        Args:
+            songs (list): Las canciones, de la más a la menos relevante.
+        """
+        self.update((songs,))
+
+    def update(self, lists):
+        """
+        Añade varias listas de canciones al ranking.
+
+        Args:
+            lists (iterable): Listas de canciones (puede ser un generador).
+        """
+        scores = self.scores
+        get = scores.get
+        if self.score is count_score:
+            # Counter cuenta en C todas las canciones de una sola pasada
+            scores.update(itertools.chain.from_iterable(lists))
+            return
+        for songs in lists:
+            if not isinstance(songs, (list, tuple)):
+                songs = list(songs)
+            for song, weight in zip(songs, self._position_weights(len(songs))):
+                scores[song] = get(song, 0) + weight
+
+    def _position_weights(self, length):
+        """
+        Devuelve (y guarda) la puntuación de cada posición en una lista de esa longitud.
+        """
+        weights = self._weights.get(length)
+        if weights is None:
+            weights = [self.score(position, length) for position in range(length)]
+            self._weights[length] = weights
+        return weights
+
+    def top(self, limit=10):
+        """
+        Devuelve las canciones con mayor puntuación en O(n log k).
+        Los empates se resuelven por orden de primera aparición, igual que
+        un sorted(..., reverse=True) estable sobre todas las canciones.
+
+        Args:
+            limit (int): Número máximo de canciones.
+
+        Returns:
+            list: Tuplas (canción, puntuación), de mayor a menor puntuación.
+        """
+        return heapq.nlargest(limit, self.scores.items(), key=itemgetter(1))
+
+    def __len__(self):
+        return len(self.scores)
+
+def aggregate_rankings(lists, limit=10, scoring="count"):
+    """
+    Combina muchas listas de canciones y devuelve las mejor clasificadas.
+
+    Args:
+        lists (iterable): Listas de canciones, cada una de la más a la menos relevante.
+        limit (int): Número máximo de canciones.
+        scoring (str o callable): La puntuación por posición (ver RankAggregator).
+
+    Returns:
+        list: Las canciones con mayor puntuación.
+    """
+    aggregator = RankAggregator(scoring)
+    aggregator.update(lists)
+    return [song for song, score in aggregator.top(limit)]
+
+def merge_ranked(sources, limit, deduplicator=None):
+    """
+    Combina varias fuentes ordenadas por relevancia respetando su prioridad:
+    primero todas las canciones de la primera fuente, en su orden, después
+    las nuevas de la segunda, etc. Las fuentes se consumen de forma perezosa
+    y se dejan de leer en cuanto hay limit canciones únicas, de modo que un
+    generador que pagina una API no pide más páginas de las necesarias.
+
+    Args:
+        sources (iterable): Fuentes de canciones, de mayor a menor prioridad
+            (listas o generadores).
+        limit (int): Número de canciones únicas deseado.
+        deduplicator (SongDeduplicator): Índice donde se añaden las canciones
+            (por defecto, uno nuevo).
+
+    Returns:
+        SongDeduplicator: Las canciones únicas, en orden de prioridad y de rango.
+    """
+    if deduplicator is None:
+        deduplicator = SongDeduplicator()
+    for source in sources:
+        if len(deduplicator) >= limit:
+            break
+        for song in source:
+            deduplicator.add(song)
+            if len(deduplicator) >= limit:
+                break
+    return deduplicator
@@ -0,0 +1,348 @@
+import os
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from autogen_agent.metrics import REGISTRY
+
+
+# Límites por defecto de cada servicio externo: peticiones por segundo, ráfaga
+# máxima y peticiones simultáneas. Se pueden ajustar con <SERVICIO>_RATE_LIMIT,
+# <SERVICIO>_RATE_BURST y <SERVICIO>_MAX_CONCURRENCY (por ejemplo, SPOTIFY_RATE_LIMIT).
+DEFAULT_SERVICE_LIMITS = {
+    "lastfm": {"rate": 5, "burst": 5, "max_concurrency": 4},
+    "spotify": {"rate": 10, "burst": 10, "max_concurrency": 8},
+    "youtube": {"rate": 10, "burst": 10, "max_concurrency": 8},
+}
+
+# Motivos con los que la API de YouTube indica un exceso de peticiones (HTTP 403).
+# "quotaExceeded" no aparece: la cuota diaria no se recupera esperando unos segundos.
+RATE_LIMIT_REASONS = ("rateLimitExceeded", "userRateLimitExceeded")
+
+def parse_retry_after(value):
+    """
+    Interpreta el valor de una cabecera Retry-After.
+
+    Args:
+        value (str): Segundos de espera o una fecha HTTP.
+
+    Returns:
+        float: Los segundos a esperar, o None si el valor no es válido.
+    """
+    if value is None:
+        return None
+    value = str(value).strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def throttle_delay(outcome):
+    """
+    Detecta si una respuesta o excepción indica que se ha superado el límite
+    de peticiones. Reconoce las respuestas de requests, las excepciones de
+    spotipy (http_status y headers) y las de googleapiclient (resp).
+
+    Args:
+        outcome: La respuesta devuelta o la excepción lanzada por la llamada.
+
+    Returns:
+        float: Los segundos indicados por Retry-After (0.0 si no se indican),
+            o None si no se ha superado el límite.
+    """
+    resp = getattr(outcome, "resp", None)
+    status = getattr(outcome, "http_status", None)
+    if not isinstance(status, int):
+        status = getattr(outcome, "status_code", None)
+    if not isinstance(status, int) and resp is not None:
+        status = getattr(resp, "status", None)
+    if not isinstance(status, int):
+        return None
+
+    if status == 403 and isinstance(outcome, Exception):
+        throttled = any(reason in str(outcome) for reason in RATE_LIMIT_REASONS)
+    else:
+        throttled = status == 429
+    if not throttled:
+        return None
+
+    headers = getattr(outcome, "headers", None)
+    if not hasattr(headers, "get"):
+        headers = resp if hasattr(resp, "get") else {}
+    delay = parse_retry_after(headers.get("Retry-After") or headers.get("retry-after"))
+    return delay if delay is not None else 0.0
+
+class TokenBucket:
+    def __init__(self, rate, burst=None):
+        """
+        Inicializa un cubo de fichas que limita el ritmo de peticiones.
+
+        Args:
+            rate (float): Fichas repuestas por segundo (0 o None desactiva el límite).
+            burst (float): Capacidad máxima del cubo (por defecto: igual a rate).
+        """
+        self.rate = float(rate or 0)
+        self.capacity = float(burst or max(1.0, self.rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        """
+        Espera hasta disponer de las fichas indicadas y las consume.
+
+        Args:
+            tokens (float): Fichas a consumir (se limitan a la capacidad del cubo).
+
+        Returns:
+            float: Los segundos que se ha esperado.
+        """
+        tokens = min(float(tokens), self.capacity)
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self._blocked_until and (not self.rate or self._tokens >= tokens):
+                    self._tokens -= tokens if self.rate else 0
+                    return waited
+                delay = self._blocked_until - now
+                if self.rate:
+                    delay = max(delay, (tokens - self._tokens) / self.rate)
+            time.sleep(delay)
+            waited += delay
+
+    def block_for(self, seconds):
+        """
+        Bloquea el cubo durante un tiempo (por ejemplo, el indicado por Retry-After).
+        Al terminar el bloqueo el cubo vuelve a llenarse progresivamente.
+
+        Args:
+            seconds (float): Los segundos de bloqueo.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._blocked_until = max(self._blocked_until, now + seconds)
+            self._tokens = 0.0
+            self._updated = self._blocked_until
+
+    def _refill(self, now):
+        """
+        Repone las fichas acumuladas desde la última actualización.
+        Debe llamarse con el lock adquirido.
+        """
+        if now > self._updated:
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+class AdaptiveConcurrencyLimit:
+    def __init__(self, maximum, minimum=1):
+        """
+        Inicializa un límite de peticiones simultáneas que se adapta con AIMD:
+        se reduce a la mitad al superar el límite del servicio y crece en una
+        unidad tras una ronda completa de peticiones correctas.
+
+        Args:
+            maximum (int): Número máximo de peticiones simultáneas (y valor inicial).
+            minimum (int): Número mínimo de peticiones simultáneas.
+        """
+        self.maximum = max(1, int(maximum))
+        self.minimum = max(1, min(int(minimum), self.maximum))
+        self.limit = self.maximum
+        self._in_flight = 0
+        self._successes = 0
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        """
+        Espera hasta que haya hueco para una nueva petición.
+        """
+        with self._condition:
+            while self._in_flight >= self.limit:
+                self._condition.wait()
+            self._in_flight += 1
+
+    def release(self, throttled=False):
+        """
+        Libera el hueco de una petición y ajusta el límite.
+
+        Args:
+            throttled (bool): Si el servicio rechazó la petición por exceso de peticiones.
+        """
+        with self._condition:
+            self._in_flight -= 1
+            if throttled:
+                self.limit = max(self.minimum, self.limit // 2)
+                self._successes = 0
+            else:
+                self._successes += 1
+                if self._successes >= self.limit and self.limit < self.maximum:
+                    self.limit += 1
+                    self._successes = 0
+            self._condition.notify_all()
+
+    def reduce(self):
+        """
+        Reduce el límite a la mitad sin liberar ninguna petición.
+        """
+        with self._condition:
+            self.limit = max(self.minimum, self.limit // 2)
+            self._successes = 0
+
+class RateLimiter:
+    def __init__(self, name, rate=None, burst=None, max_concurrency=8, min_concurrency=1,
+                 max_retries=3, max_retry_after=60.0, backoff=1.0):
+        """
+        Inicializa el limitador de un servicio: combina un cubo de fichas,
+        un límite adaptativo de concurrencia y el respeto de Retry-After.
+
+        Args:
+            name (str): Nombre del servicio (se usa en los mensajes y estadísticas).
+            rate (float): Peticiones por segundo (0 o None desactiva el límite de ritmo).
+            burst (float): Ráfaga máxima de peticiones.
+            max_concurrency (int): Peticiones simultáneas máximas.
+            min_concurrency (int): Peticiones simultáneas mínimas tras reducir el límite.
+            max_retries (int): Reintentos tras una respuesta de límite superado.
+            max_retry_after (float): Espera máxima aceptada; si el servicio pide más,
+                se devuelve el error en lugar de bloquear.
+            backoff (float): Espera base cuando el servicio no envía Retry-After
+                (se duplica en cada reintento).
+        """
+        self.name = name
+        self.bucket = TokenBucket(rate, burst)
+        self.concurrency = AdaptiveConcurrencyLimit(max_concurrency, min_concurrency)
+        self.max_retries = max_retries
+        self.max_retry_after = max_retry_after
+        self.backoff = backoff
+        self.requests = 0
+        self.throttled = 0
+        self.wait_seconds = 0.0
+        self._stats_lock = threading.Lock()
+
+    def call(self, func, *args, cost=1, operation=None, **kwargs):
+        """
+        Ejecuta una llamada a la API respetando los límites del servicio.
+        Si el servicio responde que se ha superado el límite (HTTP 429), se
+        bloquea el cubo durante el tiempo indicado por Retry-After, se reduce
+        la concurrencia y se reintenta la llamada.
+
+        Args:
+            func (callable): La función que realiza la petición.
+            *args: Argumentos posicionales de la función.
+            cost (float): Fichas que consume la llamada (por ejemplo, el tamaño de un lote).
+            operation (str): Nombre de la operación en las métricas
+                (por defecto: el nombre de la función).
+            **kwargs: Argumentos con nombre de la función.
+
+        Returns:
+            El resultado de la función. Si se agotan los reintentos se devuelve
+            la última respuesta o se relanza la última excepción.
+        """
+        operation = operation or getattr(func, "__name__", "call")
+        for attempt in range(self.max_retries + 1):
+            waited = self.bucket.acquire(cost)
+            self.concurrency.acquire()
+            error = None
+            result = None
+            with REGISTRY.span(
+                "autogen_api_request_duration_seconds", service=self.name, operation=operation
+            ) as span:
+                try:
+                    result = func(*args, **kwargs)
+                    delay = throttle_delay(result)
+                except Exception as e:
+                    delay = throttle_delay(e)
+                    if delay is None:
+                        self.concurrency.release()
+                        raise
+                    error = e
+                status = getattr(result, "status_code", None)
+                if delay is not None:
+                    span.labels["outcome"] = "throttled"
+                elif isinstance(status, int) and status >= 400:
+                    span.labels["outcome"] = "error"
+            self.concurrency.release(throttled=delay is not None)
+
+            with self._stats_lock:
+                self.requests += 1
+                self.wait_seconds += waited
+                if delay is not None:
+                    self.throttled += 1
+            if delay is not None:
+                REGISTRY.increment("autogen_api_throttled_total", service=self.name)
+
+            if delay is None:
+                return result
+            if not delay:
+                delay = self.backoff * (2 ** attempt)
+            if attempt == self.max_retries or delay > self.max_retry_after:
+                break
+            print(f"⏳ Límite de peticiones de {self.name} alcanzado, reintentando en {delay:.1f}s...")
+            self.bucket.block_for(delay)
+
+        if error is not None:
+            raise error
+        return result
+
+    def throttle(self, delay=None):
+        """
+        Registra un límite superado detectado fuera de call (por ejemplo, en
+        una petición de un lote HTTP): reduce la concurrencia y bloquea el cubo.
+
+        Args:
+            delay (float): Segundos indicados por Retry-After (por defecto: la espera base).
+        """
+        with self._stats_lock:
+            self.throttled += 1
+        REGISTRY.increment("autogen_api_throttled_total", service=self.name)
+        self.concurrency.reduce()
+        self.bucket.block_for(min(delay or self.backoff, self.max_retry_after))
+
+    def stats(self):
+        """
+        Devuelve las estadísticas de uso del limitador.
+
+        Returns:
+            dict: Peticiones, respuestas de límite superado, espera acumulada y
+                límite de concurrencia actual.
+        """
+        return {
+            "service": self.name,
+            "requests": self.requests,
+            "throttled": self.throttled,
+            "wait_seconds": self.wait_seconds,
+            "concurrency_limit": self.concurrency.limit
+        }
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+def get_rate_limiter(service):
+    """
+    Devuelve el limitador compartido de un servicio, creándolo la primera vez
+    con los valores de DEFAULT_SERVICE_LIMITS y las variables de entorno.
+
+    Args:
+        service (str): Nombre del servicio (lastfm, spotify, youtube...).
+
+    Returns:
+        RateLimiter: El limitador del servicio.
+    """
+    with _limiters_lock:
+        if service not in _limiters:
+            defaults = DEFAULT_SERVICE_LIMITS.get(service, {"rate": 0, "burst": None, "max_concurrency": 8})
+            prefix = service.upper()
+            _limiters[service] = RateLimiter(
+                service,
+                rate=float(os.getenv(f"{prefix}_RATE_LIMIT", defaults["rate"])),
+                burst=float(os.getenv(f"{prefix}_RATE_BURST", defaults["burst"] or 0)) or None,
+                max_concurrency=int(os.getenv(f"{prefix}_MAX_CONCURRENCY", defaults["max_concurrency"])),
+                max_retries=int(os.getenv("RATE_LIMIT_MAX_RETRIES", 3)),
+                max_retry_after=float(os.getenv("RATE_LIMIT_MAX_RETRY_AFTER", 60))
+            )
+        return _limiters[service]
@@ -0,0 +1,225 @@
+import os
+import random
+import threading
+import time
+import requests
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, name, retry_in):
+        """
+        Error lanzado sin llamar al servicio mientras su circuito está abierto.
+
+        Args:
+            name (str): El nombre del circuito (servicio o endpoint).
+            retry_in (float): Segundos que faltan para volver a probar el servicio.
+        """
+        super().__init__(f"Circuito '{name}' abierto: se reintentará en {retry_in:.1f}s")
+        self.name = name
+        self.retry_in = retry_in
+
+def is_transient(outcome):
+    """
+    Indica si una respuesta o excepción corresponde a un fallo transitorio
+    que merece reintentarse: timeouts, errores de conexión y respuestas 5xx.
+
+    Args:
+        outcome: La respuesta devuelta o la excepción lanzada por la llamada.
+
+    Returns:
+        bool: True si el fallo es transitorio.
+    """
+    if isinstance(outcome, (requests.Timeout, requests.ConnectionError)):
+        return True
+    status = getattr(outcome, "status_code", None)
+    return isinstance(status, int) and status >= 500
+
+class RetryPolicy:
+    def __init__(self, max_retries=2, base_delay=0.5, max_delay=8.0, deadline=None):
+        """
+        Inicializa una política de reintentos con espera exponencial y
+        variación aleatoria completa ("full jitter"), que evita que varios
+        clientes reintenten a la vez.
+
+        Args:
+            max_retries (int): Número máximo de reintentos tras el primer intento.
+            base_delay (float): Espera base en segundos (se duplica en cada reintento).
+            max_delay (float): Espera máxima entre intentos.
+            deadline (float): Tiempo total máximo en segundos, incluidas las esperas (opcional).
+        """
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+
+    def delay(self, attempt):
+        """
+        Calcula la espera antes de un reintento.
+
+        Args:
+            attempt (int): El número de intento fallido (empezando en 0).
+
+        Returns:
+            float: Los segundos a esperar, entre 0 y la espera exponencial.
+        """
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=30.0):
+        """
+        Inicializa un cortocircuito para un servicio. Tras failure_threshold
+        fallos transitorios seguidos se abre y las llamadas fallan al instante;
+        pasado reset_timeout deja pasar una única llamada de prueba que lo
+        vuelve a cerrar si tiene éxito.
+
+        Args:
+            name (str): El nombre del circuito (servicio o endpoint).
+            failure_threshold (int): Fallos seguidos que abren el circuito.
+            reset_timeout (float): Segundos que el circuito permanece abierto.
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.rejected = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """
+        Comprueba si se puede llamar al servicio.
+
+        Raises:
+            CircuitOpenError: Si el circuito está abierto o ya hay una llamada de prueba en curso.
+        """
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            retry_in = self._opened_at + self.reset_timeout - time.monotonic()
+            if self.state == self.OPEN and retry_in <= 0:
+                self.state = self.HALF_OPEN
+                return
+            self.rejected += 1
+            raise CircuitOpenError(self.name, max(0.0, retry_in))
+
+    def record_success(self):
+        """
+        Registra una llamada correcta y cierra el circuito.
+        """
+        with self._lock:
+            if self.state != self.CLOSED:
+                print(f"✅ Servicio {self.name} recuperado")
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        """
+        Registra un fallo transitorio y abre el circuito si se alcanza el umbral
+        o si falla la llamada de prueba.
+        """
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    print(f"🔌 Servicio {self.name} no disponible: se omite durante {self.reset_timeout:.0f}s")
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+def call_with_retries(func, *args, policy=None, breaker=None, **kwargs):
+    """
+    Ejecuta una llamada reintentando los fallos transitorios con espera
+    exponencial y, si se indica, protegida por un cortocircuito.
+
+    Args:
+        func (callable): La función que realiza la petición.
+        *args: Argumentos posicionales de la función.
+        policy (RetryPolicy): La política de reintentos (por defecto: sin reintentos).
+        breaker (CircuitBreaker): El cortocircuito del servicio (opcional).
+        **kwargs: Argumentos con nombre de la función.
+
+    Returns:
+        El resultado de la función. Si se agotan los reintentos se devuelve
+        la última respuesta o se relanza la última excepción.
+
+    Raises:
+        CircuitOpenError: Si el circuito está abierto.
+    """
+    policy = policy or RetryPolicy(max_retries=0)
+    start = time.monotonic()
+    attempt = 0
+    while True:
+        if breaker is not None:
+            breaker.before_call()
+        error = None
+        result = None
+        try:
+            result = func(*args, **kwargs)
+            transient = is_transient(result)
+        except Exception as e:
+            transient = is_transient(e)
+            error = e
+
+        if breaker is not None:
+            # Un error no transitorio (por ejemplo, un 404) indica que el servicio responde
+            if transient:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+
+        if not transient or attempt >= policy.max_retries:
+            break
+        delay = policy.delay(attempt)
+        if policy.deadline is not None and time.monotonic() - start + delay > policy.deadline:
+            break
+        print(f"🔁 Fallo transitorio ({error or result.status_code}), reintentando en {delay:.2f}s...")
+        time.sleep(delay)
+        attempt += 1
+
+    if error is not None:
+        raise error
+    return result
+
+def get_retry_policy(service):
+    """
+    Crea la política de reintentos de un servicio a partir de las variables
+    de entorno <SERVICIO>_MAX_RETRIES, RETRY_BASE_DELAY y RETRY_MAX_DELAY.
+
+    Args:
+        service (str): Nombre del servicio (lastfm, ollama...).
+
+    Returns:
+        RetryPolicy: La política de reintentos.
+    """
+    return RetryPolicy(
+        max_retries=int(os.getenv(f"{service.upper()}_MAX_RETRIES", 2)),
+        base_delay=float(os.getenv("RETRY_BASE_DELAY", 0.5)),
+        max_delay=float(os.getenv("RETRY_MAX_DELAY", 8))
+    )
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+def get_circuit_breaker(name):
+    """
+    Devuelve el cortocircuito compartido de un endpoint, creándolo la primera vez
+    con CIRCUIT_FAILURE_THRESHOLD y CIRCUIT_RESET_TIMEOUT.
+
+    Args:
+        name (str): El nombre del endpoint.
+
+    Returns:
+        CircuitBreaker: El cortocircuito compartido.
+    """
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(
+                name,
+                failure_threshold=int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", 5)),
+                reset_timeout=float(os.getenv("CIRCUIT_RESET_TIMEOUT", 30))
+            )
+        return _breakers[name]
@@ -0,0 +1,102 @@
+import unittest
+from unittest.mock import patch
+import sys
+import os
+import json
+import tempfile
+
+src_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+sys.path.append(src_path)
+
+from autogen_agent.batch import load_queries, percentile, run_batch
+
+class TestBatch(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _write(self, name, content):
+        path = os.path.join(self.tmpdir.name, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        return path
+
+    def test_load_queries_csv(self):
+        path = self._write("consultas.csv", "query,num_songs,email\nrock 80s,5,a@b.com\njazz,,\n,3,\n")
+        queries = load_queries(path)
+        self.assertEqual(queries, [
+            {"query": "rock 80s", "num_songs": 5, "email": "a@b.com"},
+            {"query": "jazz", "num_songs": 20, "email": None}
+        ])
+
+    def test_load_queries_jsonl(self):
+        path = self._write("consultas.jsonl", '{"query": "pop", "num_songs": 3}\n\n{"query": "indie"}\n')
+        queries = load_queries(path)
+        self.assertEqual([q["query"] for q in queries], ["pop", "indie"])
+        self.assertEqual(queries[0]["num_songs"], 3)
+
+    def test_load_queries_records_invalid_rows(self):
+        # Una fila mal formada no detiene la lectura del resto del fichero
+        path = self._write(
+            "consultas.csv",
+            "query,num_songs,email\nrock,5,\nmetal,five,\nsoul,0,\njazz,3,\n"
+        )
+        queries = load_queries(path)
+        self.assertEqual([q["query"] for q in queries], ["rock", "metal", "soul", "jazz"])
+        self.assertEqual((queries[1]["line"], queries[1]["error"]), (3, "num_songs inválido: 'five'"))
+        self.assertEqual(queries[2]["line"], 4)
+        self.assertNotIn("error", queries[3])
+
+    def test_load_queries_jsonl_invalid_line(self):
+        path = self._write("consultas.jsonl", '{"query": "pop"}\n{"query": \n{"query": "indie", "num_songs": -1}\n{"query": "soul", "num_songs": 0}\n')
+        queries = load_queries(path)
+        self.assertEqual([q.get("line") for q in queries], [None, 2, 3, 4])
+        self.assertIn("JSON inválido", queries[1]["error"])
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 95), 95)
+        self.assertEqual(percentile([], 50), 0.0)
+
+    @patch("autogen_agent.main.create_music_recommendation")
+    def test_run_batch(self, mock_recommend):
+        # Una consulta falla y el resto se escribe con sus tiempos por etapa
+        def recommend(query, email, num_songs):
+            if query == "falla":
+                raise RuntimeError("sin conexión")
+            return {"query": query, "songs": ["A - B"], "timings": {"search": 0.1}}
+        mock_recommend.side_effect = recommend
+
+        queries = [{"query": q, "num_songs": 1, "email": None} for q in ["rock", "falla", "pop"]]
+        output_path = os.path.join(self.tmpdir.name, "resultados.jsonl")
+        summary = run_batch(queries, output_path, concurrency=2)
+
+        with open(output_path, encoding="utf-8") as f:
+            records = sorted((json.loads(line) for line in f), key=lambda r: r["index"])
+        self.assertEqual([r["status"] for r in records], ["ok", "error", "ok"])
+        self.assertIn("sin conexión", records[1]["error"])
+        self.assertEqual(summary["succeeded"], 2)
+        self.assertEqual(summary["failed"], 1)
+        self.assertEqual(summary["stages"]["search"]["count"], 2)
+        self.assertEqual(summary["end_to_end"]["count"], 3)
+
+    @patch("autogen_agent.main.create_music_recommendation")
+    def test_run_batch_writes_invalid_rows_without_running_them(self, mock_recommend):
+        mock_recommend.return_value = {"songs": [], "timings": {}}
+        path = self._write("consultas.csv", "query,num_songs,email\nrock,5,\nmetal,five,\n")
+        output_path = os.path.join(self.tmpdir.name, "resultados.jsonl")
+        summary = run_batch(load_queries(path), output_path)
+
+        with open(output_path, encoding="utf-8") as f:
+            records = sorted((json.loads(line) for line in f), key=lambda r: r["index"])
+        self.assertEqual([r["status"] for r in records], ["ok", "error"])
+        self.assertEqual(records[1]["line"], 3)
+        self.assertEqual(mock_recommend.call_count, 1)
+        self.assertEqual((summary["queries"], summary["failed"]), (2, 1))
+        self.assertEqual(summary["end_to_end"]["count"], 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+import unittest
+import sys
+import os
+import json
+import subprocess
+import tempfile
+
+src_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+sys.path.append(src_path)
+
+import requests
+from autogen_agent.benchmarks.fake_services import FakeServices, LatencyProfile
+
+class TestFakeServices(unittest.TestCase):
+    def test_error_injection(self):
+        # Con una tasa de error del 100% todas las respuestas son 503
+        with FakeServices({"lastfm": LatencyProfile(latency=0, error_rate=1.0)}) as services:
+            response = requests.get(f"{services.servers['lastfm'].url}/2.0/?artist=Queen")
+            self.assertEqual(response.status_code, 503)
+            self.assertEqual(services.request_counts()["lastfm"]["errors"], 1)
+
+class TestPipelineBenchmark(unittest.TestCase):
+    def test_pipeline_runs_offline(self):
+        # El flujo completo se ejecuta contra los servicios simulados en un proceso propio
+        with tempfile.TemporaryDirectory() as tmpdir:
+            summary_path = os.path.join(tmpdir, "resumen.json")
+            env = {**os.environ, "PYTHONPATH": src_path, "HOME": tmpdir}
+            subprocess.run(
+                [sys.executable, "-m", "autogen_agent.benchmarks.pipeline",
+                 "--queries", "3", "--concurrency", "2", "--latency-scale", "0", "--json", summary_path],
+                cwd=tmpdir, env=env, capture_output=True, text=True, check=True, timeout=60
+            )
+            with open(summary_path, encoding="utf-8") as f:
+                summary = json.load(f)
+
+        self.assertEqual(summary["succeeded"], 3)
+        self.assertEqual(set(summary["stages"]), {"search", "youtube", "spotify", "email_generation", "email_send"})
+        self.assertEqual(summary["service_requests"]["smtp"]["messages"], 3)
+        self.assertGreater(summary["service_requests"]["youtube"]["POST /youtube/v3/playlistItems"], 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+from unittest.mock import patch
+import sys
+import os
+
+src_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+sys.path.append(src_path)
+
+from autogen_agent.cache import PersistentTTLCache, TwoTierCache, content_key, normalize_key
+
+class TestPersistentTTLCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = PersistentTTLCache("test", path=":memory:", ttl=60, max_entries=2)
+
+    def test_get_set(self):
+        # Las claves equivalentes tras normalizar deben compartir entrada
+        self.assertIsNone(self.cache.get("AC/DC"))
+        self.cache.set("AC/DC", ["Back in Black"])
+        self.assertEqual(self.cache.get("  ac/dc "), ["Back in Black"])
+        self.assertEqual(self.cache.hits, 1)
+        self.assertEqual(self.cache.misses, 1)
+
+    def test_ttl_expiration(self):
+        # Una entrada caducada cuenta como fallo y se elimina
+        self.cache.set("queen", ["Bohemian Rhapsody"])
+        with patch("autogen_agent.cache.time.time", return_value=10**12):
+            self.assertIsNone(self.cache.get("queen"))
+        self.assertEqual(len(self.cache), 0)
+
+    def test_lru_eviction(self):
+        # Se expulsa la entrada menos usada recientemente
+        self.cache.set("a", 1)
+        self.cache.set("b", 2)
+        self.cache.get("a")
+        self.cache.set("c", 3)
+        self.assertEqual(self.cache.get("a"), 1)
+        self.assertIsNone(self.cache.get("b"))
+        self.assertEqual(self.cache.stats()["evictions"], 1)
+
+    def test_normalize_key(self):
+        self.assertEqual(normalize_key("  Rock   80s "), "rock 80s")
+
+class TestTwoTierCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = TwoTierCache("test", path=":memory:", ttl=60, memory_entries=1)
+
+    def test_memory_then_disk(self):
+        # La entrada expulsada de memoria se recupera desde disco
+        self.cache.set("a", "respuesta A")
+        self.cache.set("b", "respuesta B")
+        self.assertEqual(self.cache.get("b"), "respuesta B")
+        self.assertEqual(self.cache.get("a"), "respuesta A")
+        stats = self.cache.stats()
+        self.assertEqual(stats["memory_hits"], 1)
+        self.assertEqual(stats["disk_hits"], 1)
+
+    def test_content_key(self):
+        # Las opciones forman parte de la clave, sin importar su orden
+        key = content_key("gemma:2b", "hola", {"a": 1, "b": 2})
+        self.assertEqual(key, content_key("gemma:2b", "hola", {"b": 2, "a": 1}))
+        self.assertNotEqual(key, content_key("gemma:2b", "hola", {}))
+
+if __name__ == "__main__":
+    unittest.main()
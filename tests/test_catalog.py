@@ -0,0 +1,107 @@
+import unittest
+import sys
+import os
+import tempfile
+from collections import Counter
+
+src_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+sys.path.append(src_path)
+
+from autogen_agent.catalog import SyntheticCatalog, generate_catalog
+from autogen_agent.mock_main import LatencyModel, MockInternetSearchTool, MockSpotifyTool
+
+class TestSyntheticCatalog(unittest.TestCase):
+    def setUp(self):
+        self.workdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.workdir.name, "catalogo.bin")
+        self.stats = generate_catalog(self.path, artists=200, tracks_per_artist=10, playlists=1000,
+                                      playlist_length=8, seed=7)
+        self.catalog = SyntheticCatalog(self.path)
+
+    def tearDown(self):
+        self.catalog.close()
+        self.workdir.cleanup()
+
+    def test_reproducible(self):
+        # La misma semilla genera exactamente el mismo fichero
+        other_path = os.path.join(self.workdir.name, "otro.bin")
+        generate_catalog(other_path, artists=200, tracks_per_artist=10, playlists=1000,
+                         playlist_length=8, seed=7)
+        with open(self.path, "rb") as a, open(other_path, "rb") as b:
+            self.assertEqual(a.read(), b.read())
+
+    def test_counts(self):
+        self.assertEqual(len(self.catalog), 200)
+        self.assertEqual(self.catalog.tracks, self.stats["tracks"])
+        self.assertEqual(self.catalog.playlists, self.stats["playlists"])
+        self.assertEqual(len(set(self.catalog.artist_names())), 200)
+
+    def test_search(self):
+        # La búsqueda por nombre exacto no distingue mayúsculas
+        name = self.catalog.artist_name(3)
+        result = self.catalog.search(f"  {name.upper()} ", limit=2)
+        self.assertLessEqual(len(result["playlists"]), 2)
+        for playlist in result["playlists"]:
+            self.assertIn(name, playlist["title"])
+            self.assertEqual(len(playlist["songs"]), len(set(playlist["songs"])))
+            self.assertTrue(all(song.endswith(f" - {name}") for song in playlist["songs"]))
+        self.assertIsNone(self.catalog.search("artista inexistente"))
+
+    def test_zipf_popularity(self):
+        # El artista 0 es el más popular: más listas y más consultas
+        first = len(self.catalog.get_playlists(0, limit=10000))
+        last = len(self.catalog.get_playlists(199, limit=10000))
+        self.assertGreater(first, last)
+        counts = Counter(self.catalog.sample_queries(2000, seed=1))
+        self.assertEqual(counts.most_common(1)[0][0], self.catalog.artist_name(0))
+
+    def test_more_tracks_than_title_combinations(self):
+        # Con más canciones por artista que títulos posibles, la generación termina
+        from unittest.mock import patch
+        path = os.path.join(self.workdir.name, "pequeño.bin")
+        with patch("autogen_agent.catalog.TITLE_WORDS", ["Luna", "Fuego", "Río"]):
+            stats = generate_catalog(path, artists=2, tracks_per_artist=40, playlists=2, playlist_length=5)
+        self.assertGreater(stats["tracks"], 15)
+        with SyntheticCatalog(path) as catalog:
+            for artist in range(catalog.artists):
+                first, last = catalog._artist_tracks[artist], catalog._artist_tracks[artist + 1]
+                titles = [catalog.track_name(track) for track in range(first, last)]
+                self.assertEqual(len(set(titles)), len(titles))
+
+    def test_invalid_file(self):
+        bad_path = os.path.join(self.workdir.name, "malo.bin")
+        with open(bad_path, "wb") as f:
+            f.write(b"\0" * 64)
+        with self.assertRaises(ValueError):
+            SyntheticCatalog(bad_path)
+
+    def test_mock_search_tool(self):
+        tool = MockInternetSearchTool(catalog=self.catalog, latency=LatencyModel(0))
+        name = self.catalog.artist_name(0)
+        self.assertIn(name, tool.search_playlists(name)["playlists"][0]["title"])
+        # Las consultas que no están en el catálogo usan los ejemplos fijos
+        self.assertEqual(tool.search_playlists("AC/DC")["playlists"][0]["title"], "AC/DC Greatest Hits")
+
+class TestLatencyModel(unittest.TestCase):
+    def test_fixed_and_scaled(self):
+        waits = []
+        model = LatencyModel(1.0, scale=0.5, sleep=waits.append)
+        self.assertEqual(model.wait(), 0.5)
+        self.assertEqual(waits, [0.5])
+        self.assertEqual(LatencyModel(1.0, scale=0).wait(), 0.0)
+
+    def test_jitter_is_seeded(self):
+        a = LatencyModel(0.5, jitter=0.5, seed=3)
+        b = LatencyModel(0.5, jitter=0.5, seed=3)
+        samples = [a.sample() for _ in range(5)]
+        self.assertEqual(samples, [b.sample() for _ in range(5)])
+        self.assertGreater(len(set(samples)), 1)
+
+    def test_mock_tool_uses_model(self):
+        waits = []
+        tool = MockSpotifyTool(latency=LatencyModel(1.0, sleep=waits.append))
+        tool.create_playlist("t", "d", ["a"])
+        self.assertEqual(waits, [1.0])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+import sys
+import os
+
+src_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+sys.path.append(src_path)
+
+from autogen_agent.dedup import SongDeduplicator, deduplicate_songs, normalize_title
+
+class TestNormalizeTitle(unittest.TestCase):
+    def test_punctuation_and_case(self):
+        self.assertEqual(normalize_title("T.N.T"), "tnt")
+        self.assertEqual(normalize_title("Hell's  Bells"), "hells bells")
+        self.assertEqual(normalize_title("Rock 'n' Roll Train"), normalize_title("Rock N Roll Train"))
+        self.assertEqual(normalize_title("Corazón Espinado"), "corazon espinado")
+
+    def test_version_suffixes(self):
+        self.assertEqual(normalize_title("Back In Black - Remastered"), "back in black")
+        self.assertEqual(normalize_title("Highway to Hell - 2011 Remaster"), "highway to hell")
+        self.assertEqual(normalize_title("Hells Bells [2003 Remaster]"), "hells bells")
+        self.assertEqual(normalize_title("Thunderstruck (Live at Donington)"), "thunderstruck")
+        self.assertEqual(normalize_title("Money - Radio Edit"), "money")
+        self.assertEqual(normalize_title("Love Me Do - Mono"), "love me do")
+        # "Live" dentro del título o un artista tras el guion se conservan
+        self.assertEqual(normalize_title("Live and Let Die"), "live and let die")
+        self.assertEqual(normalize_title("Jump - Van Halen"), "jump van halen")
+
+    def test_suffixes_with_other_words_are_kept(self):
+        # Un sufijo solo se elimina si todas sus palabras son de versión
+        self.assertEqual(normalize_title("Ride - Clean Bandit Version"), "ride clean bandit version")
+        self.assertEqual(normalize_title("Edit the World"), "edit the world")
+        self.assertEqual(normalize_title("Demons (Mono Lake)"), "demons mono lake")
+
+class TestSongDeduplicator(unittest.TestCase):
+    def test_collapses_variants_in_order(self):
+        songs = ["Back in Black", "TNT", "Thunderstruck", "T.N.T", "Back In Black - Remastered",
+                 "Backin' Black", "Hells Bells", "Hell's Bells"]
+        self.assertEqual(deduplicate_songs(songs), ["Back in Black", "TNT", "Thunderstruck", "Hells Bells"])
+
+    def test_keeps_distinct_songs(self):
+        songs = ["Love Me Do", "Love Me Two", "Symphony No. 5", "Symphony No. 6", "Shoot to Thrill"]
+        self.assertEqual(deduplicate_songs(songs), songs)
+
+    def test_keeps_near_miss_titles(self):
+        # Títulos parecidos de artistas distintos son canciones distintas
+        pairs = [("Yesterday", "Yesterdays"), ("Animal", "Animals"), ("Run to the Hills", "Run to the Hill"),
+                 ("Wish You Were Here", "Wish You Were Her"), ("Thunderstruck", "Thunderstruk")]
+        for first, second in pairs:
+            self.assertEqual(deduplicate_songs([first, second]), [first, second])
+
+    def test_fuzzy_threshold_is_opt_in_for_long_titles(self):
+        self.assertEqual(deduplicate_songs(["Thunderstruck", "Thunderstruk", "THUNDERSTRUCK"], threshold=0.8),
+                         ["Thunderstruck"])
+        # Los títulos cortos nunca se comparan de forma aproximada
+        self.assertEqual(deduplicate_songs(["Animal", "Animals"], threshold=0.8), ["Animal", "Animals"])
+
+    def test_add_and_stats(self):
+        deduplicator = SongDeduplicator()
+        self.assertTrue(deduplicator.add("TNT"))
+        self.assertFalse(deduplicator.add("T.N.T (Live)"))
+        self.assertEqual(deduplicator.extend(["Jailbreak", "tnt"]), ["Jailbreak"])
+        self.assertIn("t.n.t", deduplicator)
+        self.assertEqual(len(deduplicator), 2)
+        self.assertEqual(deduplicator.duplicates, 2)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -15,6 +15,10 @@ from autogen_agent.main import (
     create_music_recommendation,
     validate_email,
 )
+from autogen_agent.cache import PersistentTTLCache
+from autogen_agent.ratelimit import RateLimiter
+from autogen_agent.resilience import CircuitBreaker, RetryPolicy
+import autogen_agent.main as main_module
 import requests
 from dotenv import load_dotenv
 
@@ -23,7 +27,7 @@ load_dotenv()
 
 class TestMusicSearchTool(unittest.TestCase):
     def setUp(self):
-        self.search_tool = MusicSearchTool()
+        self.search_tool = MusicSearchTool(cache=PersistentTTLCache("test", path=":memory:"))
 
     @patch("requests.get")
     def test_search_via_lastfm(self, mock_get):
@@ -54,6 +58,145 @@ class TestMusicSearchTool(unittest.TestCase):
         songs = self.search_tool._search_via_lastfm("Queen")
         self.assertEqual(len(songs), 0)
 
+    @patch("requests.get")
+    def test_search_via_lastfm_timeout_falls_back(self, mock_get):
+        # Un timeout se reintenta con un plazo acotado y después se devuelve una lista vacía
+        mock_get.side_effect = requests.Timeout("lento")
+        self.search_tool.lastfm_retry = RetryPolicy(max_retries=1, base_delay=0)
+        self.search_tool.lastfm_breaker = CircuitBreaker("test")
+
+        songs = self.search_tool._search_via_lastfm("Queen")
+        self.assertEqual(songs, [])
+        self.assertEqual(mock_get.call_count, 2)
+        self.assertEqual(mock_get.call_args.kwargs["timeout"], self.search_tool.lastfm_timeout)
+
+    @patch("requests.get")
+    def test_search_via_lastfm_uses_cache(self, mock_get):
+        # La segunda consulta equivalente no debe llegar a la red
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {"toptracks": {"track": [{"name": "Under Pressure"}]}}
+        mock_get.return_value = mock_response
+
+        self.search_tool._search_via_lastfm("Queen")
+        songs = self.search_tool._search_via_lastfm("  queen ")
+        self.assertEqual(songs, ["Under Pressure"])
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertEqual(self.search_tool.lastfm_cache.hits, 1)
+
+    @staticmethod
+    def _lastfm_pages(tracks):
+        # Simula la paginación de artist.gettoptracks sobre una lista de canciones
+        def get(url, params=None, timeout=None):
+            limit, page = params["limit"], params["page"]
+            response = MagicMock()
+            response.status_code = 200
+            response.json.return_value = {"toptracks": {
+                "track": [{"name": name} for name in tracks[(page - 1) * limit:page * limit]],
+                "@attr": {"total": str(len(tracks))}
+            }}
+            return response
+        return get
+
+    @patch("requests.get")
+    def test_search_via_lastfm_pages_lazily(self, mock_get):
+        # Solo se pide otra página cuando los duplicados no dejan suficientes canciones
+        mock_get.side_effect = self._lastfm_pages(["TNT", "T.N.T", "Thunderstruck", "Jailbreak", "Big Balls", "Hells Bells"])
+
+        songs = self.search_tool._search_via_lastfm("AC/DC", limit=3)
+        self.assertEqual(songs, ["TNT", "Thunderstruck", "Jailbreak"])
+        pages = [(call.kwargs["params"]["limit"], call.kwargs["params"]["page"]) for call in mock_get.call_args_list]
+        self.assertEqual(pages, [(3, 1), (3, 2)])
+        self.assertEqual(self.search_tool.lastfm_cache.get("AC/DC"),
+                         {"tracks": ["TNT", "T.N.T", "Thunderstruck", "Jailbreak", "Big Balls", "Hells Bells"], "complete": True})
+
+    @patch("requests.get")
+    def test_search_via_lastfm_resumes_from_cache(self, mock_get):
+        # Las canciones en caché se reutilizan y se pide solo la continuación
+        tracks = ["A", "a", "B", "b", "C", "D", "E", "F", "G", "H", "I", "J"]
+        mock_get.side_effect = self._lastfm_pages(tracks)
+        self.search_tool.lastfm_cache.set("Queen", {"tracks": tracks[:5], "complete": False})
+
+        self.assertEqual(self.search_tool._search_via_lastfm("Queen", limit=3), ["A", "B", "C"])
+        self.assertEqual(mock_get.call_count, 0)
+        # Faltan canciones: la página siguiente del mismo tamaño que lo ya guardado
+        self.assertEqual(self.search_tool._search_via_lastfm("Queen", limit=4), ["A", "B", "C", "D"])
+        # Si hacen falta más de las que daría esa página, se pide el límite necesario y se sigue paginando
+        self.assertEqual(self.search_tool._search_via_lastfm("Queen", limit=11), ["A", "B", "C", "D", "E", "F", "G", "H", "I", "J"])
+        pages = [(call.kwargs["params"]["limit"], call.kwargs["params"]["page"]) for call in mock_get.call_args_list]
+        self.assertEqual(pages, [(5, 2), (11, 1), (11, 2)])
+
+        # Al llegar al final la lista queda completa y no se vuelve a pedir
+        calls = mock_get.call_count
+        self.assertEqual(len(self.search_tool._search_via_lastfm("Queen", limit=50)), 10)
+        self.assertEqual(mock_get.call_count, calls)
+
+    def test_search_playlists_sequential_skips_spotify(self):
+        # Spotify solo se consulta si Last.fm no tiene suficientes canciones
+        self.search_tool._iter_lastfm_tracks = MagicMock(return_value=iter(["TNT", "Jailbreak", "Thunderstruck"]))
+        self.search_tool._search_via_spotify = MagicMock(return_value=["Hells Bells"])
+
+        self.assertEqual(self.search_tool.search_playlists("AC/DC", num_songs=2), ["TNT", "Jailbreak"])
+        self.search_tool._search_via_spotify.assert_not_called()
+
+    def test_search_playlists_parallel_keeps_source_order(self):
+        # Si Spotify responde antes pero no basta, las canciones de Last.fm van primero
+        import time
+
+        def slow_lastfm(query, limit):
+            time.sleep(0.05)
+            return ["Thunderstruck", "TNT"]
+        self.search_tool._search_via_lastfm = slow_lastfm
+        self.search_tool._search_via_spotify = MagicMock(return_value=["Hells Bells", "TNT"])
+
+        songs = self.search_tool.search_playlists("AC/DC", num_songs=3, parallel=True)
+        self.assertEqual(songs, ["Thunderstruck", "TNT", "Hells Bells"])
+
+    def test_search_playlists_parallel_does_not_wait_for_slow_source(self):
+        # Si Spotify ya completa num_songs no se espera a Last.fm
+        import threading
+        import time
+
+        release = threading.Event()
+
+        def slow_lastfm(query, limit):
+            release.wait(5)
+            return ["Thunderstruck"]
+        self.search_tool._search_via_lastfm = slow_lastfm
+        self.search_tool._search_via_spotify = MagicMock(return_value=["Hells Bells", "TNT", "Jailbreak"])
+
+        start = time.perf_counter()
+        try:
+            songs = self.search_tool.search_playlists("AC/DC", num_songs=3, parallel=True)
+        finally:
+            release.set()
+        self.assertEqual(songs, ["Hells Bells", "TNT", "Jailbreak"])
+        self.assertLess(time.perf_counter() - start, 2)
+
+    def test_search_playlists_parallel(self):
+        # En modo paralelo se combinan ambas fuentes sin duplicados
+        self.search_tool._search_via_lastfm = MagicMock(return_value=["TNT", "Thunderstruck"])
+        self.search_tool._search_via_spotify = MagicMock(return_value=["TNT", "Hells Bells"])
+
+        songs = self.search_tool.search_playlists("AC/DC", num_songs=3, parallel=True)
+        self.assertEqual(sorted(songs), ["Hells Bells", "TNT", "Thunderstruck"])
+
+    def test_search_playlists_collapses_variants(self):
+        # Las variantes de una misma canción se descartan antes de buscarlas en YouTube y Spotify
+        self.search_tool._iter_lastfm_tracks = MagicMock(return_value=iter(["TNT", "Back in Black"]))
+        self.search_tool._search_via_spotify = MagicMock(return_value=["T.N.T", "Back In Black - Remastered", "Jailbreak"])
+
+        songs = self.search_tool.search_playlists("AC/DC", num_songs=5, parallel=False)
+        self.assertEqual(songs, ["TNT", "Back in Black", "Jailbreak"])
+
+    def test_search_playlists_parallel_ignores_failed_source(self):
+        # Un fallo en una fuente no impide devolver los resultados de la otra
+        self.search_tool._search_via_lastfm = MagicMock(side_effect=Exception("timeout"))
+        self.search_tool._search_via_spotify = MagicMock(return_value=["Hells Bells"])
+
+        songs = self.search_tool.search_playlists("AC/DC", num_songs=3, parallel=True)
+        self.assertEqual(songs, ["Hells Bells"])
+
     @patch("spotipy.Spotify.search")
     def test_search_via_spotify(self, mock_search):
         # Simular una respuesta exitosa de Spotify
@@ -94,9 +237,170 @@ class TestYouTubeTool(unittest.TestCase):
         self.assertIn("playlist_url", result)
         self.assertIn("video_urls", result)
 
+class TestYouTubeToolConcurrency(unittest.TestCase):
+    @patch("autogen_agent.main.get_youtube_credentials", return_value=None)
+    @patch("googleapiclient.discovery.build")
+    def test_create_playlist_preserves_song_order(self, mock_build, mock_credentials):
+        # Las búsquedas se hacen en paralelo pero las inserciones respetan el orden
+        mock_service = MagicMock()
+        mock_service.playlists.return_value.insert.return_value.execute.return_value = {"id": "PLAYLIST_ID"}
+
+        def fake_search(q, **kwargs):
+            request = MagicMock()
+            request.execute.return_value = {
+                "items": [{"id": {"videoId": f"id-{q}"}, "snippet": {"title": q}}]
+            }
+            return request
+
+        mock_service.search.return_value.list.side_effect = fake_search
+        mock_build.return_value = mock_service
+
+        songs = [f"song{i}" for i in range(10)]
+        youtube_tool = YouTubeTool(
+            concurrency=4,
+            video_index=PersistentTTLCache("test", path=":memory:"),
+            rate_limiter=RateLimiter("test")
+        )
+        result = youtube_tool.create_playlist("Test", "Test", songs)
+
+        inserted = [
+            call.kwargs["body"]["snippet"]["resourceId"]["videoId"]
+            for call in mock_service.playlistItems.return_value.insert.call_args_list
+        ]
+        self.assertEqual(inserted, [f"id-{song}" for song in songs])
+        self.assertEqual([video["song"] for video in result["video_urls"]], songs)
+
+    @patch("autogen_agent.main.get_youtube_credentials", return_value=None)
+    @patch("googleapiclient.discovery.build")
+    def test_search_video_uses_index(self, mock_build, mock_credentials):
+        # Una canción ya resuelta no vuelve a consumir cuota de búsqueda
+        mock_service = MagicMock()
+        mock_service.search.return_value.list.return_value.execute.return_value = {
+            "items": [{"id": {"videoId": "VIDEO_ID"}, "snippet": {"title": "Back in Black"}}]
+        }
+        mock_build.return_value = mock_service
+
+        youtube_tool = YouTubeTool(video_index=PersistentTTLCache("test", path=":memory:"))
+        first = youtube_tool._search_video("Back in Black")
+        second = youtube_tool._search_video("back in black")
+
+        self.assertEqual(first, second)
+        self.assertEqual(mock_service.search.return_value.list.call_count, 1)
+        self.assertEqual(youtube_tool.video_index.stats()["hits"], 1)
+
+    def _fake_playlist_service(self, fail_first=(), fail_batch=None, seed=0):
+        """
+        Simula la API de YouTube: rechaza posiciones posteriores al final de la
+        lista y aplica las partes de cada lote en orden aleatorio.
+        """
+        import random
+        import httplib2
+        from googleapiclient.errors import HttpError
+
+        rng = random.Random(seed)
+        playlist = []
+        batches = []
+        attempts = {}
+
+        def request(apply):
+            request = MagicMock()
+            request.apply = apply
+            request.execute.side_effect = lambda **kwargs: apply()
+            return request
+
+        def insert(part, body):
+            snippet = body["snippet"]
+            video_id = snippet["resourceId"]["videoId"]
+
+            def apply():
+                attempts[video_id] = attempts.get(video_id, 0) + 1
+                if video_id in fail_first and attempts[video_id] == 1:
+                    raise HttpError(httplib2.Response({"status": 503}), b"")
+                position = snippet.get("position", len(playlist))
+                if position > len(playlist):
+                    raise HttpError(httplib2.Response({"status": 400}), b"invalidPlaylistItemPosition")
+                playlist.insert(position, video_id)
+                return {"id": f"item-{video_id}", "snippet": {"position": position, "resourceId": snippet["resourceId"]}}
+            return request(apply)
+
+        def update(part, body):
+            def apply():
+                video_id = body["id"][len("item-"):]
+                position = body["snippet"]["position"]
+                if position >= len(playlist):
+                    raise HttpError(httplib2.Response({"status": 400}), b"invalidPlaylistItemPosition")
+                playlist.remove(video_id)
+                playlist.insert(position, video_id)
+                return {"id": body["id"], "snippet": body["snippet"]}
+            return request(apply)
+
+        def new_batch(callback):
+            batch = MagicMock()
+            batch.requests = []
+            batch.add.side_effect = lambda request, request_id: batch.requests.append((request_id, request))
+            number = len(batches)
+
+            def execute(**kwargs):
+                if number == fail_batch:
+                    raise HttpError(httplib2.Response({"status": 500}), b"backendError")
+                parts = list(batch.requests)
+                rng.shuffle(parts)
+                for request_id, request in parts:
+                    try:
+                        callback(request_id, request.apply(), None)
+                    except HttpError as e:
+                        callback(request_id, None, e)
+
+            batch.execute.side_effect = execute
+            batches.append(batch)
+            return batch
+
+        service = MagicMock()
+        service.playlistItems.return_value.insert.side_effect = insert
+        service.playlistItems.return_value.update.side_effect = update
+        service.new_batch_http_request.side_effect = new_batch
+        return service, playlist, batches, attempts
+
+    @patch("autogen_agent.main.get_youtube_credentials", return_value=None)
+    @patch("googleapiclient.discovery.build")
+    def test_insert_videos_batched_keeps_order_when_batch_is_shuffled(self, mock_build, mock_credentials):
+        # El servidor aplica los lotes desordenados y v2 falla una vez: la lista final respeta el ranking
+        mock_build.return_value, playlist, batches, attempts = self._fake_playlist_service(fail_first={"v2"})
+        youtube_tool = YouTubeTool(
+            video_index=PersistentTTLCache("test", path=":memory:"),
+            batch_inserts=True,
+            rate_limiter=RateLimiter("test")
+        )
+        video_ids = [f"v{i}" for i in range(60)]
+        failed = youtube_tool._insert_videos_batched("PLAYLIST_ID", video_ids)
+
+        self.assertEqual(failed, set())
+        self.assertEqual([len(batch.requests) for batch in batches], [50, 10])
+        self.assertEqual(playlist, video_ids)
+        self.assertEqual(attempts["v2"], 2)
+
+    @patch("autogen_agent.main.get_youtube_credentials", return_value=None)
+    @patch("googleapiclient.discovery.build")
+    def test_insert_videos_batched_falls_back_when_batch_fails(self, mock_build, mock_credentials):
+        # Si falla un lote completo, sus vídeos se añaden uno a uno
+        mock_build.return_value, playlist, batches, attempts = self._fake_playlist_service(fail_batch=1)
+        youtube_tool = YouTubeTool(
+            video_index=PersistentTTLCache("test", path=":memory:"),
+            batch_inserts=True,
+            rate_limiter=RateLimiter("test")
+        )
+        video_ids = [f"v{i}" for i in range(60)]
+        failed = youtube_tool._insert_videos_batched("PLAYLIST_ID", video_ids)
+
+        self.assertEqual(failed, set())
+        self.assertEqual(playlist, video_ids)
+
 class TestSpotifyTool(unittest.TestCase):
     def setUp(self):
-        self.spotify_tool = SpotifyTool()
+        self.spotify_tool = SpotifyTool(
+            track_cache=PersistentTTLCache("test", path=":memory:"),
+            rate_limiter=RateLimiter("test")
+        )
 
     @patch("spotipy.Spotify.user_playlist_create")
     @patch("spotipy.Spotify.search")
@@ -123,6 +427,57 @@ class TestSpotifyTool(unittest.TestCase):
         self.assertIn("playlist_url", result)
         self.assertIn("track_info", result)
 
+    def test_resolve_track_uses_cache(self):
+        # Una canción ya resuelta no vuelve a buscarse en Spotify
+        self.spotify_tool.sp = MagicMock()
+        self.spotify_tool.sp.search.return_value = {
+            "tracks": {
+                "items": [
+                    {
+                        "name": "Bohemian Rhapsody",
+                        "artists": [{"name": "Queen"}],
+                        "album": {"name": "A Night at the Opera"},
+                        "uri": "spotify:track:123",
+                    }
+                ]
+            }
+        }
+
+        first = self.spotify_tool._resolve_track("Bohemian Rhapsody")
+        second = self.spotify_tool._resolve_track("bohemian rhapsody")
+        self.assertEqual(first, second)
+        self.assertEqual(first["uri"], "spotify:track:123")
+        self.assertEqual(self.spotify_tool.sp.search.call_count, 1)
+
+    def test_create_playlist_inserts_in_chunks(self):
+        # Las listas de más de 100 pistas se insertan en bloques ordenados
+        self.spotify_tool.sp = MagicMock()
+        self.spotify_tool.sp.current_user.return_value = {"id": "USER_ID"}
+        self.spotify_tool.sp.user_playlist_create.return_value = {
+            "id": "PLAYLIST_ID",
+            "external_urls": {"spotify": "https://open.spotify.com/playlist/PLAYLIST_ID"},
+        }
+        self.spotify_tool.sp.search.side_effect = lambda q, **kwargs: {
+            "tracks": {
+                "items": [
+                    {
+                        "name": q,
+                        "artists": [{"name": "Artist"}],
+                        "album": {"name": "Album"},
+                        "uri": f"spotify:track:{q}",
+                    }
+                ]
+            }
+        }
+
+        songs = [f"song{i}" for i in range(250)]
+        result = self.spotify_tool.create_playlist("Test Playlist", "Test Description", songs)
+
+        chunks = [call.args[1] for call in self.spotify_tool.sp.playlist_add_items.call_args_list]
+        self.assertEqual([len(chunk) for chunk in chunks], [100, 100, 50])
+        self.assertEqual(sum(chunks, []), [f"spotify:track:{song}" for song in songs])
+        self.assertEqual(len(result["track_info"]), 250)
+
 class TestNotificationTool(unittest.TestCase):
     def setUp(self):
         self.notification_tool = NotificationTool()
@@ -153,6 +508,49 @@ class TestEmailContentGeneration(unittest.TestCase):
         self.assertIn("subject", result)
         self.assertIn("body", result)
 
+    @patch("autogen_agent.main.ask_ollama")
+    def test_generate_email_content_runs_prompts_concurrently(self, mock_ask_ollama):
+        # El asunto y el cuerpo deben estar en curso a la vez
+        import threading
+        barrier = threading.Barrier(2, timeout=5)
+
+        def fake_ask_ollama(prompt):
+            barrier.wait()
+            return "Asunto" if "subject" in prompt else "Cuerpo"
+
+        mock_ask_ollama.side_effect = fake_ask_ollama
+        result = generate_email_content(
+            "Queen",
+            {"playlist_url": "https://youtube.com/playlist/123"},
+            {"playlist_url": "https://spotify.com/playlist/123"},
+            ["Bohemian Rhapsody"],
+        )
+        self.assertEqual(result, {"subject": "Asunto", "body": "Cuerpo"})
+
+    @patch("autogen_agent.main.get_ollama_client")
+    def test_streamed_body_keeps_partial_text_when_stream_breaks(self, mock_get_client):
+        # Si la conexión se corta a mitad, el cuerpo no incluye el mensaje de error
+        def broken_stream(*args, **kwargs):
+            yield "¡Hola "
+            yield "rockero!"
+            raise requests.exceptions.ConnectionError("conexión perdida")
+
+        mock_get_client.return_value.stream_generate.side_effect = broken_stream
+        tokens = []
+        body = main_module._generate_email_body("Escribe un correo", on_body_token=tokens.append)
+
+        self.assertEqual(body, "¡Hola rockero!")
+        self.assertEqual(tokens, ["¡Hola ", "rockero!"])
+
+    @patch("autogen_agent.main.get_ollama_client")
+    def test_stream_returns_error_message_before_first_token(self, mock_get_client):
+        def failing_stream(*args, **kwargs):
+            raise requests.exceptions.ConnectionError("sin servidor")
+            yield
+
+        mock_get_client.return_value.stream_generate.side_effect = failing_stream
+        self.assertEqual(list(main_module.ask_ollama_stream("Hola")), ["Error de conexión con Ollama"])
+
 class TestCreateMusicRecommendation(unittest.TestCase):
     @patch("main.MusicSearchTool.search_playlists")
     @patch("main.YouTubeTool.create_playlist")
@@ -170,6 +568,30 @@ class TestCreateMusicRecommendation(unittest.TestCase):
         self.assertIn("spotify_result", result)
         self.assertTrue(result["email_sent"])
 
+class TestLazyInitialization(unittest.TestCase):
+    def tearDown(self):
+        main_module._tools.pop("search", None)
+
+    @patch("autogen_agent.main.MusicSearchTool")
+    def test_tools_are_created_on_first_use(self, mock_tool_class):
+        # Importar el módulo no crea herramientas; se crean una sola vez al usarlas
+        main_module._tools.pop("search", None)
+        tool = main_module.get_search_tool()
+        self.assertIs(tool, main_module.search_tool)
+        mock_tool_class.assert_called_once()
+
+    def test_import_does_not_load_heavy_clients(self):
+        # Las bibliotecas de Google, Spotify y correo se cargan solo al usarse
+        import subprocess
+        from autogen_agent.benchmarks.startup import HEAVY_MODULES
+
+        code = (
+            f"import sys; sys.path.insert(0, {src_path!r}); import autogen_agent.main; "
+            f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+        )
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+        self.assertEqual(result.stdout.strip(), "")
+
 class TestValidateEmail(unittest.TestCase):
     def test_validate_email(self):
         # Verificar que la validación de correo funcione correctamente
@@ -0,0 +1,67 @@
+import unittest
+import sys
+import os
+import random
+import tempfile
+
+src_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+sys.path.append(src_path)
+
+from autogen_agent.catalog import SyntheticCatalog, generate_catalog
+from autogen_agent.matching import KeywordMatcher, LazyKeywordMatcher
+from autogen_agent.mock_main import LatencyModel, MOCK_DATABASE, MockInternetSearchTool
+
+def linear_find(keys, text):
+    return next((key for key in keys if key in text), None)
+
+class TestKeywordMatcher(unittest.TestCase):
+    def test_same_result_as_linear_scan(self):
+        # Comparación con el recorrido original sobre claves y textos aleatorios
+        rng = random.Random(5)
+        for _ in range(500):
+            keys = ["".join(rng.choice("ab c") for _ in range(rng.randint(1, 4))) for _ in range(rng.randint(1, 8))]
+            matcher = KeywordMatcher(keys)
+            for _ in range(10):
+                text = "".join(rng.choice("abcd ") for _ in range(rng.randint(0, 12)))
+                self.assertEqual(matcher.find(text), linear_find(keys, text), (keys, text))
+
+    def test_priority_is_key_order(self):
+        # Gana la primera clave de la lista, no la primera que aparece en el texto
+        matcher = KeywordMatcher(["metal", "rock", "heavy metal"])
+        self.assertEqual(matcher.find("heavy metal y rock"), "metal")
+        self.assertEqual(matcher.find("rock heavy"), "rock")
+        self.assertIsNone(matcher.find("jazz"))
+
+    def test_unicode_and_empty_key(self):
+        self.assertEqual(KeywordMatcher(["canción", "ñu"]).find("mi canción favorita"), "canción")
+        self.assertEqual(KeywordMatcher(["x", ""]).find("abc"), "")
+
+    def test_lazy_matcher(self):
+        calls = []
+        lazy = LazyKeywordMatcher(lambda: calls.append(1) or ["pop"])
+        self.assertEqual(lazy.find("k-pop"), "pop")
+        self.assertEqual(lazy.find("pop rock"), "pop")
+        self.assertEqual(len(calls), 1)
+
+class TestMockSearchMatching(unittest.TestCase):
+    def test_mock_database_semantics(self):
+        tool = MockInternetSearchTool(latency=LatencyModel(0))
+        for query in ["AC/DC", "lo mejor del Rock 80s", "heavy metal", "jazz", "pop metal"]:
+            expected = MOCK_DATABASE[linear_find(list(MOCK_DATABASE), query.lower()) or "pop"]
+            self.assertIs(tool.search_playlists(query), expected)
+
+    def test_catalog_artist_inside_query(self):
+        with tempfile.TemporaryDirectory() as workdir:
+            path = os.path.join(workdir, "catalogo.bin")
+            generate_catalog(path, artists=300, tracks_per_artist=5, playlists=600, seed=2)
+            with SyntheticCatalog(path) as catalog:
+                tool = MockInternetSearchTool(catalog=catalog, latency=LatencyModel(0), index_artists=300)
+                names = [name.lower() for name in catalog.artist_names()]
+                for artist in (0, 150, 299):
+                    query = f"lo mejor de {catalog.artist_name(artist)} en directo"
+                    expected = linear_find(names, query.lower())
+                    title = tool.search_playlists(query)["playlists"][0]["title"]
+                    self.assertIn(expected, title.lower())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+import sys
+import os
+import json
+import tempfile
+
+src_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+sys.path.append(src_path)
+
+from autogen_agent.cache import PersistentTTLCache
+from autogen_agent.metrics import REGISTRY, MetricsRegistry
+
+class TestMetricsRegistry(unittest.TestCase):
+    def setUp(self):
+        self.metrics = MetricsRegistry(buckets=(0.1, 1.0))
+
+    def test_counters_and_histograms(self):
+        self.metrics.increment("autogen_fallbacks_total", fallback="a")
+        self.metrics.increment("autogen_fallbacks_total", 2, fallback="a")
+        self.metrics.observe("latency_seconds", 0.05, service="x")
+        self.metrics.observe("latency_seconds", 0.5, service="x")
+        self.metrics.observe("latency_seconds", 5.0, service="x")
+
+        snapshot = self.metrics.snapshot()
+        self.assertEqual(snapshot["counters"][0]["value"], 3)
+        histogram = snapshot["histograms"][0]
+        self.assertEqual(histogram["count"], 3)
+        self.assertAlmostEqual(histogram["sum"], 5.55)
+        # Los intervalos son acumulados, como en Prometheus
+        self.assertEqual(histogram["buckets"], {"0.1": 1, "1.0": 2, "+Inf": 3})
+
+    def test_span_outcome(self):
+        with self.metrics.span("stage_seconds", stage="search") as span:
+            pass
+        self.assertIsNotNone(span.duration)
+        with self.assertRaises(ValueError):
+            with self.metrics.span("stage_seconds", stage="search"):
+                raise ValueError("fallo")
+        with self.metrics.span("stage_seconds", stage="search") as span:
+            span.labels["outcome"] = "throttled"
+
+        outcomes = sorted(h["labels"]["outcome"] for h in self.metrics.snapshot()["histograms"])
+        self.assertEqual(outcomes, ["error", "ok", "throttled"])
+
+    def test_prometheus_format(self):
+        self.metrics.increment("autogen_api_throttled_total", service='a"b')
+        self.metrics.observe("autogen_stage_duration_seconds", 0.5, stage="search")
+        text = self.metrics.to_prometheus()
+
+        self.assertIn("# TYPE autogen_api_throttled_total counter", text)
+        self.assertIn('autogen_api_throttled_total{service="a\\"b"} 1', text)
+        self.assertIn("# TYPE autogen_stage_duration_seconds histogram", text)
+        self.assertIn('autogen_stage_duration_seconds_bucket{stage="search",le="0.1"} 0', text)
+        self.assertIn('autogen_stage_duration_seconds_bucket{stage="search",le="+Inf"} 1', text)
+        self.assertIn('autogen_stage_duration_seconds_sum{stage="search"} 0.5', text)
+        self.assertIn('autogen_stage_duration_seconds_count{stage="search"} 1', text)
+
+    def test_write(self):
+        self.metrics.increment("autogen_fallbacks_total", fallback="a")
+        with tempfile.TemporaryDirectory() as workdir:
+            prom_path = os.path.join(workdir, "metrics.prom")
+            json_path = os.path.join(workdir, "metrics.json")
+            self.metrics.write(prom_path)
+            self.metrics.write(json_path)
+            with open(prom_path, encoding="utf-8") as f:
+                self.assertIn('autogen_fallbacks_total{fallback="a"} 1', f.read())
+            with open(json_path, encoding="utf-8") as f:
+                self.assertEqual(json.load(f)["counters"][0]["value"], 1)
+
+class TestCacheMetrics(unittest.TestCase):
+    def test_cache_hits_and_misses(self):
+        REGISTRY.reset()
+        cache = PersistentTTLCache("metrics_test", path=":memory:", ttl=60)
+        cache.get("queen")
+        cache.set("queen", ["Bohemian Rhapsody"])
+        cache.get("queen")
+
+        counters = {c["labels"]["result"]: c["value"] for c in REGISTRY.snapshot()["counters"]
+                    if c["name"] == "autogen_cache_requests_total"}
+        self.assertEqual(counters, {"hit": 1, "miss": 1})
+
+if __name__ == "__main__":
+    unittest.main()
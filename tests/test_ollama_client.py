@@ -0,0 +1,259 @@
+import json
+import time
+import unittest
+from unittest.mock import patch, MagicMock
+import sys
+import os
+
+src_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+sys.path.append(src_path)
+
+from autogen_agent.cache import TwoTierCache
+from autogen_agent.ollama_client import OllamaClient, OllamaError, keep_alive_seconds
+from autogen_agent.resilience import CircuitBreaker, CircuitOpenError, RetryPolicy
+
+class TestOllamaClient(unittest.TestCase):
+    def setUp(self):
+        self.client = OllamaClient("http://ollama.test/api", keep_alive="10m")
+
+    def test_generate_sends_keep_alive_and_records_metrics(self):
+        # La respuesta incluye las duraciones en nanosegundos
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {
+            "response": "Hola",
+            "load_duration": 2_000_000_000,
+            "eval_duration": 500_000_000,
+            "eval_count": 10,
+        }
+        with patch.object(self.client.session, "post", return_value=mock_response) as mock_post:
+            result = self.client.generate("Di hola", "gemma:2b")
+
+        self.assertEqual(result["response"], "Hola")
+        self.assertEqual(mock_post.call_args.kwargs["json"]["keep_alive"], "10m")
+        stats = self.client.stats()
+        self.assertEqual(stats["calls"], 1)
+        self.assertEqual(stats["cold_loads"], 1)
+        self.assertAlmostEqual(stats["tokens_per_second"], 20.0)
+
+    def test_generate_raises_on_http_error(self):
+        mock_response = MagicMock()
+        mock_response.status_code = 404
+        mock_response.text = "model not found"
+        with patch.object(self.client.session, "post", return_value=mock_response):
+            with self.assertRaises(OllamaError) as context:
+                self.client.generate("Di hola", "gemma:2b")
+        self.assertEqual(context.exception.status_code, 404)
+
+    def test_generate_retries_transient_errors_and_opens_circuit(self):
+        # Los 503 se reintentan; al superar el umbral las llamadas fallan sin red
+        self.client.retry_policy = RetryPolicy(max_retries=1, base_delay=0)
+        self.client.breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=60)
+        mock_response = MagicMock()
+        mock_response.status_code = 503
+        with patch.object(self.client.session, "post", return_value=mock_response) as mock_post:
+            with self.assertRaises(OllamaError):
+                self.client.generate("Di hola", "gemma:2b")
+            with self.assertRaises(CircuitOpenError):
+                self.client.generate("Di hola", "gemma:2b")
+        self.assertEqual(mock_post.call_count, 2)
+
+    def test_warm_up_sends_request_without_prompt(self):
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {"load_duration": 0}
+        with patch.object(self.client.session, "post", return_value=mock_response) as mock_post:
+            self.client.warm_up("gemma:2b", background=False)
+
+        self.assertNotIn("prompt", mock_post.call_args.kwargs["json"])
+        self.assertEqual(self.client.stats()["calls"], 0)
+
+    def test_warm_up_runs_once_per_keep_alive(self):
+        # Mientras el modelo siga cargado no se repite la precarga
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {"load_duration": 0}
+        with patch.object(self.client.session, "post", return_value=mock_response) as mock_post:
+            self.client.warm_up("gemma:2b", background=False)
+            self.client.warm_up("gemma:2b", background=False)
+            self.assertEqual(mock_post.call_count, 1)
+
+            # Cerca de que venza keep_alive (10m) se vuelve a precargar
+            with patch("autogen_agent.ollama_client.time.monotonic", return_value=time.monotonic() + 590):
+                self.assertFalse(self.client.is_loaded("gemma:2b"))
+                self.client.warm_up("gemma:2b", background=False)
+        self.assertEqual(mock_post.call_count, 2)
+
+    def test_warm_up_skipped_after_generate(self):
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {"response": "Hola"}
+        with patch.object(self.client.session, "post", return_value=mock_response) as mock_post:
+            self.client.generate("Di hola", "gemma:2b")
+            self.assertIsNone(self.client.warm_up("gemma:2b"))
+        self.assertEqual(mock_post.call_count, 1)
+
+    def test_warm_up_respects_circuit_breaker_and_parallelism(self):
+        # Con el circuito abierto no se envía ninguna petición
+        self.client.breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=60)
+        self.client.breaker.record_failure()
+        with patch.object(self.client.session, "post") as mock_post:
+            self.client.warm_up("gemma:2b", background=False)
+        mock_post.assert_not_called()
+
+        # La precarga espera a que quede libre una de las generaciones simultáneas
+        client = OllamaClient("http://ollama.test/api", num_parallel=1)
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {"load_duration": 0}
+        with patch.object(client.session, "post", return_value=mock_response) as mock_post:
+            client._slots.acquire()
+            thread = client.warm_up("gemma:2b")
+            thread.join(0.1)
+            self.assertEqual(mock_post.call_count, 0)
+            client._slots.release()
+            thread.join(5)
+        self.assertEqual(mock_post.call_count, 1)
+
+    def test_keep_alive_seconds(self):
+        self.assertEqual(keep_alive_seconds("30m"), 1800)
+        self.assertEqual(keep_alive_seconds("1h30m"), 5400)
+        self.assertEqual(keep_alive_seconds(-1), float("inf"))
+        self.assertEqual(keep_alive_seconds("45"), 45)
+
+    def test_generate_uses_response_cache(self):
+        # Una consulta idéntica se sirve desde la caché salvo que se desactive
+        self.client.cache = TwoTierCache("test", path=":memory:")
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {"response": "Hola"}
+        with patch.object(self.client.session, "post", return_value=mock_response) as mock_post:
+            self.client.generate("Di hola", "gemma:2b")
+            cached = self.client.generate("Di hola", "gemma:2b")
+            self.client.generate("Di hola", "gemma:2b", use_cache=False)
+
+        self.assertTrue(cached["cached"])
+        self.assertEqual(cached["response"], "Hola")
+        self.assertEqual(mock_post.call_count, 2)
+
+class TestOllamaHealth(unittest.TestCase):
+    def setUp(self):
+        self.client = OllamaClient("http://ollama.test/api")
+
+    def test_probe_uses_tags_and_caches_result(self):
+        # La comprobación no carga el modelo y se reutiliza mientras no caduque
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {"models": [{"name": "gemma:2b"}]}
+        with patch.object(self.client.session, "get", return_value=mock_response) as mock_get:
+            first = self.client.probe("gemma:2b")
+            second = self.client.probe("llama2:7b")
+
+        self.assertTrue(first["model_installed"])
+        self.assertTrue(second["server_up"])
+        self.assertFalse(second["model_installed"])
+        mock_get.assert_called_once()
+        self.assertTrue(mock_get.call_args.args[0].endswith("/tags"))
+
+    def test_probe_reports_server_down(self):
+        with patch.object(self.client.session, "get", side_effect=ConnectionError("refused")):
+            status = self.client.probe("gemma:2b")
+        self.assertFalse(status["server_up"])
+
+    def test_pull_model_reports_progress(self):
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.iter_lines.return_value = iter([
+            json.dumps({"status": "pulling", "total": 100, "completed": 50}).encode(),
+            json.dumps({"status": "success"}).encode(),
+        ])
+        with patch.object(self.client.session, "post", return_value=mock_response):
+            self.assertTrue(self.client.pull_model("gemma:2b", background=False))
+
+class TestOllamaStreaming(unittest.TestCase):
+    def setUp(self):
+        self.client = OllamaClient("http://ollama.test/api")
+
+    def _stream_response(self, tokens):
+        # Simula la respuesta NDJSON de Ollama en modo streaming
+        lines = [json.dumps({"response": token, "done": False}).encode() for token in tokens]
+        lines.append(json.dumps({"done": True, "eval_count": len(tokens), "eval_duration": 1_000_000}).encode())
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.iter_lines.return_value = iter(lines)
+        return mock_response
+
+    def test_stream_generate_yields_tokens_and_metrics(self):
+        with patch.object(self.client.session, "post", return_value=self._stream_response(["Ho", "la", "!"])):
+            tokens = list(self.client.stream_generate("Di hola", "gemma:2b"))
+
+        self.assertEqual(tokens, ["Ho", "la", "!"])
+        metrics = self.client.last_stream_metrics
+        self.assertEqual(metrics["tokens"], 3)
+        self.assertIsNotNone(metrics["ttft_seconds"])
+        self.assertFalse(metrics["stopped_early"])
+
+    def test_stream_generate_stops_at_max_tokens(self):
+        mock_response = self._stream_response(["a", "b", "c", "d"])
+        with patch.object(self.client.session, "post", return_value=mock_response) as mock_post:
+            tokens = list(self.client.stream_generate("Cuenta", "gemma:2b", max_tokens=2))
+
+        self.assertEqual(tokens, ["a", "b"])
+        self.assertEqual(mock_post.call_args.kwargs["json"]["options"]["num_predict"], 2)
+        self.assertTrue(self.client.last_stream_metrics["stopped_early"])
+        mock_response.close.assert_called_once()
+
+    def test_stream_generate_stops_at_stop_sequence(self):
+        with patch.object(self.client.session, "post", return_value=self._stream_response(["Hola", " FIN", " más"])):
+            tokens = list(self.client.stream_generate("Di hola", "gemma:2b", stop=["FIN"]))
+
+        self.assertEqual("".join(tokens), "Hola ")
+
+class TestOllamaClientParallelism(unittest.TestCase):
+    def test_generate_limits_concurrent_requests_across_threads(self):
+        # Aunque muchos hilos compartan el cliente, nunca hay más de num_parallel generaciones
+        import threading
+        import time
+        from concurrent.futures import ThreadPoolExecutor
+
+        client = OllamaClient("http://ollama.test/api", num_parallel=2)
+        lock = threading.Lock()
+        active = [0, 0]
+
+        def post(*args, **kwargs):
+            with lock:
+                active[0] += 1
+                active[1] = max(active[1], active[0])
+            time.sleep(0.02)
+            with lock:
+                active[0] -= 1
+            response = MagicMock()
+            response.status_code = 200
+            response.json.return_value = {"response": "Hola"}
+            return response
+
+        with patch.object(client.session, "post", side_effect=post):
+            with ThreadPoolExecutor(max_workers=6) as executor:
+                results = list(executor.map(lambda i: client.generate(f"Consulta {i}", "gemma:2b"), range(12)))
+
+        self.assertEqual(len(results), 12)
+        self.assertEqual(active[1], 2)
+
+    def test_stream_holds_slot_until_closed(self):
+        client = OllamaClient("http://ollama.test/api", num_parallel=1)
+        lines = [json.dumps({"response": token, "done": False}).encode() for token in ["Ho", "la"]]
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.iter_lines.return_value = iter(lines)
+
+        with patch.object(client.session, "post", return_value=mock_response):
+            stream = client.stream_generate("Di hola", "gemma:2b")
+            self.assertEqual(next(stream), "Ho")
+            self.assertFalse(client._slots.acquire(blocking=False))
+            stream.close()
+
+        self.assertTrue(client._slots.acquire(blocking=False))
+        client._slots.release()
+
+if __name__ == "__main__":
+    unittest.main()
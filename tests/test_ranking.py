@@ -0,0 +1,63 @@
+import unittest
+import sys
+import os
+
+src_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+sys.path.append(src_path)
+
+from autogen_agent.benchmarks.ranking import build_playlists, sort_top
+from autogen_agent.mock_main import get_most_popular_songs
+from autogen_agent.ranking import RankAggregator, aggregate_rankings, merge_ranked
+
+class TestRankAggregator(unittest.TestCase):
+    def test_count_matches_full_sort(self):
+        # Con empates, el heap debe devolver el mismo orden que la ordenación estable
+        playlists = build_playlists(500, length=8, vocabulary=200, seed=3)
+        for limit in (1, 10, 50, 500):
+            self.assertEqual(aggregate_rankings(iter(playlists), limit), sort_top(playlists, limit))
+
+    def test_ties_keep_first_appearance(self):
+        playlists = [["B", "A"], ["C", "A"], ["C", "B"]]
+        self.assertEqual(aggregate_rankings(playlists, 3), ["B", "A", "C"])
+
+    def test_position_weighted_scoring(self):
+        # Las tres canciones aparecen dos veces, pero "C" siempre está primera
+        playlists = [["C", "A", "B"], ["C", "B", "A"]]
+        self.assertEqual(aggregate_rankings(playlists, 1, scoring="borda"), ["C"])
+        self.assertEqual(aggregate_rankings(playlists, 1, scoring="reciprocal"), ["C"])
+
+        aggregator = RankAggregator("borda")
+        aggregator.update(playlists)
+        self.assertEqual(aggregator.top(3), [("C", 6), ("A", 3), ("B", 3)])
+        self.assertEqual(len(aggregator), 3)
+
+    def test_custom_and_unknown_scoring(self):
+        aggregator = RankAggregator(lambda position, length: 1 if position == length - 1 else 0)
+        aggregator.add(["A", "B"])
+        self.assertEqual(aggregator.top(1), [("B", 1)])
+        with self.assertRaises(ValueError):
+            RankAggregator("desconocida")
+
+    def test_merge_ranked_is_lazy(self):
+        # Las fuentes se combinan por prioridad y no se consumen más de lo necesario
+        consumed = []
+
+        def source(songs):
+            for song in songs:
+                consumed.append(song)
+                yield song
+
+        merged = merge_ranked([source(["A", "B", "a"]), source(["C", "B", "D", "E"])], 3)
+        self.assertEqual(merged.songs, ["A", "B", "C"])
+        self.assertEqual(consumed, ["A", "B", "a", "C"])
+
+    def test_get_most_popular_songs(self):
+        search_results = {"playlists": [
+            {"title": "1", "songs": ["Back in Black", "TNT", "Thunderstruck"]},
+            {"title": "2", "songs": ["Thunderstruck", "Back in Black"]}
+        ]}
+        self.assertEqual(get_most_popular_songs(search_results, limit=2), ["Back in Black", "Thunderstruck"])
+        self.assertEqual(get_most_popular_songs(search_results, limit=1, scoring="borda"), ["Back in Black"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import unittest
+from unittest.mock import MagicMock
+import sys
+import os
+import time
+
+src_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+sys.path.append(src_path)
+
+from autogen_agent.ratelimit import AdaptiveConcurrencyLimit, RateLimiter, TokenBucket, parse_retry_after, throttle_delay
+
+class TestThrottleDetection(unittest.TestCase):
+    def test_parse_retry_after(self):
+        self.assertEqual(parse_retry_after("3"), 3.0)
+        self.assertEqual(parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT"), 0.0)
+        self.assertIsNone(parse_retry_after("pronto"))
+
+    def test_spotify_exception(self):
+        from spotipy.exceptions import SpotifyException
+
+        error = SpotifyException(429, -1, "Too Many Requests", headers={"Retry-After": "2"})
+        self.assertEqual(throttle_delay(error), 2.0)
+        self.assertIsNone(throttle_delay(SpotifyException(404, -1, "Not found")))
+
+    def test_youtube_http_error(self):
+        import httplib2
+        from googleapiclient.errors import HttpError
+
+        content = b'{"error": {"errors": [{"reason": "rateLimitExceeded"}], "message": "rateLimitExceeded"}}'
+        self.assertEqual(throttle_delay(HttpError(httplib2.Response({"status": 403}), content)), 0.0)
+        quota = b'{"error": {"errors": [{"reason": "quotaExceeded"}], "message": "quotaExceeded"}}'
+        self.assertIsNone(throttle_delay(HttpError(httplib2.Response({"status": 403}), quota)))
+
+    def test_requests_response(self):
+        response = MagicMock()
+        response.status_code = 429
+        response.headers = {"Retry-After": "1"}
+        self.assertEqual(throttle_delay(response), 1.0)
+        self.assertIsNone(throttle_delay({"items": []}))
+
+class TestRateLimiter(unittest.TestCase):
+    def test_token_bucket_limits_rate(self):
+        bucket = TokenBucket(rate=100, burst=1)
+        start = time.monotonic()
+        for _ in range(4):
+            bucket.acquire()
+        self.assertGreaterEqual(time.monotonic() - start, 0.025)
+
+    def test_adaptive_concurrency(self):
+        # El límite se reduce a la mitad al ser limitado y crece tras una ronda correcta
+        limit = AdaptiveConcurrencyLimit(maximum=8)
+        limit.acquire()
+        limit.release(throttled=True)
+        self.assertEqual(limit.limit, 4)
+        for _ in range(4):
+            limit.acquire()
+            limit.release()
+        self.assertEqual(limit.limit, 5)
+
+    def test_call_retries_after_throttle(self):
+        from spotipy.exceptions import SpotifyException
+
+        func = MagicMock(side_effect=[
+            SpotifyException(429, -1, "Too Many Requests", headers={"Retry-After": "0.05"}),
+            {"ok": True}
+        ])
+        limiter = RateLimiter("test", max_concurrency=4)
+        start = time.monotonic()
+        self.assertEqual(limiter.call(func, q="rock"), {"ok": True})
+        self.assertGreaterEqual(time.monotonic() - start, 0.05)
+        self.assertEqual(func.call_count, 2)
+        stats = limiter.stats()
+        self.assertEqual((stats["requests"], stats["throttled"], stats["concurrency_limit"]), (2, 1, 2))
+
+    def test_call_gives_up_on_long_retry_after(self):
+        # Una espera mayor que max_retry_after devuelve el error sin bloquear
+        from spotipy.exceptions import SpotifyException
+
+        error = SpotifyException(429, -1, "Too Many Requests", headers={"Retry-After": "3600"})
+        limiter = RateLimiter("test", max_retry_after=10)
+        with self.assertRaises(SpotifyException):
+            limiter.call(MagicMock(side_effect=error))
+
+    def test_call_does_not_retry_other_errors(self):
+        func = MagicMock(side_effect=ValueError("error"))
+        with self.assertRaises(ValueError):
+            RateLimiter("test").call(func)
+        self.assertEqual(func.call_count, 1)
+
+if __name__ == "__main__":
+    unittest.main()
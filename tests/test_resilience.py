@@ -0,0 +1,75 @@
+import unittest
+from unittest.mock import MagicMock
+import sys
+import os
+import time
+import requests
+
+src_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+sys.path.append(src_path)
+
+from autogen_agent.resilience import CircuitBreaker, CircuitOpenError, RetryPolicy, call_with_retries, is_transient
+
+def _response(status_code):
+    response = MagicMock()
+    response.status_code = status_code
+    return response
+
+class TestRetries(unittest.TestCase):
+    def test_is_transient(self):
+        self.assertTrue(is_transient(requests.Timeout()))
+        self.assertTrue(is_transient(_response(503)))
+        self.assertFalse(is_transient(_response(404)))
+        self.assertFalse(is_transient(ValueError()))
+
+    def test_retries_transient_failures(self):
+        func = MagicMock(side_effect=[requests.ConnectionError("refused"), _response(502), _response(200)])
+        result = call_with_retries(func, "url", policy=RetryPolicy(max_retries=2, base_delay=0))
+        self.assertEqual(result.status_code, 200)
+        self.assertEqual(func.call_count, 3)
+
+    def test_gives_up_after_max_retries(self):
+        func = MagicMock(side_effect=requests.Timeout("lento"))
+        with self.assertRaises(requests.Timeout):
+            call_with_retries(func, policy=RetryPolicy(max_retries=1, base_delay=0))
+        self.assertEqual(func.call_count, 2)
+
+    def test_does_not_retry_client_errors(self):
+        func = MagicMock(return_value=_response(404))
+        self.assertEqual(call_with_retries(func, policy=RetryPolicy(max_retries=3)).status_code, 404)
+        self.assertEqual(func.call_count, 1)
+
+    def test_jittered_delay_is_bounded(self):
+        policy = RetryPolicy(base_delay=1, max_delay=3)
+        for attempt in range(5):
+            self.assertLessEqual(policy.delay(attempt), 3)
+
+class TestCircuitBreaker(unittest.TestCase):
+    def test_opens_and_fails_fast(self):
+        breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=60)
+        func = MagicMock(return_value=_response(503))
+        for _ in range(2):
+            call_with_retries(func, breaker=breaker)
+        with self.assertRaises(CircuitOpenError):
+            call_with_retries(func, breaker=breaker)
+        self.assertEqual(func.call_count, 2)
+        self.assertEqual(breaker.rejected, 1)
+
+    def test_half_open_probe_closes_circuit(self):
+        breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=0.01)
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        time.sleep(0.02)
+        self.assertEqual(call_with_retries(MagicMock(return_value=_response(200)), breaker=breaker).status_code, 200)
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    def test_failed_probe_reopens_circuit(self):
+        breaker = CircuitBreaker("test", failure_threshold=3, reset_timeout=0.01)
+        for _ in range(3):
+            breaker.record_failure()
+        time.sleep(0.02)
+        call_with_retries(MagicMock(return_value=_response(500)), breaker=breaker)
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+
+if __name__ == "__main__":
+    unittest.main()